@@ -1,109 +1,45 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.ticker import PercentFormatter
-plt.style.use('ggplot')
-sns.set_palette("Set2")
-
-# Dataframes with financial data for both companies
-# Financial data for NAPESCO
-napesco_data = {
-    'Year': [2022, 2023],
-    'Revenue': [37184789, 39522799],
-    'Cost_of_Sales': [27854616, 28650618],
-    'Gross_Profit': [9330173, 10872181],
-    'Operating_Income': [7287144, 9123378],
-    'Net_Income': [6824101, 8595511],
-    'Current_Assets': [40462604, 37040597],
-    'Inventory': [5479455, 4531445],
-    'Accounts_Receivable': [13366220, 12655113],
-    'Cash_Equivalents': [2180992, 2660961],
-    'Total_Assets': [53151614, 70683248],
-    'Current_Liabilities': [7271359, 11883710],
-    'Total_Liabilities': [10888314, 14717109],
-    'Shareholders_Equity': [42263300, 55966139],
-    'Operating_Cash_Flow': [10956411, 12565079],
-    'Depreciation': [2183024, 2535625],
-    'Accounts_Payable': [7057298, 11650349],
-    'EPS_Fils': [70.35, 88.66]
-}
-
-# Financial data for IPG
-ipg_data = {
-    'Year': [2022, 2023],
-    'Revenue': [1646039000, 1067544000],
-    'Cost_of_Sales': [1621337000, 1049408000],
-    'Gross_Profit': [24702000, 18136000],
-    'Operating_Income': [8037000, 8205000],
-    'Net_Income': [7656000, 7818000],
-    'Current_Assets': [316031000, 375971000],
-    'Inventory': [51741000, 27236000],
-    'Accounts_Receivable': [72997000, 187345000],
-    'Cash_Equivalents': [108513000, 79298000],
-    'Total_Assets': [439037000, 493470000],
-    'Current_Liabilities': [291838000, 359199000],
-    'Total_Liabilities': [338975000, 388821000],
-    'Shareholders_Equity': [100062000, 104649000],
-    'Operating_Cash_Flow': [15399000, -16691000],
-    'Depreciation': [1806000, 1677000],
-    'Accounts_Payable': [90011000, 149771000],
-    'EPS_Fils': [42.35, 43.24]
-}
-
-napesco_df = pd.DataFrame(napesco_data)
-ipg_df = pd.DataFrame(ipg_data)
-
-# Calculate ratios for both companies
-
-
-def calculate_ratios(df, company_name):
-    ratios = pd.DataFrame()
-    ratios['Year'] = df['Year']
-    ratios['Company'] = company_name
-
-    # Liquidity Ratios
-    ratios['Current_Ratio'] = df['Current_Assets'] / df['Current_Liabilities']
-    ratios['Quick_Ratio'] = (df['Current_Assets'] -
-                             df['Inventory']) / df['Current_Liabilities']
-    ratios['Cash_Ratio'] = df['Cash_Equivalents'] / df['Current_Liabilities']
-
-    # Profitability Ratios
-    ratios['Gross_Profit_Margin'] = df['Gross_Profit'] / df['Revenue']
-    ratios['Operating_Profit_Margin'] = df['Operating_Income'] / df['Revenue']
-    ratios['Net_Profit_Margin'] = df['Net_Income'] / df['Revenue']
-    ratios['ROA'] = df['Net_Income'] / df['Total_Assets']
-    ratios['ROE'] = df['Net_Income'] / df['Shareholders_Equity']
-
-    # Efficiency Ratios
-    ratios['Asset_Turnover'] = df['Revenue'] / df['Total_Assets']
-    ratios['Inventory_Turnover'] = df['Cost_of_Sales'] / df['Inventory']
-    ratios['Days_Inventory_Outstanding'] = 365 / ratios['Inventory_Turnover']
-    ratios['Receivables_Turnover'] = df['Revenue'] / df['Accounts_Receivable']
-    ratios['Days_Sales_Outstanding'] = 365 / ratios['Receivables_Turnover']
-    ratios['Payables_Turnover'] = df['Cost_of_Sales'] / df['Accounts_Payable']
-    ratios['Days_Payables_Outstanding'] = 365 / ratios['Payables_Turnover']
-
-    # Solvency Ratios
-    ratios['Debt_Ratio'] = df['Total_Liabilities'] / df['Total_Assets']
-    ratios['Debt_to_Equity'] = df['Total_Liabilities'] / \
-        df['Shareholders_Equity']
-    ratios['Equity_Multiplier'] = df['Total_Assets'] / \
-        df['Shareholders_Equity']
-
-    return ratios
-
-
-napesco_ratios = calculate_ratios(napesco_df, 'NAPESCO')
-ipg_ratios = calculate_ratios(ipg_df, 'IPG')
-
-# Combine ratios for both companies
-combined_ratios = pd.concat([napesco_ratios, ipg_ratios], axis=0)
+import argparse
+from finBundle import PAGE_FORMATS, chart_bundle
+from finCache import cached_chart, enable_render_cache, get_render_cache
+from finCorr import CORRELATION_COLUMNS
+from finDupont import dupont_table
+from finLoader import load_company_ratios
+from finPlot import (PUBLICATION, fit_layout, percent_formatter, profiled, pyplot,
+                    save_figure)
+from finRolling import latest_label, latest_rows, period_axis, period_labels
+from finScore import RADAR_DIMENSIONS, score_ratios
+from finTrace import stage, trace_from_environment, traced
+
+RATIO_FRAMES = ('napesco_ratios', 'ipg_ratios', 'combined_ratios')
+
+
+def __getattr__(name):
+    # Ratio frames are loaded on first access so importing this module has no side effects
+    if name in RATIO_FRAMES:
+        globals().update(zip(RATIO_FRAMES, load_company_ratios()))
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # 1. Create and save visualization to compare key ratios between companies
 
 
-def create_ratio_comparison_chart(combined_df, ratio_name, title, formatted_as_percentage=False, filename=None):
+def _comparison_chart_rows(arguments):
+    # The comparison chart only draws the chosen ratio for the two companies
+    combined_df = arguments['combined_df']
+    rows = combined_df['Company'].isin(['NAPESCO', 'IPG'])
+    columns = [name for name in ('Company', 'Year', 'Quarter') if name in combined_df.columns]
+    return [combined_df.loc[rows, columns + [arguments['ratio_name']]]]
+
+
+@traced('chart')
+@cached_chart(data=_comparison_chart_rows)
+@profiled
+def create_ratio_comparison_chart(combined_df, ratio_name, title, formatted_as_percentage=False, filename=None,
+                                  profile=PUBLICATION):
+    plt = pyplot()
     plt.figure(figsize=(10, 6))
 
     napesco_data = combined_df[(combined_df['Company'] == 'NAPESCO')]
@@ -118,105 +54,110 @@ def create_ratio_comparison_chart(combined_df, ratio_name, title, formatted_as_p
     plt.xlabel('Year')
     plt.ylabel(ratio_name.replace('_', ' '))
     plt.title(title)
-    plt.xticks(x, napesco_data['Year'])
+    plt.xticks(x, period_labels(napesco_data))
     plt.legend()
 
     if formatted_as_percentage:
-        plt.gca().yaxis.set_major_formatter(PercentFormatter(1.0))
+        plt.gca().yaxis.set_major_formatter(percent_formatter())
 
-    plt.tight_layout()
+    with stage('tight_layout'):
+        fit_layout(plt.gcf(), profile)
 
     if filename:
-        plt.savefig(filename)
-        print(f"Saved: {filename}")
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), filename, profile)
+        print(f"Saved: {saved}")
 
     plt.close()  # Close the figure to free up memory
 
 # 2. Create and save a comprehensive dashboard of key financial metrics
 
 
-def create_financial_dashboard(napesco_ratios, ipg_ratios, filename=None):
+@traced('chart')
+@cached_chart()
+@profiled
+def create_financial_dashboard(napesco_ratios, ipg_ratios, filename=None, profile=PUBLICATION):
+    plt = pyplot()
     fig, axes = plt.subplots(3, 2, figsize=(15, 15))
+    napesco_periods = period_axis(napesco_ratios)
+    ipg_periods = period_axis(ipg_ratios)
 
     # Profitability comparison
     axes[0, 0].set_title('Profitability Comparison')
-    axes[0, 0].plot(napesco_ratios['Year'], napesco_ratios['Net_Profit_Margin'],
+    axes[0, 0].plot(napesco_periods, napesco_ratios['Net_Profit_Margin'],
                     'o-', label='NAPESCO Net Profit Margin')
-    axes[0, 0].plot(ipg_ratios['Year'], ipg_ratios['Net_Profit_Margin'],
+    axes[0, 0].plot(ipg_periods, ipg_ratios['Net_Profit_Margin'],
                     's-', label='IPG Net Profit Margin')
-    axes[0, 0].plot(napesco_ratios['Year'],
+    axes[0, 0].plot(napesco_periods,
                     napesco_ratios['ROE'], '^-', label='NAPESCO ROE')
-    axes[0, 0].plot(ipg_ratios['Year'], ipg_ratios['ROE'],
+    axes[0, 0].plot(ipg_periods, ipg_ratios['ROE'],
                     'd-', label='IPG ROE')
     axes[0, 0].set_ylabel('Ratio Value')
     axes[0, 0].legend()
-    axes[0, 0].yaxis.set_major_formatter(PercentFormatter(1.0))
+    axes[0, 0].yaxis.set_major_formatter(percent_formatter())
 
     # Liquidity comparison
     axes[0, 1].set_title('Liquidity Comparison')
-    axes[0, 1].plot(napesco_ratios['Year'], napesco_ratios['Current_Ratio'],
+    axes[0, 1].plot(napesco_periods, napesco_ratios['Current_Ratio'],
                     'o-', label='NAPESCO Current Ratio')
-    axes[0, 1].plot(ipg_ratios['Year'], ipg_ratios['Current_Ratio'],
+    axes[0, 1].plot(ipg_periods, ipg_ratios['Current_Ratio'],
                     's-', label='IPG Current Ratio')
-    axes[0, 1].plot(napesco_ratios['Year'], napesco_ratios['Quick_Ratio'],
+    axes[0, 1].plot(napesco_periods, napesco_ratios['Quick_Ratio'],
                     '^-', label='NAPESCO Quick Ratio')
-    axes[0, 1].plot(ipg_ratios['Year'], ipg_ratios['Quick_Ratio'],
+    axes[0, 1].plot(ipg_periods, ipg_ratios['Quick_Ratio'],
                     'd-', label='IPG Quick Ratio')
     axes[0, 1].set_ylabel('Ratio Value')
     axes[0, 1].legend()
 
     # Efficiency comparison
     axes[1, 0].set_title('Efficiency Comparison')
-    axes[1, 0].plot(napesco_ratios['Year'], napesco_ratios['Asset_Turnover'],
+    axes[1, 0].plot(napesco_periods, napesco_ratios['Asset_Turnover'],
                     'o-', label='NAPESCO Asset Turnover')
-    axes[1, 0].plot(ipg_ratios['Year'], ipg_ratios['Asset_Turnover'],
+    axes[1, 0].plot(ipg_periods, ipg_ratios['Asset_Turnover'],
                     's-', label='IPG Asset Turnover')
     axes[1, 0].set_ylabel('Ratio Value')
     axes[1, 0].legend()
 
     # Solvency comparison
     axes[1, 1].set_title('Solvency Comparison')
-    axes[1, 1].plot(napesco_ratios['Year'],
+    axes[1, 1].plot(napesco_periods,
                     napesco_ratios['Debt_Ratio'], 'o-', label='NAPESCO Debt Ratio')
-    axes[1, 1].plot(ipg_ratios['Year'], ipg_ratios['Debt_Ratio'],
+    axes[1, 1].plot(ipg_periods, ipg_ratios['Debt_Ratio'],
                     's-', label='IPG Debt Ratio')
-    axes[1, 1].plot(napesco_ratios['Year'], napesco_ratios['Debt_to_Equity'],
+    axes[1, 1].plot(napesco_periods, napesco_ratios['Debt_to_Equity'],
                     '^-', label='NAPESCO Debt-to-Equity')
-    axes[1, 1].plot(ipg_ratios['Year'], ipg_ratios['Debt_to_Equity'],
+    axes[1, 1].plot(ipg_periods, ipg_ratios['Debt_to_Equity'],
                     'd-', label='IPG Debt-to-Equity')
     axes[1, 1].set_ylabel('Ratio Value')
     axes[1, 1].legend()
 
     # Working Capital Cycle
     axes[2, 0].set_title('Working Capital Cycle')
-    axes[2, 0].plot(napesco_ratios['Year'],
+    axes[2, 0].plot(napesco_periods,
                     napesco_ratios['Days_Inventory_Outstanding'], 'o-', label='NAPESCO DIO')
-    axes[2, 0].plot(ipg_ratios['Year'],
+    axes[2, 0].plot(ipg_periods,
                     ipg_ratios['Days_Inventory_Outstanding'], 's-', label='IPG DIO')
-    axes[2, 0].plot(napesco_ratios['Year'],
+    axes[2, 0].plot(napesco_periods,
                     napesco_ratios['Days_Sales_Outstanding'], '^-', label='NAPESCO DSO')
-    axes[2, 0].plot(ipg_ratios['Year'],
+    axes[2, 0].plot(ipg_periods,
                     ipg_ratios['Days_Sales_Outstanding'], 'd-', label='IPG DSO')
-    axes[2, 0].plot(napesco_ratios['Year'],
+    axes[2, 0].plot(napesco_periods,
                     napesco_ratios['Days_Payables_Outstanding'], '*-', label='NAPESCO DPO')
-    axes[2, 0].plot(ipg_ratios['Year'],
+    axes[2, 0].plot(ipg_periods,
                     ipg_ratios['Days_Payables_Outstanding'], 'x-', label='IPG DPO')
     axes[2, 0].set_ylabel('Days')
     axes[2, 0].legend()
 
     # DuPont Analysis
-    axes[2, 1].set_title('DuPont Analysis Components (2023)')
+    # Factors come from the DuPont table, one row per company and period
+    dupont = dupont_table(pd.concat([napesco_ratios, ipg_ratios]))
+    dupont_latest = dupont[latest_rows(dupont)]
+    axes[2, 1].set_title(f'DuPont Analysis Components ({latest_label(dupont)})')
 
-    napesco_2023 = napesco_ratios[napesco_ratios['Year'] == 2023]
-    ipg_2023 = ipg_ratios[ipg_ratios['Year'] == 2023]
-
-    companies = ['NAPESCO', 'IPG']
-    net_profit_margin = [napesco_2023['Net_Profit_Margin'].values[0],
-                         ipg_2023['Net_Profit_Margin'].values[0]]
-    asset_turnover = [napesco_2023['Asset_Turnover'].values[0],
-                      ipg_2023['Asset_Turnover'].values[0]]
-    equity_multiplier = [napesco_2023['Equity_Multiplier'].values[0],
-                         ipg_2023['Equity_Multiplier'].values[0]]
+    companies = dupont_latest['Company'].tolist()
+    net_profit_margin = dupont_latest['Net_Profit_Margin'].to_numpy()
+    asset_turnover = dupont_latest['Asset_Turnover'].to_numpy()
+    equity_multiplier = dupont_latest['Equity_Multiplier'].to_numpy()
 
     x = np.arange(len(companies))
     width = 0.25
@@ -230,126 +171,139 @@ def create_financial_dashboard(napesco_ratios, ipg_ratios, filename=None):
     axes[2, 1].set_xticklabels(companies)
     axes[2, 1].legend()
 
-    fig.tight_layout()
+    with stage('tight_layout'):
+        fit_layout(fig, profile)
 
     if filename:
-        plt.savefig(filename)
-        print(f"Saved: {filename}")
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), filename, profile)
+        print(f"Saved: {saved}")
 
     plt.close()  
 
 # 3. Create and save a radar chart for multidimensional financial comparison
 
 
-def create_radar_chart(napesco_ratios, ipg_ratios, filename=None):
-    # Extract 2023 data
-    napesco_2023 = napesco_ratios[napesco_ratios['Year'] == 2023].iloc[0]
-    ipg_2023 = ipg_ratios[ipg_ratios['Year'] == 2023].iloc[0]
-
-    # Define categories and values
-    categories = ['Profitability\n(Net Profit Margin)',
-                  'Liquidity\n(Current Ratio)',
-                  'Efficiency\n(Asset Turnover)',
-                  'Solvency\n(Equity Multiplier)',
-                  'Working Capital\nManagement\n(Cash Conversion Cycle)']
-
-    # we'll use normalized values to make the chart readable
-    #  industry benchmarks
-    napesco_values = [
-        napesco_2023['Net_Profit_Margin'],  # Profitability
-        min(napesco_2023['Current_Ratio']/5, 1),  # Liquidity (capped at 1)
-        napesco_2023['Asset_Turnover']/4,  # Efficiency
-        1 - (napesco_2023['Equity_Multiplier']/5),  # Solvency (inverted)
-        1 - min((napesco_2023['Days_Sales_Outstanding'] - napesco_2023['Days_Payables_Outstanding'] +
-                napesco_2023['Days_Inventory_Outstanding'])/200, 1)  # Working Capital (inverted, lower is better)
-    ]
-
-    ipg_values = [
-        ipg_2023['Net_Profit_Margin'],  # Profitability
-        min(ipg_2023['Current_Ratio']/5, 1),  # Liquidity (capped at 1)
-        ipg_2023['Asset_Turnover']/4,  # Efficiency
-        1 - (ipg_2023['Equity_Multiplier']/5),  # Solvency (inverted)
-        1 - min((ipg_2023['Days_Sales_Outstanding'] - ipg_2023['Days_Payables_Outstanding'] +
-                ipg_2023['Days_Inventory_Outstanding'])/200, 1)  # Working Capital (inverted)
-    ]
+@traced('chart')
+@cached_chart()
+@profiled
+def create_radar_chart(napesco_ratios, ipg_ratios, filename=None, scores=None,
+                       dimensions=RADAR_DIMENSIONS, profile=PUBLICATION):
+    plt = pyplot()
+    # Score the latest period unless scores for other rows (from finScore.score_ratios) are given
+    combined = pd.concat([napesco_ratios, ipg_ratios])
+    period = latest_label(combined)
+    if scores is None:
+        scores = score_ratios(combined[latest_rows(combined)], dimensions)
+
+    # Define categories; scores are normalized against industry benchmarks
+    categories = [dimension.label for dimension in dimensions]
+    names = [dimension.name for dimension in dimensions]
+    several_years = 'Year' in scores and scores['Year'].nunique() > 1
 
     # Create radar chart
     angles = np.linspace(0, 2*np.pi, len(categories), endpoint=False).tolist()
     angles += angles[:1]  # close the loop
 
-    napesco_values += napesco_values[:1]
-    ipg_values += ipg_values[:1]
-
     fig, ax = plt.subplots(figsize=(10, 10), subplot_kw=dict(polar=True))
-    ax.plot(angles, napesco_values, 'o-', linewidth=2, label='NAPESCO')
-    ax.fill(angles, napesco_values, alpha=0.25)
-    ax.plot(angles, ipg_values, 'o-', linewidth=2, label='IPG')
-    ax.fill(angles, ipg_values, alpha=0.25)
+    for label, row in scores.iterrows():
+        values = row[names].tolist()
+        values += values[:1]
+        if 'Company' in scores:
+            label = f"{row['Company']} {row['Year']}" if several_years else row['Company']
+        ax.plot(angles, values, 'o-', linewidth=2, label=label)
+        ax.fill(angles, values, alpha=0.25)
 
     ax.set_thetagrids(np.degrees(angles[:-1]), categories)
     ax.set_ylim(0, 1)
-    ax.set_title('Financial Performance Comparison (2023)')
+    ax.set_title(f'Financial Performance Comparison ({period})')
     ax.legend(loc='upper right')
     ax.grid(True)
 
     if filename:
-        plt.savefig(filename)
-        print(f"Saved: {filename}")
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), filename, profile)
+        print(f"Saved: {saved}")
 
     plt.close() 
 
 # 4. Create and save correlation heatmap for ratio relationships
 
+# Select numerical columns for correlation analysis
+correlation_columns = CORRELATION_COLUMNS
+
+
+def _heatmap_rows(arguments):
+    # The heatmap only depends on the selected company's correlation columns
+    if arguments['corr_matrix'] is not None:
+        return [arguments['corr_matrix']]
+    ratios_df = arguments['ratios_df']
+    return [ratios_df.loc[ratios_df['Company'] == arguments['company_name'],
+                          correlation_columns]]
+
 
-def create_correlation_heatmap(ratios_df, company_name, filename=None):
-    # Select numerical columns for correlation analysis
-    correlation_columns = ['Current_Ratio', 'Quick_Ratio', 'Gross_Profit_Margin',
-                           'Net_Profit_Margin', 'ROA', 'ROE', 'Asset_Turnover',
-                           'Inventory_Turnover', 'Debt_Ratio', 'Debt_to_Equity']
+@traced('chart')
+@cached_chart(data=_heatmap_rows)
+@profiled
+def create_correlation_heatmap(ratios_df, company_name, filename=None, corr_matrix=None,
+                               profile=PUBLICATION):
+    plt = pyplot()
+    import seaborn as sns
 
-    company_data = ratios_df[ratios_df['Company']
-                             == company_name][correlation_columns]
+    # A precomputed corr_matrix (a sector or universe matrix from finCorr) is drawn as is
+    if corr_matrix is None:
+        company_data = ratios_df[ratios_df['Company']
+                                 == company_name][correlation_columns]
 
-    # Correlation matrix
-    corr_matrix = company_data.corr()
+        # Correlation matrix
+        corr_matrix = company_data.corr()
 
     # Create heatmap
     plt.figure(figsize=(12, 10))
     heatmap = sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', vmin=-1, vmax=1,
                           linewidths=0.5, fmt=".2f")
     plt.title(f'Correlation Between Financial Ratios - {company_name}')
-    plt.tight_layout()
+    with stage('tight_layout'):
+        fit_layout(plt.gcf(), profile)
 
     if filename:
-        plt.savefig(filename)
-        print(f"Saved: {filename}")
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), filename, profile)
+        print(f"Saved: {saved}")
 
     plt.close() 
 
 # 5. Financial efficiency matrix
 
 
-def create_efficiency_matrix(napesco_ratios, ipg_ratios, filename=None):
-    # Extract 2023 data
-    napesco_2023 = napesco_ratios[napesco_ratios['Year'] == 2023].iloc[0]
-    ipg_2023 = ipg_ratios[ipg_ratios['Year'] == 2023].iloc[0]
+@traced('chart')
+@cached_chart()
+@profiled
+def create_efficiency_matrix(napesco_ratios, ipg_ratios, filename=None, profile=PUBLICATION):
+    plt = pyplot()
+    # Compare the two companies at the latest period both have reported
+    combined = pd.concat([napesco_ratios, ipg_ratios])
+    latest = combined[latest_rows(combined)].set_index('Company')
+    period = latest_label(combined)
+    napesco_latest = latest.loc['NAPESCO']
+    ipg_latest = latest.loc['IPG']
 
     fig, ax = plt.subplots(figsize=(10, 8))
 
     # Define the mean lines for creating quadrants
-    roe_mean = (napesco_2023['ROE'] + ipg_2023['ROE']) / 2
+    roe_mean = (napesco_latest['ROE'] + ipg_latest['ROE']) / 2
     liquidity_mean = (
-        napesco_2023['Current_Ratio'] + ipg_2023['Current_Ratio']) / 2
+        napesco_latest['Current_Ratio'] + ipg_latest['Current_Ratio']) / 2
 
     # Create quadrant lines
     ax.axhline(y=liquidity_mean, color='gray', linestyle='--', alpha=0.5)
     ax.axvline(x=roe_mean, color='gray', linestyle='--', alpha=0.5)
 
     # Plot the companies
-    ax.scatter(napesco_2023['ROE'], napesco_2023['Current_Ratio'],
-               s=200, color='blue', label='NAPESCO 2023')
-    ax.scatter(ipg_2023['ROE'], ipg_2023['Current_Ratio'],
-               s=200, color='green', label='IPG 2023')
+    ax.scatter(napesco_latest['ROE'], napesco_latest['Current_Ratio'],
+               s=200, color='blue', label=f'NAPESCO {period}')
+    ax.scatter(ipg_latest['ROE'], ipg_latest['Current_Ratio'],
+               s=200, color='green', label=f'IPG {period}')
 
     # Add annotations
     ax.annotate('Higher profitability,\nHigher liquidity',
@@ -362,53 +316,182 @@ def create_efficiency_matrix(napesco_ratios, ipg_ratios, filename=None):
                 xy=(0.25, 0.25), xycoords='axes fraction', fontsize=12)
 
     ax.set_title(
-        'Financial Efficiency Matrix: Profitability vs. Liquidity (2023)')
+        f'Financial Efficiency Matrix: Profitability vs. Liquidity ({period})')
     ax.set_xlabel('Return on Equity (ROE)')
     ax.set_ylabel('Current Ratio')
     ax.legend()
     ax.grid(alpha=0.3)
 
     # Format axes as percentages for ROE
-    ax.xaxis.set_major_formatter(PercentFormatter(1.0))
+    ax.xaxis.set_major_formatter(percent_formatter())
 
     if filename:
-        plt.savefig(filename)
-        print(f"Saved: {filename}")
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), filename, profile)
+        print(f"Saved: {saved}")
 
     plt.close()  # Close the figure to free up memory
 
 
-# Execute each chart one by one and save individually
-print("Creating and saving individual charts:")
+def _density_matrix_rows(arguments):
+    # The density matrix only reads the two plotted ratios and the row labels
+    ratios_df = arguments['ratios_df']
+    if 'Company' not in ratios_df.columns:
+        ratios_df = ratios_df.reset_index()
+    return [ratios_df[[name for name in ('Company', 'Year', 'ROE', 'Current_Ratio')
+                       if name in ratios_df.columns]]]
+
+
+@traced('chart')
+@cached_chart(data=_density_matrix_rows)
+@profiled
+def create_efficiency_density_matrix(ratios_df, filename=None, year=None,
+                                     focus=('NAPESCO', 'IPG'), mode='hexbin',
+                                     gridsize=60, clip=(0.01, 0.99), profile=PUBLICATION):
+    plt = pyplot()
+    # Universe version of the efficiency matrix: points are binned before drawing so
+    # render time and file size depend on the grid, not on the number of companies
+    if 'Company' not in ratios_df.columns:
+        ratios_df = ratios_df.reset_index()
+    if year is not None:
+        ratios_df = ratios_df[ratios_df['Year'] == year]
+    roe = ratios_df['ROE'].to_numpy(dtype=np.float64)
+    liquidity = ratios_df['Current_Ratio'].to_numpy(dtype=np.float64)
+    finite = np.isfinite(roe) & np.isfinite(liquidity)
+
+    # Quadrant thresholds are the universe medians; outliers are clipped onto the edges
+    roe_median = np.median(roe[finite])
+    liquidity_median = np.median(liquidity[finite])
+    roe_bounds = np.quantile(roe[finite], clip)
+    liquidity_bounds = np.quantile(liquidity[finite], clip)
+    x = np.clip(roe[finite], *roe_bounds)
+    y = np.clip(liquidity[finite], *liquidity_bounds)
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+
+    if mode == 'hexbin':
+        cells = ax.hexbin(x, y, gridsize=gridsize, bins='log', mincnt=1, cmap='viridis',
+                          extent=(*roe_bounds, *liquidity_bounds))
+        fig.colorbar(cells, ax=ax, label='Companies per cell')
+    elif mode == 'hist2d':
+        counts, x_edges, y_edges = np.histogram2d(x, y, bins=gridsize,
+                                                  range=[roe_bounds, liquidity_bounds])
+        counts = np.ma.masked_equal(counts, 0)
+        cells = ax.pcolormesh(x_edges, y_edges, counts.T, cmap='viridis')
+        fig.colorbar(cells, ax=ax, label='Companies per cell')
+    elif mode == 'scatter':
+        ax.scatter(x, y, s=4, alpha=0.3, color='gray')
+    else:
+        raise ValueError(f"Unknown efficiency matrix mode: {mode}")
+
+    # Create quadrant lines
+    ax.axhline(y=liquidity_median, color='gray', linestyle='--', alpha=0.5)
+    ax.axvline(x=roe_median, color='gray', linestyle='--', alpha=0.5)
+
+    # Highlight the focus companies on top of the density
+    companies = ratios_df['Company'].astype(str).to_numpy()[finite]
+    for company, color in zip(focus, ['blue', 'green', 'red', 'orange', 'purple']):
+        rows = companies == company
+        if rows.any():
+            ax.scatter(x[rows], y[rows], s=200, color=color, edgecolor='white',
+                       label=company, zorder=3)
+
+    # Add annotations
+    ax.annotate('Higher profitability,\nHigher liquidity',
+                xy=(0.75, 0.75), xycoords='axes fraction', fontsize=12)
+    ax.annotate('Lower profitability,\nHigher liquidity',
+                xy=(0.25, 0.75), xycoords='axes fraction', fontsize=12)
+    ax.annotate('Higher profitability,\nLower liquidity',
+                xy=(0.75, 0.25), xycoords='axes fraction', fontsize=12)
+    ax.annotate('Lower profitability,\nLower liquidity',
+                xy=(0.25, 0.25), xycoords='axes fraction', fontsize=12)
+
+    period = f' ({year})' if year is not None else ''
+    ax.set_title(f'Financial Efficiency Matrix: Profitability vs. Liquidity{period}')
+    ax.set_xlabel('Return on Equity (ROE)')
+    ax.set_ylabel('Current Ratio')
+    if any(company in companies for company in focus):
+        ax.legend()
+    ax.grid(alpha=0.3)
+
+    # Format axes as percentages for ROE
+    ax.xaxis.set_major_formatter(percent_formatter())
+
+    if filename:
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), filename, profile)
+        print(f"Saved: {saved}")
+
+    plt.close()
+
+
+def create_all_charts(napesco_ratios, ipg_ratios, combined_ratios):
+    """
+    Create every chart of the analysis under its usual filename
+    """
+    # Create comparison charts for key ratios
+    create_ratio_comparison_chart(combined_ratios, 'Net_Profit_Margin', 'Net Profit Margin Comparison',
+                                  True, 'net_profit_margin_comparison.png')
+
+    create_ratio_comparison_chart(combined_ratios, 'Current_Ratio', 'Current Ratio Comparison',
+                                  False, 'current_ratio_comparison.png')
+
+    create_ratio_comparison_chart(combined_ratios, 'Asset_Turnover', 'Asset Turnover Comparison',
+                                  False, 'asset_turnover_comparison.png')
+
+    create_ratio_comparison_chart(combined_ratios, 'Debt_to_Equity', 'Debt to Equity Comparison',
+                                  False, 'debt_to_equity_comparison.png')
+
+    # Create comprehensive dashboard
+    create_financial_dashboard(napesco_ratios, ipg_ratios,
+                               'financial_dashboard.png')
+
+    # Create radar chart
+    create_radar_chart(napesco_ratios, ipg_ratios, 'radar_chart.png')
+
+    # Create correlation heatmaps
+    create_correlation_heatmap(combined_ratios, 'NAPESCO',
+                               'napesco_correlation_heatmap.png')
+    create_correlation_heatmap(combined_ratios, 'IPG',
+                               'ipg_correlation_heatmap.png')
+
+    # Create financial efficiency matrix
+    create_efficiency_matrix(napesco_ratios, ipg_ratios,
+                             'financial_efficiency_matrix.png')
+
 
-# Create comparison charts for key ratios
-create_ratio_comparison_chart(combined_ratios, 'Net_Profit_Margin', 'Net Profit Margin Comparison',
-                              True, 'net_profit_margin_comparison.png')
+def main(bundle=None, page_format='png'):
+    # Set FIN_TRACE=trace.json to record per-stage timings for this run
+    trace_from_environment()
 
-create_ratio_comparison_chart(combined_ratios, 'Current_Ratio', 'Current Ratio Comparison',
-                              False, 'current_ratio_comparison.png')
+    # Calculate ratios for both companies
+    napesco_ratios, ipg_ratios, combined_ratios = load_company_ratios()
 
-create_ratio_comparison_chart(combined_ratios, 'Asset_Turnover', 'Asset Turnover Comparison',
-                              False, 'asset_turnover_comparison.png')
+    # With a bundle path every chart becomes a page of one .pdf or .zip file
+    if bundle:
+        with chart_bundle(bundle, page_format) as charts:
+            create_all_charts(napesco_ratios, ipg_ratios, combined_ratios)
+        print(f"Bundled {len(charts.pages)} charts into {bundle}")
+        return
 
-create_ratio_comparison_chart(combined_ratios, 'Debt_to_Equity', 'Debt to Equity Comparison',
-                              False, 'debt_to_equity_comparison.png')
+    # Execute each chart one by one and save individually
+    print("Creating and saving individual charts:")
 
-# Create comprehensive dashboard
-create_financial_dashboard(napesco_ratios, ipg_ratios,
-                           'financial_dashboard.png')
+    # Charts whose ratios and parameters are unchanged are copied from the render cache
+    enable_render_cache()
 
-# Create radar chart
-create_radar_chart(napesco_ratios, ipg_ratios, 'radar_chart.png')
+    create_all_charts(napesco_ratios, ipg_ratios, combined_ratios)
 
-# Create correlation heatmaps
-create_correlation_heatmap(combined_ratios, 'NAPESCO',
-                           'napesco_correlation_heatmap.png')
-create_correlation_heatmap(combined_ratios, 'IPG',
-                           'ipg_correlation_heatmap.png')
+    cache_stats = get_render_cache().stats()
+    print(f"Render cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    print("Financial ratio analysis complete. All visualizations have been saved individually.")
 
-# Create financial efficiency matrix
-create_efficiency_matrix(napesco_ratios, ipg_ratios,
-                         'financial_efficiency_matrix.png')
 
-print("Financial ratio analysis complete. All visualizations have been saved individually.")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='NAPESCO vs IPG financial ratio charts')
+    parser.add_argument('--bundle', default=None,
+                        help='write every chart as a page of one .pdf or .zip file')
+    parser.add_argument('--page-format', choices=PAGE_FORMATS, default='png',
+                        help='page format inside a .zip bundle')
+    args = parser.parse_args()
+    main(bundle=args.bundle, page_format=args.page_format)
@@ -0,0 +1,836 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from finRatios import (RATIO_COLUMNS, STATEMENT_COLUMNS, calculate_panel_ratios,
+                       calculate_ratios)
+
+
+def make_synthetic_statements(n_companies, n_years, start_year=2014, seed=0):
+    """
+    Generate a long (Company, Year) statement table with realistic magnitudes
+    Line items keep the accounting identities of the real NAPESCO/IPG data
+    """
+    rng = np.random.default_rng(seed)
+    n = n_companies * n_years
+
+    company = np.repeat(np.array([f'CO{i:06d}' for i in range(n_companies)]), n_years)
+    year = np.tile(np.arange(start_year, start_year + n_years), n_companies)
+
+    revenue = rng.lognormal(mean=18, sigma=1.5, size=n)
+    cost_of_sales = revenue * rng.uniform(0.55, 0.98, n)
+    gross_profit = revenue - cost_of_sales
+    operating_income = gross_profit * rng.uniform(0.3, 0.9, n)
+    net_income = operating_income * rng.uniform(0.6, 1.0, n)
+
+    total_assets = revenue * rng.uniform(0.5, 2.5, n)
+    current_assets = total_assets * rng.uniform(0.3, 0.8, n)
+    inventory = current_assets * rng.uniform(0.05, 0.3, n)
+    accounts_receivable = current_assets * rng.uniform(0.1, 0.4, n)
+    cash_equivalents = current_assets * rng.uniform(0.03, 0.3, n)
+    total_liabilities = total_assets * rng.uniform(0.1, 0.8, n)
+    current_liabilities = total_liabilities * rng.uniform(0.4, 0.95, n)
+    shareholders_equity = total_assets - total_liabilities
+
+    return pd.DataFrame({
+        'Company': company,
+        'Year': year,
+        'Revenue': revenue.round(),
+        'Cost_of_Sales': cost_of_sales.round(),
+        'Gross_Profit': gross_profit.round(),
+        'Operating_Income': operating_income.round(),
+        'Net_Income': net_income.round(),
+        'Current_Assets': current_assets.round(),
+        'Inventory': inventory.round(),
+        'Accounts_Receivable': accounts_receivable.round(),
+        'Cash_Equivalents': cash_equivalents.round(),
+        'Total_Assets': total_assets.round(),
+        'Current_Liabilities': current_liabilities.round(),
+        'Total_Liabilities': total_liabilities.round(),
+        'Shareholders_Equity': shareholders_equity.round(),
+        'Operating_Cash_Flow': (net_income * rng.uniform(-0.5, 1.8, n)).round(),
+        'Depreciation': (total_assets * rng.uniform(0.01, 0.06, n)).round(),
+        'Accounts_Payable': (current_liabilities * rng.uniform(0.2, 0.6, n)).round(),
+        'EPS_Fils': rng.uniform(5, 150, n).round(2),
+    })
+
+
+def make_synthetic_rows(n_rows, n_years=10, seed=0):
+    """
+    Synthetic statement table with exactly n_rows (Company, Year) rows
+    """
+    n_companies = max(1, -(-n_rows // n_years))
+    statements = make_synthetic_statements(n_companies, min(n_years, n_rows), seed=seed)
+    return statements.iloc[:n_rows].reset_index(drop=True)
+
+
+def make_synthetic_company_ratios(seed=0):
+    """
+    Two companies x two years of ratios shaped like napesco_ratios / ipg_ratios
+    """
+    statements = make_synthetic_statements(2, 2, start_year=2022, seed=seed)
+    first, second = (group.reset_index(drop=True)
+                     for _, group in statements.groupby('Company', sort=True))
+    napesco_ratios = calculate_ratios(first, 'NAPESCO')
+    ipg_ratios = calculate_ratios(second, 'IPG')
+    return napesco_ratios, ipg_ratios, pd.concat([napesco_ratios, ipg_ratios], axis=0)
+
+
+def per_company_ratios(statements):
+    """
+    Reference path: one calculate_ratios call per company glued together with pd.concat
+    """
+    frames = [calculate_ratios(group.reset_index(drop=True), company)
+              for company, group in statements.groupby('Company', sort=False)]
+    return pd.concat(frames, axis=0)
+
+
+def benchmark_panel_ratios(n_companies, n_years, repeat=3):
+    """
+    Time the per-company loop against the vectorized panel engine on the same data
+    Also checks both paths produce the same ratios before reporting
+    """
+    statements = make_synthetic_statements(n_companies, n_years)
+
+    def best_of(func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func(statements)
+            timings.append(time.perf_counter() - start)
+        return min(timings), result
+
+    loop_seconds, loop_result = best_of(per_company_ratios)
+    panel_seconds, panel_result = best_of(calculate_panel_ratios)
+
+    expected = loop_result.set_index(['Company', 'Year'])
+    pd.testing.assert_frame_equal(expected, panel_result, check_dtype=False)
+
+    return {
+        'rows': len(statements),
+        'per_company_seconds': loop_seconds,
+        'panel_seconds': panel_seconds,
+        'speedup': loop_seconds / panel_seconds,
+    }
+
+
+def benchmark_store_memory(n_rows=1_000_000):
+    """
+    Bytes held by a statement panel and its ratios as DataFrames and as a StatementStore
+    The DataFrame baseline keeps Company as an object column, as the analysis scripts do
+    """
+    from finStore import StatementStore
+
+    statements = make_synthetic_rows(n_rows)
+    statements['Company'] = statements['Company'].astype(object)
+    store = StatementStore.from_frame(statements)
+
+    frame_bytes = int(statements.memory_usage(deep=True).sum())
+    ratio_frame_bytes = int(calculate_panel_ratios(statements).memory_usage(deep=True).sum())
+    return {
+        'rows': n_rows,
+        'frame_bytes': frame_bytes,
+        'store_bytes': store.nbytes,
+        'ratio_frame_bytes': ratio_frame_bytes,
+        'ratio_store_bytes': store.ratios(dtype=np.float32).nbytes,
+        'reduction': frame_bytes / store.nbytes,
+    }
+
+
+def benchmark_percentile_index(n_companies=20_000, n_years=10, queries=1_000):
+    """
+    Build a PercentileIndex over a synthetic universe, then time single percentile queries
+    against re-ranking the year with pandas and the bulk rank against groupby().rank()
+    """
+    from finRank import PercentileIndex
+
+    ratios = calculate_panel_ratios(make_synthetic_statements(n_companies, n_years))
+    year = int(ratios.index.get_level_values('Year')[0])
+    companies = ratios.index.get_level_values('Company')[:queries]
+
+    start = time.perf_counter()
+    index = PercentileIndex(ratios)
+    build_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for company in companies:
+        index.company_percentile('ROE', company, year)
+    query_seconds = (time.perf_counter() - start) / len(companies)
+
+    start = time.perf_counter()
+    ranked = ratios.xs(year, level='Year')['ROE'].rank(method='max', pct=True)
+    ranked[companies[0]]
+    resort_seconds = time.perf_counter() - start
+
+    bulk_seconds = time_call(index.rank_all, 3)['seconds']
+    groupby_seconds = time_call(
+        lambda: ratios.groupby(level='Year').rank(method='max', pct=True), 3)['seconds']
+
+    return {
+        'rows': len(ratios),
+        'build_seconds': build_seconds,
+        'query_seconds': query_seconds,
+        'resort_seconds': resort_seconds,
+        'bulk_seconds': bulk_seconds,
+        'groupby_rank_seconds': groupby_seconds,
+    }
+
+
+def benchmark_density_matrix(sizes=(1_000, 10_000, 100_000, 1_000_000),
+                             modes=('scatter', 'hexbin', 'hist2d')):
+    """
+    Render time and PNG size of the universe efficiency matrix per point count and mode
+    """
+    from fin import create_efficiency_density_matrix
+
+    results = []
+    with scratch_directory():
+        for n_rows in sizes:
+            ratios = calculate_panel_ratios(make_synthetic_rows(n_rows)).reset_index()
+            for mode in modes:
+                start = time.perf_counter()
+                create_efficiency_density_matrix(ratios, 'bench_density.png', mode=mode,
+                                                 focus=('CO000000', 'CO000001'))
+                results.append({'rows': n_rows, 'mode': mode,
+                                'seconds': time.perf_counter() - start,
+                                'bytes': os.path.getsize('bench_density.png')})
+    return results
+
+
+def benchmark_dupont(n_companies=100_000, n_years=10, repeat=3):
+    """
+    Time the DuPont table over a synthetic universe, in panel order and shuffled
+    """
+    from finDupont import dupont_table
+
+    ratios = calculate_panel_ratios(make_synthetic_statements(n_companies, n_years))
+    ratios = ratios.reset_index()
+    shuffled = ratios.sample(frac=1.0, random_state=0)
+    return {
+        'rows': len(ratios),
+        'sorted_seconds': time_call(lambda: dupont_table(ratios), repeat)['seconds'],
+        'shuffled_seconds': time_call(lambda: dupont_table(shuffled), repeat)['seconds'],
+        'shapley_seconds': time_call(lambda: dupont_table(ratios, method='shapley'),
+                                     repeat)['seconds'],
+    }
+
+
+def benchmark_rolling_ttm(n_companies=20_000, n_quarters=40, repeat=3):
+    """
+    Trailing-twelve-month statements: rebuilding the whole quarterly panel vs applying one
+    new quarter for every company to a RollingStatements
+    """
+    from finRolling import RollingStatements, ttm_statements
+
+    statements = make_synthetic_statements(n_companies, n_quarters + 1, start_year=0)
+    statements['Quarter'] = statements['Year'] % 4 + 1
+    statements['Year'] = 2000 + statements['Year'] // 4
+    latest = (statements['Year'] * 4 + statements['Quarter']).max()
+    is_latest = (statements['Year'] * 4 + statements['Quarter']) == latest
+    history, new_quarter = statements[~is_latest], statements[is_latest]
+
+    def step():
+        rolling = RollingStatements()
+        rolling.update(history)
+        start = time.perf_counter()
+        rolling.update(new_quarter)
+        return time.perf_counter() - start
+
+    return {
+        'rows': len(statements),
+        'rebuild_seconds': time_call(lambda: ttm_statements(statements), repeat)['seconds'],
+        'step_seconds': min(step() for _ in range(repeat)),
+    }
+
+
+def benchmark_reports(n_companies=50_000, n_years=5):
+    """
+    Stream a report per company of a synthetic universe in each format to a null writer
+    """
+    from finReport import REPORT_FORMATS, write_reports
+
+    ratios = calculate_panel_ratios(make_synthetic_statements(n_companies, n_years))
+    results = []
+    with open(os.devnull, 'w', buffering=1 << 20) as writer:
+        for fmt in REPORT_FORMATS:
+            start = time.perf_counter()
+            written = write_reports(ratios, writer, fmt)
+            seconds = time.perf_counter() - start
+            results.append({'format': fmt, 'reports': written, 'seconds': seconds,
+                            'per_second': written / seconds})
+    return results
+
+
+def benchmark_scenario(draws=1_000_000, chunk=None, repeat=3):
+    """
+    Percentile bands of every ratio under 1M correlated Revenue / Cost_of_Sales /
+    Inventory / Operating_Cash_Flow shocks to one synthetic company year
+    """
+    from finScenario import DRAW_CHUNK, Shock, ratio_bands
+
+    statement = make_synthetic_statements(1, 1).iloc[0]
+    shocks = [Shock('Revenue', 0.0, 0.1), Shock('Cost_of_Sales', 0.0, 0.1),
+              Shock('Inventory', -0.2, 0.05), Shock('Operating_Cash_Flow', 0.0, 0.3)]
+    correlation = np.eye(len(shocks))
+    correlation[0, 1] = correlation[1, 0] = 0.8
+    chunk = chunk or DRAW_CHUNK
+    return {
+        'draws': draws,
+        'chunk': chunk,
+        'seconds': time_call(lambda: ratio_bands(statement, shocks, correlation, draws,
+                                                 chunk=chunk), repeat)['seconds'],
+    }
+
+
+def benchmark_validation(n_companies=200_000, n_years=5, repeat=3):
+    """
+    Validating a statement panel against every rule vs calculating its ratios
+    """
+    from finValidate import VALIDATION_RULES, validate_statements
+
+    statements = make_synthetic_statements(n_companies, n_years)
+    return {
+        'rows': len(statements),
+        'rules': len(VALIDATION_RULES),
+        'validate_seconds': time_call(lambda: validate_statements(statements),
+                                      repeat)['seconds'],
+        'ratio_seconds': time_call(lambda: calculate_panel_ratios(statements),
+                                   repeat)['seconds'],
+    }
+
+
+def benchmark_fx(n_companies=200_000, n_years=5, repeat=3):
+    """
+    Tagging a three-currency synthetic universe and converting it to one currency
+    """
+    from finFx import CurrencyPanel, FxRates, tag_statements
+
+    statements = make_synthetic_statements(n_companies, n_years)
+    statements['Company'] = statements['Company'].astype('category')
+    currencies = ['KWD', 'AED', 'USD']
+    companies = statements['Company'].cat.categories
+    currency = {company: currencies[i % 3] for i, company in enumerate(companies)}
+    scale = {company: 1000 if i % 2 else 1 for i, company in enumerate(companies)}
+    years = sorted(statements['Year'].unique())
+    fx = FxRates(pd.DataFrame({
+        'Currency': np.repeat(['KWD', 'AED'], len(years)),
+        'Year': years * 2,
+        'Closing': np.r_[np.linspace(3.2, 3.3, len(years)), np.full(len(years), 0.2723)],
+        'Average': np.r_[np.linspace(3.1, 3.4, len(years)), np.full(len(years), 0.2723)],
+    }))
+
+    tagged = tag_statements(statements, currency, scale)
+    panel = CurrencyPanel(tagged, fx)
+    return {
+        'rows': len(statements),
+        'tag_seconds': time_call(lambda: tag_statements(statements, currency, scale),
+                                 repeat)['seconds'],
+        'convert_seconds': time_call(lambda: CurrencyPanel(tagged, fx).convert('USD'),
+                                     repeat)['seconds'],
+        'cached_seconds': time_call(lambda: panel.convert('USD'), repeat)['seconds'],
+    }
+
+
+def peak_allocation(func):
+    """
+    Peak bytes allocated while func runs, as traced by tracemalloc
+    """
+    import tracemalloc
+
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_kernel(n_companies=200_000, n_years=5, repeat=3):
+    """
+    Pandas ratio path, panel engine and fused kernel on one synthetic universe: time,
+    peak allocation and whether each gives exactly the pandas values. Every path runs on
+    the generated statements and again with the dtypes load_statements gives them
+    (categorical Company, int16 Year); the array rows skip building the index
+    """
+    from finKernel import fused_panel_ratios
+    from finLoader import statement_dtypes
+
+    generated = make_synthetic_statements(n_companies, n_years)
+    columns = {name: generated[name].to_numpy(dtype=np.float64)
+               for name in STATEMENT_COLUMNS}
+    reference = calculate_ratios(generated, 'ALL')[RATIO_COLUMNS].to_numpy()
+    results = []
+    for dtypes, statements in [('generated', generated),
+                               ('loader', generated.astype(statement_dtypes()))]:
+        paths = [
+            ('pandas', lambda: calculate_ratios(statements, 'ALL')),
+            ('panel', lambda: calculate_panel_ratios(statements)),
+            ('fused', lambda: fused_panel_ratios(statements)),
+            ('fused nan', lambda: fused_panel_ratios(statements, policy='nan')),
+            ('fused flag', lambda: fused_panel_ratios(statements, policy='flag')),
+        ]
+        if dtypes == 'generated':
+            paths += [('panel arrays', lambda: calculate_panel_ratios(columns)),
+                      ('fused arrays', lambda: fused_panel_ratios(columns))]
+        for name, func in paths:
+            ratios = func()
+            values = np.column_stack([np.broadcast_to(ratios[column], len(statements))
+                                      for column in RATIO_COLUMNS])
+            results.append({
+                'dtypes': dtypes,
+                'path': name,
+                'seconds': time_call(func, repeat)['seconds'],
+                'peak_bytes': peak_allocation(func),
+                'equal': bool(np.array_equal(values, reference, equal_nan=True)),
+            })
+    return {'rows': len(generated), 'results': results}
+
+
+# Ratios-only worker: import the core and compute a row from plain arrays
+COLD_START_SCRIPT = """
+import numpy as np
+from finRatios import STATEMENT_COLUMNS, calculate_panel_ratios
+calculate_panel_ratios({name: np.ones(1) for name in STATEMENT_COLUMNS})
+"""
+
+
+def measure_cold_start(script=COLD_START_SCRIPT, repeat=5):
+    """
+    Best wall time of a fresh interpreter running script, minus bare interpreter startup
+    """
+    def best_of(code):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], check=True)
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    return best_of(script) - best_of('pass')
+
+
+DEFAULT_SIZES = (1, 1_000, 100_000, 1_000_000)
+DEFAULT_DPIS = (72, 150, 300)
+DEFAULT_BASELINE = 'bench_baseline.json'
+DEFAULT_THRESHOLD = 0.20
+
+# A typical screen: three ratios, one of them derived from three others
+SCREEN_RATIOS = ('ROE', 'Current_Ratio', 'Cash_Conversion_Cycle')
+
+
+def time_call(func, repeat):
+    """
+    Run func repeat times and return best and median wall time in seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {'seconds': timings[0], 'median_seconds': timings[len(timings) // 2],
+            'repeat': repeat}
+
+
+def ratio_benchmarks(sizes=DEFAULT_SIZES):
+    """
+    calculate_ratios and the panel engine at each (Company, Year) row count, with all
+    ratios and with only the SCREEN_RATIOS subset, and radar scoring of the ratios
+    """
+    from finScore import score_ratios
+
+    for n_rows in sizes:
+        statements = make_synthetic_rows(n_rows)
+        ratios = calculate_panel_ratios(statements)
+        yield (f'calculate_ratios[rows={n_rows}]',
+               lambda statements=statements: calculate_ratios(statements, 'SYNTHETIC'))
+        yield (f'calculate_panel_ratios[rows={n_rows}]',
+               lambda statements=statements: calculate_panel_ratios(statements))
+        yield (f'calculate_panel_ratios[rows={n_rows},ratios={len(SCREEN_RATIOS)}]',
+               lambda statements=statements: calculate_panel_ratios(statements,
+                                                                    SCREEN_RATIOS))
+        yield (f'score_ratios[rows={n_rows}]', lambda ratios=ratios: score_ratios(ratios))
+
+
+def render_benchmarks(dpis=DEFAULT_DPIS):
+    """
+    The heaviest renderers at each dpi, saving into the current directory
+    """
+    import matplotlib
+    from fin import create_correlation_heatmap, create_radar_chart
+    from finDashboards import create_comprehensive_efficiency_dashboard
+
+    napesco_ratios, ipg_ratios, combined_ratios = make_synthetic_company_ratios()
+
+    def at_dpi(dpi, func, *args):
+        # fin.py charts save at the rcParams dpi, finDashboards charts take it as an argument
+        def run():
+            with matplotlib.rc_context({'savefig.dpi': dpi}):
+                func(*args)
+        return run
+
+    for dpi in dpis:
+        yield (f'create_comprehensive_efficiency_dashboard[dpi={dpi}]',
+               lambda dpi=dpi: create_comprehensive_efficiency_dashboard(
+                   napesco_ratios, ipg_ratios, 'bench_efficiency.png', dpi=dpi))
+        yield (f'create_correlation_heatmap[dpi={dpi}]',
+               at_dpi(dpi, create_correlation_heatmap, combined_ratios, 'NAPESCO',
+                      'bench_heatmap.png'))
+        yield (f'create_radar_chart[dpi={dpi}]',
+               at_dpi(dpi, create_radar_chart, napesco_ratios, ipg_ratios, 'bench_radar.png'))
+
+
+def benchmark_profiles(repeat=3):
+    """
+    Render time and file size of the heaviest charts under every render profile
+    """
+    from fin import create_correlation_heatmap, create_financial_dashboard, create_radar_chart
+    from finDashboards import create_comprehensive_efficiency_dashboard
+    from finPlot import RENDER_PROFILES
+
+    napesco_ratios, ipg_ratios, combined_ratios = make_synthetic_company_ratios()
+    charts = [
+        ('comprehensive efficiency dashboard', 'dashboards/bench_efficiency.png',
+         lambda profile: create_comprehensive_efficiency_dashboard(
+             napesco_ratios, ipg_ratios, 'bench_efficiency.png', profile=profile)),
+        ('financial dashboard', 'bench_financial.png',
+         lambda profile: create_financial_dashboard(
+             napesco_ratios, ipg_ratios, 'bench_financial.png', profile=profile)),
+        ('correlation heatmap', 'bench_heatmap.png',
+         lambda profile: create_correlation_heatmap(
+             combined_ratios, 'NAPESCO', 'bench_heatmap.png', profile=profile)),
+        ('radar chart', 'bench_radar.png',
+         lambda profile: create_radar_chart(
+             napesco_ratios, ipg_ratios, 'bench_radar.png', profile=profile)),
+    ]
+
+    results = []
+    with scratch_directory():
+        for chart, path, render in charts:
+            for name in RENDER_PROFILES:
+                timing = time_call(lambda: render(name), repeat)
+                results.append({'chart': chart, 'profile': name,
+                                'seconds': timing['seconds'],
+                                'bytes': os.path.getsize(path)})
+    return results
+
+
+def benchmark_templates(n_pairs=50, dpi=72, relayout=False):
+    """
+    Render the efficiency dashboard for many synthetic company pairs, once rebuilding the
+    figure per pair and once refilling a single template, and report the throughput of both
+    """
+    from finDashboards import EFFICIENCY_LAYOUT
+    from finTemplates import render_dashboard, render_dashboards
+
+    pairs = []
+    for seed in range(n_pairs):
+        first, second, _ = make_synthetic_company_ratios(seed=seed)
+        pairs.append((first, second, (f'A{seed}', f'B{seed}'), f'pair_{seed}.png'))
+
+    with scratch_directory():
+        start = time.perf_counter()
+        for first, second, labels, filename in pairs:
+            render_dashboard(EFFICIENCY_LAYOUT, first, second, filename, dpi, labels)
+        rebuild_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        render_dashboards(EFFICIENCY_LAYOUT, pairs, dpi, relayout)
+        template_seconds = time.perf_counter() - start
+
+    return {
+        'pairs': n_pairs,
+        'rebuild_per_second': n_pairs / rebuild_seconds,
+        'template_per_second': n_pairs / template_seconds,
+        'speedup': rebuild_seconds / template_seconds,
+    }
+
+
+@contextlib.contextmanager
+def scratch_directory():
+    """
+    Run renderers inside a throwaway directory with a dashboards/ folder and no render cache
+    """
+    from finCache import disable_render_cache
+
+    disable_render_cache()
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.makedirs(os.path.join(directory, 'dashboards'))
+        os.chdir(directory)
+        try:
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                yield directory
+        finally:
+            os.chdir(previous)
+
+
+def run_suite(sizes=DEFAULT_SIZES, dpis=DEFAULT_DPIS, repeat=3):
+    """
+    Time every ratio and render benchmark and return a machine-readable result document
+    """
+    import matplotlib
+
+    results = {}
+    for name, func in ratio_benchmarks(sizes):
+        results[name] = time_call(func, repeat)
+        print(f"  {name:<55} {results[name]['seconds']:9.4f}s", file=sys.stderr)
+
+    with scratch_directory():
+        for name, func in render_benchmarks(dpis):
+            results[name] = time_call(func, repeat)
+            print(f"  {name:<55} {results[name]['seconds']:9.4f}s", file=sys.stderr)
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+        },
+        'results': results,
+    }
+
+
+def compare_to_baseline(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    List benchmarks whose best time grew by more than threshold relative to the baseline
+    Returns (name, baseline_seconds, current_seconds, change) for every regression
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        change = result['seconds'] / previous['seconds'] - 1
+        if change > threshold:
+            regressions.append((name, previous['seconds'], result['seconds'], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark ratio computation and chart rendering')
+    commands = parser.add_subparsers(dest='command')
+
+    suite = commands.add_parser('suite', help='run the full suite and check for regressions')
+    suite.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                       help='comma-separated (Company, Year) row counts')
+    suite.add_argument('--dpis', default=','.join(map(str, DEFAULT_DPIS)),
+                       help='comma-separated dpi settings for the renderers')
+    suite.add_argument('--repeat', type=int, default=3)
+    suite.add_argument('--baseline', default=DEFAULT_BASELINE,
+                       help='baseline results file to compare against')
+    suite.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help='allowed slowdown before flagging, e.g. 0.2 for 20%%')
+    suite.add_argument('--output', help='also write this run\'s results to a file')
+    suite.add_argument('--update-baseline', action='store_true',
+                       help='overwrite the baseline with this run')
+
+    panel = commands.add_parser('panel', help='per-company loop vs panel engine')
+    panel.add_argument('--companies', type=int, default=2000)
+    panel.add_argument('--years', type=int, default=10)
+    panel.add_argument('--repeat', type=int, default=3)
+
+    commands.add_parser('cold-start', help='cold start of a ratios-only worker')
+
+    density = commands.add_parser('density',
+                                  help='efficiency matrix: every point vs binned density')
+    density.add_argument('--sizes', default='1000,10000,100000,1000000')
+
+    rank = commands.add_parser('rank', help='percentile index vs re-ranking the panel')
+    rank.add_argument('--companies', type=int, default=20_000)
+    rank.add_argument('--years', type=int, default=10)
+
+    dupont = commands.add_parser('dupont', help='DuPont table and ROE change attribution')
+    dupont.add_argument('--companies', type=int, default=100_000)
+    dupont.add_argument('--years', type=int, default=10)
+
+    ttm = commands.add_parser('ttm', help='rebuilding TTM statements vs one rolling step')
+    ttm.add_argument('--companies', type=int, default=20_000)
+    ttm.add_argument('--quarters', type=int, default=40)
+
+    kernel = commands.add_parser('kernel', help='pandas path vs panel engine vs fused kernel')
+    kernel.add_argument('--companies', type=int, default=200_000)
+    kernel.add_argument('--years', type=int, default=5)
+
+    fx = commands.add_parser('fx', help='currency tagging and panel conversion')
+    fx.add_argument('--companies', type=int, default=200_000)
+    fx.add_argument('--years', type=int, default=5)
+
+    validate = commands.add_parser('validate', help='statement validation vs ratio calculation')
+    validate.add_argument('--companies', type=int, default=200_000)
+    validate.add_argument('--years', type=int, default=5)
+
+    scenario = commands.add_parser('scenario', help='Monte Carlo ratio bands for one company')
+    scenario.add_argument('--draws', type=int, default=1_000_000)
+    scenario.add_argument('--chunk', type=int, default=None)
+
+    reports = commands.add_parser('reports', help='streamed company reports per format')
+    reports.add_argument('--companies', type=int, default=50_000)
+    reports.add_argument('--years', type=int, default=5)
+
+    profiles = commands.add_parser('profiles', help='render time and size per render profile')
+    profiles.add_argument('--repeat', type=int, default=3)
+
+    store = commands.add_parser('store', help='DataFrame vs compact statement store memory')
+    store.add_argument('--rows', type=int, default=1_000_000)
+
+    templates = commands.add_parser('templates',
+                                    help='rebuild-per-call vs reused dashboard templates')
+    templates.add_argument('--pairs', type=int, default=50)
+    templates.add_argument('--dpi', type=int, default=72)
+    templates.add_argument('--relayout', action='store_true',
+                           help='rerun tight_layout for every pair in template mode')
+
+    args = parser.parse_args()
+
+    if args.command == 'panel':
+        result = benchmark_panel_ratios(args.companies, args.years, args.repeat)
+        print(f"Rows: {result['rows']:,}")
+        print(f"Per-company loop: {result['per_company_seconds']:.3f}s")
+        print(f"Panel engine:     {result['panel_seconds']:.3f}s")
+        print(f"Speedup:          {result['speedup']:.1f}x")
+        return 0
+
+    if args.command == 'cold-start':
+        print(f"Ratios-only cold start: {measure_cold_start() * 1000:.0f}ms")
+        return 0
+
+    if args.command == 'density':
+        sizes = [int(size) for size in args.sizes.split(',')]
+        print(f"{'Points':>10} {'Mode':<8} {'Render':>9} {'PNG':>10}")
+        for result in benchmark_density_matrix(sizes):
+            print(f"{result['rows']:>10,} {result['mode']:<8} {result['seconds']:>8.2f}s"
+                  f" {result['bytes'] / 1024:>8.0f}KB")
+        return 0
+
+    if args.command == 'rank':
+        result = benchmark_percentile_index(args.companies, args.years)
+        print(f"Rows: {result['rows']:,}")
+        print(f"Index build:           {result['build_seconds']:.3f}s")
+        print(f"Percentile query:      {result['query_seconds'] * 1e6:.1f}us"
+              f" (re-ranking the year: {result['resort_seconds'] * 1e3:.1f}ms)")
+        print(f"Rank every ratio:      {result['bulk_seconds']:.3f}s"
+              f" (groupby rank: {result['groupby_rank_seconds']:.3f}s)")
+        return 0
+
+    if args.command == 'dupont':
+        result = benchmark_dupont(args.companies, args.years)
+        print(f"Rows: {result['rows']:,}")
+        print(f"LMDI, panel order: {result['sorted_seconds']:.3f}s")
+        print(f"LMDI, shuffled:    {result['shuffled_seconds']:.3f}s")
+        print(f"Shapley:           {result['shapley_seconds']:.3f}s")
+        return 0
+
+    if args.command == 'ttm':
+        result = benchmark_rolling_ttm(args.companies, args.quarters)
+        print(f"Rows: {result['rows']:,}")
+        print(f"Rebuild every quarter: {result['rebuild_seconds']:.3f}s")
+        print(f"One new quarter:       {result['step_seconds']:.3f}s")
+        return 0
+
+    if args.command == 'kernel':
+        result = benchmark_kernel(args.companies, args.years)
+        print(f"Rows: {result['rows']:,}")
+        print(f"{'Dtypes':<10} {'Path':<12} {'Time':>8} {'Peak alloc':>11} {'Equal':>6}")
+        for row in result['results']:
+            print(f"{row['dtypes']:<10} {row['path']:<12} {row['seconds']:>7.3f}s"
+                  f" {row['peak_bytes'] / 2**20:>9.0f}MB {'yes' if row['equal'] else 'no':>6}")
+        return 0
+
+    if args.command == 'fx':
+        result = benchmark_fx(args.companies, args.years)
+        print(f"Rows: {result['rows']:,}")
+        print(f"Tag currencies and units: {result['tag_seconds']:.3f}s")
+        print(f"Convert to USD:           {result['convert_seconds']:.3f}s")
+        print(f"Cached conversion:        {result['cached_seconds'] * 1e6:.1f}us")
+        return 0
+
+    if args.command == 'validate':
+        result = benchmark_validation(args.companies, args.years)
+        print(f"Rows: {result['rows']:,}, rules: {result['rules']}")
+        print(f"Validation:   {result['validate_seconds']:.3f}s")
+        print(f"Panel ratios: {result['ratio_seconds']:.3f}s")
+        return 0
+
+    if args.command == 'scenario':
+        result = benchmark_scenario(args.draws, args.chunk)
+        print(f"Draws: {result['draws']:,} in chunks of {result['chunk']:,}")
+        print(f"All ratio bands: {result['seconds']:.3f}s")
+        return 0
+
+    if args.command == 'reports':
+        print(f"{'Format':<10} {'Reports':>9} {'Time':>8} {'Per second':>11}")
+        for result in benchmark_reports(args.companies, args.years):
+            print(f"{result['format']:<10} {result['reports']:>9,} {result['seconds']:>7.2f}s"
+                  f" {result['per_second']:>11,.0f}")
+        return 0
+
+    if args.command == 'profiles':
+        print(f"{'Chart':<36} {'Profile':<12} {'Render':>8} {'File':>8}")
+        for result in benchmark_profiles(args.repeat):
+            print(f"{result['chart']:<36} {result['profile']:<12}"
+                  f" {result['seconds']:>7.2f}s {result['bytes'] / 1024:>6.0f}KB")
+        return 0
+
+    if args.command == 'store':
+        result = benchmark_store_memory(args.rows)
+        print(f"Rows: {result['rows']:,}")
+        print(f"Statements DataFrame: {result['frame_bytes'] / 2**20:8.1f} MiB")
+        print(f"StatementStore:       {result['store_bytes'] / 2**20:8.1f} MiB"
+              f"  ({result['reduction']:.1f}x smaller)")
+        print(f"Ratios DataFrame:     {result['ratio_frame_bytes'] / 2**20:8.1f} MiB")
+        print(f"Ratios float32:       {result['ratio_store_bytes'] / 2**20:8.1f} MiB")
+        return 0
+
+    if args.command == 'templates':
+        result = benchmark_templates(args.pairs, args.dpi, args.relayout)
+        print(f"Pairs: {result['pairs']}")
+        print(f"Rebuild per call: {result['rebuild_per_second']:.1f} dashboards/s")
+        print(f"Reused template:  {result['template_per_second']:.1f} dashboards/s")
+        print(f"Speedup:          {result['speedup']:.1f}x")
+        return 0
+
+    if args.command != 'suite':
+        parser.print_help()
+        return 2
+
+    current = run_suite([int(size) for size in args.sizes.split(',')],
+                        [int(dpi) for dpi in args.dpis.split(',')], args.repeat)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(current, output_file, indent=2)
+
+    if args.update_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(current, baseline_file, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare_to_baseline(current, baseline, args.threshold)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return 0
+
+    print(f"Regressions beyond {args.threshold:.0%} against {args.baseline}:")
+    for name, before, after, change in regressions:
+        print(f"  {name:<55} {before:9.4f}s -> {after:9.4f}s  (+{change:.0%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import contextlib
+import io
+import json
+import os
+import posixpath
+import zipfile
+
+from finPlot import collecting_pages, pyplot
+
+PAGE_FORMATS = ('png', 'svg')
+
+# Member of an archive bundle listing its pages in render order
+INDEX_MEMBER = 'index.json'
+
+# PNG pages are already deflated, so storing them again compressed only costs time
+_COMPRESSION = {'png': zipfile.ZIP_STORED, 'svg': zipfile.ZIP_DEFLATED}
+
+
+def page_name(filename):
+    """
+    Page name for a chart saved under filename: the path without its extension
+    """
+    return posixpath.splitext(os.fspath(filename).replace(os.sep, '/'))[0]
+
+
+class PdfBundle:
+    """
+    Multi-page PDF with one chart per page, each page written out as soon as it is saved
+    Page names are kept in order and stored as a JSON list in the document's Keywords
+    """
+
+    def __init__(self, path, metadata=None):
+        pyplot()
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        self.path = path
+        self.pages = []
+        self._pdf = PdfPages(path, metadata=metadata)
+
+    def add_figure(self, fig, filename, options):
+        # PDF pages are vector output; PNG encoder settings do not apply
+        options = {name: value for name, value in options.items() if name != 'pil_kwargs'}
+        self._pdf.savefig(fig, **options)
+        self.pages.append(page_name(filename))
+
+    def page_number(self, name):
+        """
+        1-based page of a named chart, for random access in any PDF reader
+        """
+        return self.pages.index(name) + 1
+
+    def close(self):
+        self._pdf.infodict()['Keywords'] = json.dumps(self.pages)
+        self._pdf.close()
+
+
+class ArchiveBundle:
+    """
+    Zip archive of PNG or SVG pages, one member per chart plus an index of the pages
+    Each page is encoded into memory and written to the archive before the next one is
+    drawn, so memory does not grow with the page count; zip's central directory lets
+    read_page pull out any single page without reading the others
+    """
+
+    def __init__(self, path, page_format='png'):
+        if page_format not in PAGE_FORMATS:
+            raise ValueError(f"Unsupported bundle page format: {page_format}")
+        self.path = path
+        self.page_format = page_format
+        self.pages = []
+        self._members = set()
+        self._zip = zipfile.ZipFile(path, 'w')
+
+    def add_figure(self, fig, filename, options):
+        if self.page_format != 'png':
+            options = {name: value for name, value in options.items() if name != 'pil_kwargs'}
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=self.page_format, **options)
+
+        # A chart saved twice under one name keeps both pages
+        name = page_name(filename)
+        member = f'{name}.{self.page_format}'
+        copy = 1
+        while member in self._members:
+            copy += 1
+            member = f'{name}-{copy}.{self.page_format}'
+        self._members.add(member)
+
+        self._zip.writestr(member, buffer.getvalue(),
+                           compress_type=_COMPRESSION[self.page_format])
+        self.pages.append({'name': name, 'member': member, 'bytes': buffer.tell()})
+
+    def close(self):
+        self._zip.writestr(INDEX_MEMBER, json.dumps(self.pages, indent=1),
+                           compress_type=zipfile.ZIP_DEFLATED)
+        self._zip.close()
+
+
+def open_bundle(path, page_format='png'):
+    """
+    A PdfBundle for .pdf paths, or an ArchiveBundle of page_format pages for .zip paths
+    """
+    extension = os.path.splitext(os.fspath(path))[1].lower()
+    if extension == '.pdf':
+        return PdfBundle(path)
+    if extension == '.zip':
+        return ArchiveBundle(path, page_format)
+    raise ValueError(f"Unsupported bundle file: {path}; expected a .pdf or .zip path")
+
+
+@contextlib.contextmanager
+def chart_bundle(path, page_format='png'):
+    """
+    Collect every chart saved in this process while the block runs into one bundle file
+    Charts are called with their usual filenames, which become the page names; charts
+    rendered in worker processes are not collected
+    """
+    bundle = open_bundle(path, page_format)
+    try:
+        with collecting_pages(bundle):
+            yield bundle
+    finally:
+        bundle.close()
+
+
+def bundle_index(path):
+    """
+    Pages of an archive bundle in render order, as written to its index
+    """
+    with zipfile.ZipFile(path) as archive:
+        return json.loads(archive.read(INDEX_MEMBER))
+
+
+def read_page(path, name):
+    """
+    Encoded bytes of one page of an archive bundle, by page name or member name
+    """
+    with zipfile.ZipFile(path) as archive:
+        members = set(archive.namelist())
+        if name in members:
+            return archive.read(name)
+        for page in json.loads(archive.read(INDEX_MEMBER)):
+            if page['name'] == name:
+                return archive.read(page['member'])
+    raise KeyError(f"No page named {name!r} in {path}")
@@ -0,0 +1,229 @@
+import functools
+import hashlib
+import inspect
+import os
+import shutil
+import sys
+from collections import OrderedDict
+
+import pandas as pd
+
+from finPlot import active_bundle
+
+DEFAULT_CACHE_DIR = '.render_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Set by enable_render_cache so worker processes pick the same cache up
+CACHE_ENV_VAR = 'FIN_RENDER_CACHE'
+
+_render_cache = None
+
+
+class RenderCache:
+    """
+    Content-addressed store of rendered chart files with a size cap and LRU eviction
+    Entries are keyed on the chart inputs, so identical ratios never re-render
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+        # Rebuild LRU order from modification times, which fetch() refreshes on every hit
+        entries = []
+        for entry in os.scandir(directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(entries))
+        self._bytes = sum(self._entries.values())
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def key(self, chart, frames, params):
+        """
+        Hash the chart identity, the ratio rows it draws and its parameters into a cache key
+        Index labels are part of a frame's rows, since some charts label series by them
+        """
+        import matplotlib
+
+        digest = hashlib.sha256()
+        digest.update(repr((chart, matplotlib.__version__,
+                            matplotlib.rcParams['figure.dpi'],
+                            matplotlib.rcParams['savefig.dpi'],
+                            sorted(params.items()))).encode())
+        for frame in frames:
+            digest.update(repr((list(frame.columns), [str(t) for t in frame.dtypes],
+                                list(frame.index.names))).encode())
+            digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def fetch(self, key, filename):
+        """
+        Copy a cached chart to filename, returning False on a miss
+        """
+        if key in self._entries:
+            try:
+                shutil.copyfile(self._path(key), filename)
+                os.utime(self._path(key))
+            except FileNotFoundError:
+                # Evicted by another process sharing the cache directory
+                self._bytes -= self._entries.pop(key)
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True
+        self.misses += 1
+        return False
+
+    def store(self, key, filename):
+        """
+        Add a freshly rendered chart file, evicting least recently used entries over the cap
+        """
+        temporary = self._path(f'{key}.{os.getpid()}.tmp')
+        shutil.copyfile(filename, temporary)
+        os.replace(temporary, self._path(key))
+
+        self._bytes -= self._entries.pop(key, 0)
+        self._entries[key] = os.path.getsize(self._path(key))
+        self._bytes += self._entries[key]
+
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            oldest, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(oldest))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._entries), 'bytes': self._bytes}
+
+
+def enable_render_cache(directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Turn the render cache on for this process and any worker processes it starts
+    """
+    global _render_cache
+    _render_cache = RenderCache(directory, max_bytes)
+    os.environ[CACHE_ENV_VAR] = f'{os.path.abspath(directory)}{os.pathsep}{max_bytes}'
+    return _render_cache
+
+
+def disable_render_cache():
+    global _render_cache
+    _render_cache = None
+    os.environ.pop(CACHE_ENV_VAR, None)
+
+
+def get_render_cache():
+    """
+    Return the active render cache, opening the one inherited from a parent process if any
+    """
+    global _render_cache
+    if _render_cache is None and os.environ.get(CACHE_ENV_VAR):
+        directory, max_bytes = os.environ[CACHE_ENV_VAR].rsplit(os.pathsep, 1)
+        _render_cache = RenderCache(directory, int(max_bytes))
+    return _render_cache
+
+
+# Modules in this directory are the analysis code whose edits must invalidate charts
+_REPO_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def _repo_module(value):
+    """
+    The module of this repository a global refers to or was defined in, if any
+    """
+    if inspect.ismodule(value):
+        name = value.__name__
+    else:
+        name = getattr(value, '__module__', None)
+        if not isinstance(name, str):
+            name = type(value).__module__
+    module = sys.modules.get(name)
+    path = getattr(module, '__file__', None)
+    if path and os.path.dirname(os.path.abspath(path)) == _REPO_DIRECTORY:
+        return module
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def dependency_digest(module_name):
+    """
+    Hash of a module's source and of every repository module it reaches through the
+    modules, functions, classes and namedtuple layouts among its globals, transitively
+    Editing a helper such as finTemplates.render_dashboard or finDupont.dupont_table
+    changes the digest of every chart module that uses it
+    """
+    sources = {}
+    pending = [sys.modules[module_name]]
+    while pending:
+        module = pending.pop()
+        if module.__name__ in sources:
+            continue
+        with open(module.__file__, 'rb') as source:
+            sources[module.__name__] = source.read()
+        for value in vars(module).values():
+            dependency = _repo_module(value)
+            if dependency is not None and dependency.__name__ not in sources:
+                pending.append(dependency)
+
+    digest = hashlib.sha256()
+    for name in sorted(sources):
+        digest.update(name.encode() + b'\0' + sources[name])
+    return digest.hexdigest()
+
+
+def cached_chart(directory='', data=None, extra=None):
+    """
+    Decorate a create_* chart function so a cache hit skips figure construction and savefig
+    data picks the ratio rows the chart draws from its bound arguments; by default every
+    DataFrame argument is hashed in full. The filename itself is not part of the key
+    The key also covers the source of the chart's module and every repository module it
+    depends on (see dependency_digest), and extra, for anything else that shapes the chart
+    """
+    def decorate(func):
+        signature = inspect.signature(func)
+        source_digest = hashlib.sha256(
+            (inspect.getsource(func) + repr(extra)).encode()).hexdigest()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = get_render_cache()
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            filename = bound.arguments.get('filename')
+            # Pages collected into a bundle are never written as files, so skip the cache
+            if cache is None or not filename or active_bundle() is not None:
+                return func(*args, **kwargs)
+
+            if data is not None:
+                frames = data(bound.arguments)
+            else:
+                frames = [value for value in bound.arguments.values()
+                          if isinstance(value, pd.DataFrame)]
+            params = {name: repr(value) for name, value in bound.arguments.items()
+                      if name != 'filename' and not isinstance(value, pd.DataFrame)}
+            params['format'] = os.path.splitext(filename)[1]
+
+            key = cache.key((func.__qualname__, source_digest,
+                             dependency_digest(func.__module__)), frames, params)
+            path = os.path.join(directory, filename)
+            if cache.fetch(key, path):
+                print(f"Saved: {path} (cached)")
+                return None
+
+            result = func(*args, **kwargs)
+            if os.path.exists(path):
+                cache.store(key, path)
+            return result
+
+        return wrapper
+
+    return decorate
@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+
+from finLoader import DEFAULT_CHUNKSIZE, iter_statements
+from finRatios import calculate_panel_ratios
+
+# Ratio columns the correlation heatmaps compare
+CORRELATION_COLUMNS = ['Current_Ratio', 'Quick_Ratio', 'Gross_Profit_Margin',
+                       'Net_Profit_Margin', 'ROA', 'ROE', 'Asset_Turnover',
+                       'Inventory_Turnover', 'Debt_Ratio', 'Debt_to_Equity']
+
+# Rows folded into the running moments at a time; bounds the per-row outer products
+BLOCK_ROWS = 16_384
+
+UNIVERSE = 'Universe'
+
+
+def _group_moments(values, starts):
+    """
+    Pairwise-complete count, means, sums of squares and co-moments for consecutive row groups
+    Entry [g, i, j] only uses rows of group g where both column i and column j are finite,
+    which is what DataFrame.corr does. Values are centred on their group means first so the
+    sums stay accurate for large magnitudes
+    """
+    valid = np.isfinite(values)
+    weights = valid.astype(np.float64)
+    counts = np.add.reduceat(weights, starts, axis=0)
+    sums = np.add.reduceat(np.where(valid, values, 0.0), starts, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shift = np.where(counts > 0, sums / counts, 0.0)
+
+    sizes = np.diff(np.append(starts, len(values)))
+    centred = np.where(valid, values - np.repeat(shift, sizes, axis=0), 0.0)
+
+    def pair_sum(left, right):
+        return np.add.reduceat(np.einsum('ri,rj->rij', left, right), starts, axis=0)
+
+    n = pair_sum(weights, weights)
+    first = pair_sum(centred, weights)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.where(n > 0, first / n, 0.0)
+        m2 = pair_sum(centred * centred, weights) - np.where(n > 0, first * first / n, 0.0)
+        comoment = pair_sum(centred, centred) - np.where(
+            n > 0, first * np.swapaxes(first, 1, 2) / n, 0.0)
+    return n, mean + shift[:, :, None], m2, comoment
+
+
+def _combine(n_a, mean_a, m2_a, c_a, n_b, mean_b, m2_b, c_b):
+    """
+    Chan et al. parallel update of pairwise moments; either side may be empty
+    """
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weight = np.where(n > 0, n_a * n_b / n, 0.0)
+        mean = np.where(n > 0, mean_a + delta * np.where(n > 0, n_b / n, 0.0), 0.0)
+    m2 = m2_a + m2_b + delta * delta * weight
+    comoment = c_a + c_b + delta * np.swapaxes(delta, -1, -2) * weight
+    return n, mean, m2, comoment
+
+
+class CorrelationAccumulator:
+    """
+    Running correlation matrices for any number of keyed groups, fed batch by batch
+    Keeps pairwise counts, means, sums of squares and co-moments per group, so memory
+    does not grow with the rows seen. Accumulators over the same columns can be merged,
+    e.g. after each worker has consumed a share of the chunks
+    """
+
+    def __init__(self, columns=CORRELATION_COLUMNS):
+        self.columns = list(columns)
+        size = len(self.columns)
+        self._slots = {}
+        self._n = np.zeros((0, size, size))
+        self._mean = np.zeros((0, size, size))
+        self._m2 = np.zeros((0, size, size))
+        self._comoment = np.zeros((0, size, size))
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def keys(self):
+        return list(self._slots)
+
+    def _slot_indices(self, keys):
+        new = [key for key in keys if key not in self._slots]
+        if new:
+            for key in new:
+                self._slots[key] = len(self._slots)
+            grow = np.zeros((len(new),) + self._n.shape[1:])
+            self._n = np.concatenate([self._n, grow])
+            self._mean = np.concatenate([self._mean, grow])
+            self._m2 = np.concatenate([self._m2, grow])
+            self._comoment = np.concatenate([self._comoment, grow])
+        return np.array([self._slots[key] for key in keys], dtype=np.intp)
+
+    def _fold(self, slots, n, mean, m2, comoment):
+        combined = _combine(self._n[slots], self._mean[slots], self._m2[slots],
+                            self._comoment[slots], n, mean, m2, comoment)
+        self._n[slots], self._mean[slots], self._m2[slots], self._comoment[slots] = combined
+
+    def update(self, values, keys):
+        """
+        Fold a batch of rows into the running moments of the group each row belongs to
+        values is a (rows, columns) array and keys gives each row's group
+        """
+        values = np.asarray(values, dtype=np.float64)
+        if values.ndim != 2 or values.shape[1] != len(self.columns):
+            raise ValueError(f"Expected a (rows, {len(self.columns)}) array of ratio values")
+
+        codes, labels = pd.factorize(pd.Series(keys), sort=False)
+        order = np.argsort(codes, kind='stable')
+        codes = codes[order]
+        values = values[order]
+
+        for start in range(0, len(values), BLOCK_ROWS):
+            block_codes = codes[start:start + BLOCK_ROWS]
+            starts = np.flatnonzero(np.r_[True, block_codes[1:] != block_codes[:-1]])
+            slots = self._slot_indices([labels[code] for code in block_codes[starts]])
+            self._fold(slots, *_group_moments(values[start:start + BLOCK_ROWS], starts))
+        return self
+
+    def merge(self, other):
+        """
+        Fold another accumulator over the same columns into this one
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge correlation accumulators over different columns")
+        keys = other.keys()
+        if keys:
+            self._fold(self._slot_indices(keys), other._n, other._mean, other._m2,
+                       other._comoment)
+        return self
+
+    def count(self, key):
+        """
+        Rows seen for a group (rows with at least one finite value)
+        """
+        return int(self._n[self._slots[key]].diagonal().max())
+
+    def matrix(self, key):
+        """
+        Correlation matrix of one group as a DataFrame, NaN where a pair has too few rows
+        or no variance, like DataFrame.corr
+        """
+        slot = self._slots[key]
+        n, m2, comoment = self._n[slot], self._m2[slot], self._comoment[slot]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = comoment / np.sqrt(m2 * m2.T)
+        corr = np.where((n >= 2) & np.isfinite(corr), np.clip(corr, -1.0, 1.0), np.nan)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+
+class RatioCorrelations:
+    """
+    Per-company, per-sector and universe-wide ratio correlations built from ratio batches
+    sectors maps company names to sector names; companies without one only count towards
+    their own and the universe matrix
+    """
+
+    def __init__(self, columns=CORRELATION_COLUMNS, sectors=None, companies=True):
+        self.columns = list(columns)
+        self.sectors = dict(sectors or {})
+        self.track_companies = companies
+        self.companies = CorrelationAccumulator(self.columns)
+        self.by_sector = CorrelationAccumulator(self.columns)
+        self.universe = CorrelationAccumulator(self.columns)
+
+    def update(self, ratios):
+        """
+        Fold a ratio frame with a Company column or a (Company, Year) index into every level
+        """
+        if 'Company' in ratios.columns:
+            company = ratios['Company'].astype(str).to_numpy()
+        else:
+            company = ratios.index.get_level_values('Company').astype(str).to_numpy()
+        values = ratios[self.columns].to_numpy(dtype=np.float64)
+
+        if self.track_companies:
+            self.companies.update(values, company)
+        if self.sectors:
+            sector = pd.Series(company).map(self.sectors)
+            known = sector.notna().to_numpy()
+            if known.any():
+                self.by_sector.update(values[known], sector[known].to_numpy())
+        self.universe.update(values, np.full(len(values), UNIVERSE, dtype=object))
+        return self
+
+    def merge(self, other):
+        self.companies.merge(other.companies)
+        self.by_sector.merge(other.by_sector)
+        self.universe.merge(other.universe)
+        return self
+
+    def company(self, name):
+        return self.companies.matrix(name)
+
+    def sector(self, name):
+        return self.by_sector.matrix(name)
+
+    def universe_matrix(self):
+        return self.universe.matrix(UNIVERSE)
+
+
+def correlations_from_file(path, sectors=None, companies=True, columns=CORRELATION_COLUMNS,
+                           chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream a statement file chunk by chunk into per-company, per-sector and universe
+    correlations; only the ratios being correlated are computed for each chunk
+    """
+    correlations = RatioCorrelations(columns, sectors, companies)
+    for chunk in iter_statements(path, chunksize=chunksize):
+        correlations.update(calculate_panel_ratios(chunk, columns))
+    return correlations
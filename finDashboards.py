@@ -1,117 +1,47 @@
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
-from matplotlib.ticker import PercentFormatter
-plt.style.use('ggplot')
-sns.set_palette("Set2")
-
-
-if not os.path.exists('dashboards'):
-    os.makedirs('dashboards')
-    print("Created 'dashboards' directory")
-
-# Dataframes with financial data for both companies
-# Financial data for NAPESCO
-napesco_data = {
-    'Year': [2022, 2023],
-    'Revenue': [37184789, 39522799],
-    'Cost_of_Sales': [27854616, 28650618],
-    'Gross_Profit': [9330173, 10872181],
-    'Operating_Income': [7287144, 9123378],
-    'Net_Income': [6824101, 8595511],
-    'Current_Assets': [40462604, 37040597],
-    'Inventory': [5479455, 4531445],
-    'Accounts_Receivable': [13366220, 12655113],
-    'Cash_Equivalents': [2180992, 2660961],
-    'Total_Assets': [53151614, 70683248],
-    'Current_Liabilities': [7271359, 11883710],
-    'Total_Liabilities': [10888314, 14717109],
-    'Shareholders_Equity': [42263300, 55966139],
-    'Operating_Cash_Flow': [10956411, 12565079],
-    'Depreciation': [2183024, 2535625],
-    'Accounts_Payable': [7057298, 11650349],
-    'EPS_Fils': [70.35, 88.66]
-}
-
-# Financial data for IPG
-ipg_data = {
-    'Year': [2022, 2023],
-    'Revenue': [1646039000, 1067544000],
-    'Cost_of_Sales': [1621337000, 1049408000],
-    'Gross_Profit': [24702000, 18136000],
-    'Operating_Income': [8037000, 8205000],
-    'Net_Income': [7656000, 7818000],
-    'Current_Assets': [316031000, 375971000],
-    'Inventory': [51741000, 27236000],
-    'Accounts_Receivable': [72997000, 187345000],
-    'Cash_Equivalents': [108513000, 79298000],
-    'Total_Assets': [439037000, 493470000],
-    'Current_Liabilities': [291838000, 359199000],
-    'Total_Liabilities': [338975000, 388821000],
-    'Shareholders_Equity': [100062000, 104649000],
-    'Operating_Cash_Flow': [15399000, -16691000],
-    'Depreciation': [1806000, 1677000],
-    'Accounts_Payable': [90011000, 149771000],
-    'EPS_Fils': [42.35, 43.24]
-}
-
-napesco_df = pd.DataFrame(napesco_data)
-ipg_df = pd.DataFrame(ipg_data)
-
-
-def calculate_ratios(df, company_name):
-    """
-    Calculate comprehensive financial ratios for analysis
-    This function computes liquidity, profitability, efficiency, and solvency ratios
-    """
-    ratios = pd.DataFrame()
-    ratios['Year'] = df['Year']
-    ratios['Company'] = company_name
-
-    # Liquidity Ratios - measure short-term debt paying ability
-    ratios['Current_Ratio'] = df['Current_Assets'] / df['Current_Liabilities']
-    ratios['Quick_Ratio'] = (df['Current_Assets'] -
-                             df['Inventory']) / df['Current_Liabilities']
-    ratios['Cash_Ratio'] = df['Cash_Equivalents'] / df['Current_Liabilities']
-
-    # Profitability Ratios - measure company's ability to generate profits
-    ratios['Gross_Profit_Margin'] = df['Gross_Profit'] / df['Revenue']
-    ratios['Operating_Profit_Margin'] = df['Operating_Income'] / df['Revenue']
-    ratios['Net_Profit_Margin'] = df['Net_Income'] / df['Revenue']
-    ratios['ROA'] = df['Net_Income'] / df['Total_Assets']
-    ratios['ROE'] = df['Net_Income'] / df['Shareholders_Equity']
-
-    # Efficiency Ratios - measure how well company uses its assets
-    ratios['Asset_Turnover'] = df['Revenue'] / df['Total_Assets']
-    ratios['Inventory_Turnover'] = df['Cost_of_Sales'] / df['Inventory']
-    ratios['Days_Inventory_Outstanding'] = 365 / ratios['Inventory_Turnover']
-    ratios['Receivables_Turnover'] = df['Revenue'] / df['Accounts_Receivable']
-    ratios['Days_Sales_Outstanding'] = 365 / ratios['Receivables_Turnover']
-    ratios['Payables_Turnover'] = df['Cost_of_Sales'] / df['Accounts_Payable']
-    ratios['Days_Payables_Outstanding'] = 365 / ratios['Payables_Turnover']
-
-    # Solvency Ratios - measure long-term debt paying ability
-    ratios['Debt_Ratio'] = df['Total_Liabilities'] / df['Total_Assets']
-    ratios['Debt_to_Equity'] = df['Total_Liabilities'] / \
-        df['Shareholders_Equity']
-    ratios['Equity_Multiplier'] = df['Total_Assets'] / \
-        df['Shareholders_Equity']
-
-    return ratios
-
-
-# Calculate ratios for both companies
-napesco_ratios = calculate_ratios(napesco_df, 'NAPESCO')
-ipg_ratios = calculate_ratios(ipg_df, 'IPG')
-combined_ratios = pd.concat([napesco_ratios, ipg_ratios], axis=0)
-
-
-def create_ratio_comparison_chart(combined_df, ratio_name, title, formatted_as_percentage=False, filename=None):
+import argparse
+from finBundle import PAGE_FORMATS, chart_bundle
+from finCache import cached_chart, enable_render_cache
+from finLoader import load_company_ratios
+from finPlot import (PUBLICATION, RENDER_PROFILES, fit_layout, percent_formatter, profiled,
+                    pyplot, save_figure)
+from finRender import (RenderJob, print_render_timings, render_parallel,
+                       render_serial)
+from finReport import generate_financial_summary_report
+from finRolling import period_labels
+from finTemplates import (BarPanel, DashboardLayout, TrendLine, TrendPanel,
+                          render_dashboard)
+from finTrace import stage, trace_from_environment, traced
+
+RATIO_FRAMES = ('napesco_ratios', 'ipg_ratios', 'combined_ratios')
+
+
+def __getattr__(name):
+    # Ratio frames are loaded on first access so importing this module has no side effects
+    if name in RATIO_FRAMES:
+        globals().update(zip(RATIO_FRAMES, load_company_ratios()))
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _comparison_chart_rows(arguments):
+    # The comparison chart only draws the chosen ratio for the two companies
+    combined_df = arguments['combined_df']
+    rows = combined_df['Company'].isin(['NAPESCO', 'IPG'])
+    columns = [name for name in ('Company', 'Year', 'Quarter') if name in combined_df.columns]
+    return [combined_df.loc[rows, columns + [arguments['ratio_name']]]]
+
+
+@traced('chart')
+@cached_chart(directory='dashboards', data=_comparison_chart_rows)
+@profiled
+def create_ratio_comparison_chart(combined_df, ratio_name, title, formatted_as_percentage=False, filename=None, dpi=300,
+                                  profile=PUBLICATION):
     """
     Create individual ratio comparison charts between the two companies
     """
+    plt = pyplot()
     plt.figure(figsize=(10, 6))
 
     napesco_data = combined_df[(combined_df['Company'] == 'NAPESCO')]
@@ -127,436 +57,238 @@ def create_ratio_comparison_chart(combined_df, ratio_name, title, formatted_as_p
     plt.xlabel('Year')
     plt.ylabel(ratio_name.replace('_', ' '))
     plt.title(title)
-    plt.xticks(x, napesco_data['Year'])
+    plt.xticks(x, period_labels(napesco_data))
     plt.legend()
 
     # Format as percentage if specified
     if formatted_as_percentage:
-        plt.gca().yaxis.set_major_formatter(PercentFormatter(1.0))
+        plt.gca().yaxis.set_major_formatter(percent_formatter())
 
-    plt.tight_layout()
+    with stage('tight_layout'):
+        fit_layout(plt.gcf(), profile)
 
     if filename:
-        plt.savefig(f'dashboards/{filename}', dpi=300, bbox_inches='tight')
-        print(f"Saved: dashboards/{filename}")
+        with stage('savefig'):
+            saved = save_figure(plt.gcf(), f'dashboards/{filename}', profile, dpi,
+                                bbox_inches='tight')
+        print(f"Saved: {saved}")
 
     plt.close()
 
 
-def create_comprehensive_liquidity_dashboard(napesco_ratios, ipg_ratios, filename=None):
+# Comprehensive dashboard layouts: one panel per ratio plus a trend panel per category
+
+LIQUIDITY_LAYOUT = DashboardLayout(
+    'Comprehensive Liquidity Analysis', (2, 2), (15, 10), [
+        # Current Ratio - measures ability to pay short-term debts
+        BarPanel('Current_Ratio', 'Current Ratio', 'Ratio', False),
+        # Quick Ratio - more conservative liquidity measure (excludes inventory)
+        BarPanel('Quick_Ratio', 'Quick Ratio', 'Ratio', False),
+        # Cash Ratio - most conservative liquidity measure (only cash and equivalents)
+        BarPanel('Cash_Ratio', 'Cash Ratio', 'Ratio', False),
+        # Liquidity Trend Analysis - shows how liquidity positions are changing
+        TrendPanel('Liquidity Trends', 'Ratio', False, [
+            TrendLine(0, 'Current_Ratio', 'o-', '{0} Current'),
+            TrendLine(0, 'Quick_Ratio', 's-', '{0} Quick'),
+            TrendLine(1, 'Current_Ratio', '^-', '{1} Current'),
+            TrendLine(1, 'Quick_Ratio', 'd-', '{1} Quick'),
+        ]),
+    ])
+
+PROFITABILITY_LAYOUT = DashboardLayout(
+    'Comprehensive Profitability Analysis', (2, 3), (18, 12), [
+        # Gross Profit Margin - measures efficiency of production
+        BarPanel('Gross_Profit_Margin', 'Gross Profit Margin', 'Percentage', True),
+        # Operating Profit Margin - measures operational efficiency
+        BarPanel('Operating_Profit_Margin', 'Operating Profit Margin', 'Percentage', True),
+        # Net Profit Margin - overall profitability after all expenses
+        BarPanel('Net_Profit_Margin', 'Net Profit Margin', 'Percentage', True),
+        # ROA - Return on Assets measures asset utilization efficiency
+        BarPanel('ROA', 'Return on Assets (ROA)', 'Percentage', True),
+        # ROE - Return on Equity measures returns to shareholders
+        BarPanel('ROE', 'Return on Equity (ROE)', 'Percentage', True),
+        # Profitability Trend Analysis - shows how profitability is evolving
+        TrendPanel('Profitability Trends', 'Percentage', True, [
+            TrendLine(0, 'Gross_Profit_Margin', 'o-', '{0} Gross'),
+            TrendLine(0, 'Net_Profit_Margin', 's-', '{0} Net'),
+            TrendLine(1, 'Gross_Profit_Margin', '^-', '{1} Gross'),
+            TrendLine(1, 'Net_Profit_Margin', 'd-', '{1} Net'),
+        ]),
+    ])
+
+EFFICIENCY_LAYOUT = DashboardLayout(
+    'Comprehensive Efficiency Analysis', (3, 3), (18, 15), [
+        # Asset Turnover - measures how efficiently assets generate revenue
+        BarPanel('Asset_Turnover', 'Asset Turnover', 'Times', False),
+        # Inventory Turnover - measures how quickly inventory is sold
+        BarPanel('Inventory_Turnover', 'Inventory Turnover', 'Times', False),
+        # Receivables Turnover - measures how quickly receivables are collected
+        BarPanel('Receivables_Turnover', 'Receivables Turnover', 'Times', False),
+        # Payables Turnover - measures how quickly company pays suppliers
+        BarPanel('Payables_Turnover', 'Payables Turnover', 'Times', False),
+        # Days Inventory Outstanding - average days to sell inventory
+        BarPanel('Days_Inventory_Outstanding', 'Days Inventory Outstanding', 'Days', False),
+        # Days Sales Outstanding - average days to collect receivables
+        BarPanel('Days_Sales_Outstanding', 'Days Sales Outstanding', 'Days', False),
+        # Days Payables Outstanding - average days to pay suppliers
+        BarPanel('Days_Payables_Outstanding', 'Days Payables Outstanding', 'Days', False),
+        # Working Capital Cycle (Cash Conversion Cycle) - measures working capital efficiency
+        BarPanel('Cash_Conversion_Cycle', 'Cash Conversion Cycle', 'Days', False),
+        # Efficiency Trends - shows how operational efficiency is changing
+        TrendPanel('Efficiency Trends', 'Turnover Ratio', False, [
+            TrendLine(0, 'Asset_Turnover', 'o-', '{0} Asset TO'),
+            TrendLine(0, 'Inventory_Turnover', 's-', '{0} Inventory TO'),
+            TrendLine(1, 'Asset_Turnover', '^-', '{1} Asset TO'),
+            # Scale down the second company's inventory turnover (it's much higher)
+            TrendLine(1, 'Inventory_Turnover', 'd-', '{1} Inventory TO/10', 10),
+        ]),
+    ])
+
+SOLVENCY_LAYOUT = DashboardLayout(
+    'Comprehensive Solvency Analysis', (2, 2), (15, 10), [
+        # Debt Ratio - measures proportion of assets financed by debt
+        BarPanel('Debt_Ratio', 'Debt Ratio', 'Ratio', False),
+        # Debt to Equity - measures financial leverage
+        BarPanel('Debt_to_Equity', 'Debt-to-Equity Ratio', 'Ratio', False),
+        # Equity Multiplier - measures financial leverage from assets perspective
+        BarPanel('Equity_Multiplier', 'Equity Multiplier', 'Times', False),
+        # Solvency Trends - shows how leverage and solvency are changing over time
+        TrendPanel('Solvency Trends', 'Ratio', False, [
+            TrendLine(0, 'Debt_Ratio', 'o-', '{0} Debt Ratio'),
+            TrendLine(0, 'Debt_to_Equity', 's-', '{0} D/E'),
+            TrendLine(1, 'Debt_Ratio', '^-', '{1} Debt Ratio'),
+            TrendLine(1, 'Debt_to_Equity', 'd-', '{1} D/E'),
+        ]),
+    ])
+
+
+@traced('chart')
+@cached_chart(directory='dashboards', extra=LIQUIDITY_LAYOUT)
+def create_comprehensive_liquidity_dashboard(napesco_ratios, ipg_ratios, filename=None, dpi=300,
+                                             profile=PUBLICATION):
     """
     Create comprehensive dashboard for all liquidity ratios
     Liquidity ratios help assess a company's ability to meet short-term obligations
     """
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-    fig.suptitle('Comprehensive Liquidity Analysis',
-                 fontsize=16, fontweight='bold')
-
-    # Current Ratio - measures ability to pay short-term debts
-    axes[0, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Current_Ratio'], napesco_ratios.iloc[1]['Current_Ratio']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Current_Ratio'], ipg_ratios.iloc[1]['Current_Ratio']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 0].set_title('Current Ratio')
-    axes[0, 0].set_ylabel('Ratio')
-    axes[0, 0].legend()
-    axes[0, 0].grid(True, alpha=0.3)
-
-    # Quick Ratio - more conservative liquidity measure (excludes inventory)
-    axes[0, 1].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Quick_Ratio'], napesco_ratios.iloc[1]['Quick_Ratio']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 1].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Quick_Ratio'], ipg_ratios.iloc[1]['Quick_Ratio']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 1].set_title('Quick Ratio')
-    axes[0, 1].set_ylabel('Ratio')
-    axes[0, 1].legend()
-    axes[0, 1].grid(True, alpha=0.3)
-
-    # Cash Ratio - most conservative liquidity measure (only cash and equivalents)
-    axes[1, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Cash_Ratio'], napesco_ratios.iloc[1]['Cash_Ratio']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Cash_Ratio'], ipg_ratios.iloc[1]['Cash_Ratio']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 0].set_title('Cash Ratio')
-    axes[1, 0].set_ylabel('Ratio')
-    axes[1, 0].legend()
-    axes[1, 0].grid(True, alpha=0.3)
-
-    # Liquidity Trend Analysis - shows how liquidity positions are changing
-    axes[1, 1].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Current_Ratio'], napesco_ratios.iloc[1]['Current_Ratio']],
-                    'o-', linewidth=3, markersize=8, label='NAPESCO Current')
-    axes[1, 1].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Quick_Ratio'], napesco_ratios.iloc[1]['Quick_Ratio']],
-                    's-', linewidth=3, markersize=8, label='NAPESCO Quick')
-    axes[1, 1].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Current_Ratio'], ipg_ratios.iloc[1]['Current_Ratio']],
-                    '^-', linewidth=3, markersize=8, label='IPG Current')
-    axes[1, 1].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Quick_Ratio'], ipg_ratios.iloc[1]['Quick_Ratio']],
-                    'd-', linewidth=3, markersize=8, label='IPG Quick')
-    axes[1, 1].set_title('Liquidity Trends')
-    axes[1, 1].set_ylabel('Ratio')
-    axes[1, 1].legend()
-    axes[1, 1].grid(True, alpha=0.3)
-
-    plt.tight_layout()
-
-    if filename:
-        plt.savefig(f'dashboards/{filename}', dpi=300, bbox_inches='tight')
-        print(f"Saved: dashboards/{filename}")
-
-    plt.close()
+    render_dashboard(LIQUIDITY_LAYOUT, napesco_ratios, ipg_ratios,
+                     filename and f'dashboards/{filename}', dpi, profile=profile)
 
 
-def create_comprehensive_profitability_dashboard(napesco_ratios, ipg_ratios, filename=None):
+@traced('chart')
+@cached_chart(directory='dashboards', extra=PROFITABILITY_LAYOUT)
+def create_comprehensive_profitability_dashboard(napesco_ratios, ipg_ratios, filename=None, dpi=300,
+                                                 profile=PUBLICATION):
     """
     Create comprehensive dashboard for all profitability ratios
     Profitability ratios measure how effectively a company generates profits
     """
-    fig, axes = plt.subplots(2, 3, figsize=(18, 12))
-    fig.suptitle('Comprehensive Profitability Analysis',
-                 fontsize=16, fontweight='bold')
-
-    # Gross Profit Margin - measures efficiency of production
-    axes[0, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Gross_Profit_Margin'], napesco_ratios.iloc[1]['Gross_Profit_Margin']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Gross_Profit_Margin'], ipg_ratios.iloc[1]['Gross_Profit_Margin']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 0].set_title('Gross Profit Margin')
-    axes[0, 0].set_ylabel('Percentage')
-    axes[0, 0].yaxis.set_major_formatter(PercentFormatter(1.0))
-    axes[0, 0].legend()
-    axes[0, 0].grid(True, alpha=0.3)
-
-    # Operating Profit Margin - measures operational efficiency
-    axes[0, 1].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Operating_Profit_Margin'], napesco_ratios.iloc[1]['Operating_Profit_Margin']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 1].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Operating_Profit_Margin'], ipg_ratios.iloc[1]['Operating_Profit_Margin']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 1].set_title('Operating Profit Margin')
-    axes[0, 1].set_ylabel('Percentage')
-    axes[0, 1].yaxis.set_major_formatter(PercentFormatter(1.0))
-    axes[0, 1].legend()
-    axes[0, 1].grid(True, alpha=0.3)
-
-    # Net Profit Margin - overall profitability after all expenses
-    axes[0, 2].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Net_Profit_Margin'], napesco_ratios.iloc[1]['Net_Profit_Margin']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 2].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Net_Profit_Margin'], ipg_ratios.iloc[1]['Net_Profit_Margin']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 2].set_title('Net Profit Margin')
-    axes[0, 2].set_ylabel('Percentage')
-    axes[0, 2].yaxis.set_major_formatter(PercentFormatter(1.0))
-    axes[0, 2].legend()
-    axes[0, 2].grid(True, alpha=0.3)
-
-    # ROA - Return on Assets measures asset utilization efficiency
-    axes[1, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['ROA'], napesco_ratios.iloc[1]['ROA']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['ROA'], ipg_ratios.iloc[1]['ROA']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 0].set_title('Return on Assets (ROA)')
-    axes[1, 0].set_ylabel('Percentage')
-    axes[1, 0].yaxis.set_major_formatter(PercentFormatter(1.0))
-    axes[1, 0].legend()
-    axes[1, 0].grid(True, alpha=0.3)
-
-    # ROE - Return on Equity measures returns to shareholders
-    axes[1, 1].bar(['2022', '2023'], [napesco_ratios.iloc[0]['ROE'], napesco_ratios.iloc[1]['ROE']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 1].bar(['2022', '2023'], [ipg_ratios.iloc[0]['ROE'], ipg_ratios.iloc[1]['ROE']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 1].set_title('Return on Equity (ROE)')
-    axes[1, 1].set_ylabel('Percentage')
-    axes[1, 1].yaxis.set_major_formatter(PercentFormatter(1.0))
-    axes[1, 1].legend()
-    axes[1, 1].grid(True, alpha=0.3)
-
-    # Profitability Trend Analysis - shows how profitability is evolving
-    axes[1, 2].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Gross_Profit_Margin'], napesco_ratios.iloc[1]['Gross_Profit_Margin']],
-                    'o-', linewidth=3, markersize=8, label='NAPESCO Gross')
-    axes[1, 2].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Net_Profit_Margin'], napesco_ratios.iloc[1]['Net_Profit_Margin']],
-                    's-', linewidth=3, markersize=8, label='NAPESCO Net')
-    axes[1, 2].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Gross_Profit_Margin'], ipg_ratios.iloc[1]['Gross_Profit_Margin']],
-                    '^-', linewidth=3, markersize=8, label='IPG Gross')
-    axes[1, 2].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Net_Profit_Margin'], ipg_ratios.iloc[1]['Net_Profit_Margin']],
-                    'd-', linewidth=3, markersize=8, label='IPG Net')
-    axes[1, 2].set_title('Profitability Trends')
-    axes[1, 2].set_ylabel('Percentage')
-    axes[1, 2].yaxis.set_major_formatter(PercentFormatter(1.0))
-    axes[1, 2].legend()
-    axes[1, 2].grid(True, alpha=0.3)
-
-    plt.tight_layout()
-
-    if filename:
-        plt.savefig(f'dashboards/{filename}', dpi=300, bbox_inches='tight')
-        print(f"Saved: dashboards/{filename}")
-
-    plt.close()
+    render_dashboard(PROFITABILITY_LAYOUT, napesco_ratios, ipg_ratios,
+                     filename and f'dashboards/{filename}', dpi, profile=profile)
 
 
-def create_comprehensive_efficiency_dashboard(napesco_ratios, ipg_ratios, filename=None):
+@traced('chart')
+@cached_chart(directory='dashboards', extra=EFFICIENCY_LAYOUT)
+def create_comprehensive_efficiency_dashboard(napesco_ratios, ipg_ratios, filename=None, dpi=300,
+                                              profile=PUBLICATION):
     """
     Create comprehensive dashboard for all efficiency ratios
     Efficiency ratios measure how well a company manages its assets and operations
     """
-    fig, axes = plt.subplots(3, 3, figsize=(18, 15))
-    fig.suptitle('Comprehensive Efficiency Analysis',
-                 fontsize=16, fontweight='bold')
-
-    # Asset Turnover - measures how efficiently assets generate revenue
-    axes[0, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Asset_Turnover'], napesco_ratios.iloc[1]['Asset_Turnover']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Asset_Turnover'], ipg_ratios.iloc[1]['Asset_Turnover']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 0].set_title('Asset Turnover')
-    axes[0, 0].set_ylabel('Times')
-    axes[0, 0].legend()
-    axes[0, 0].grid(True, alpha=0.3)
-
-    # Inventory Turnover - measures how quickly inventory is sold
-    axes[0, 1].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Inventory_Turnover'], napesco_ratios.iloc[1]['Inventory_Turnover']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 1].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Inventory_Turnover'], ipg_ratios.iloc[1]['Inventory_Turnover']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 1].set_title('Inventory Turnover')
-    axes[0, 1].set_ylabel('Times')
-    axes[0, 1].legend()
-    axes[0, 1].grid(True, alpha=0.3)
-
-    # Receivables Turnover - measures how quickly receivables are collected
-    axes[0, 2].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Receivables_Turnover'], napesco_ratios.iloc[1]['Receivables_Turnover']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 2].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Receivables_Turnover'], ipg_ratios.iloc[1]['Receivables_Turnover']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 2].set_title('Receivables Turnover')
-    axes[0, 2].set_ylabel('Times')
-    axes[0, 2].legend()
-    axes[0, 2].grid(True, alpha=0.3)
-
-    # Payables Turnover - measures how quickly company pays suppliers
-    axes[1, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Payables_Turnover'], napesco_ratios.iloc[1]['Payables_Turnover']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Payables_Turnover'], ipg_ratios.iloc[1]['Payables_Turnover']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 0].set_title('Payables Turnover')
-    axes[1, 0].set_ylabel('Times')
-    axes[1, 0].legend()
-    axes[1, 0].grid(True, alpha=0.3)
-
-    # Days Inventory Outstanding - average days to sell inventory
-    axes[1, 1].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Days_Inventory_Outstanding'], napesco_ratios.iloc[1]['Days_Inventory_Outstanding']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 1].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Days_Inventory_Outstanding'], ipg_ratios.iloc[1]['Days_Inventory_Outstanding']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 1].set_title('Days Inventory Outstanding')
-    axes[1, 1].set_ylabel('Days')
-    axes[1, 1].legend()
-    axes[1, 1].grid(True, alpha=0.3)
-
-    # Days Sales Outstanding - average days to collect receivables
-    axes[1, 2].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Days_Sales_Outstanding'], napesco_ratios.iloc[1]['Days_Sales_Outstanding']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 2].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Days_Sales_Outstanding'], ipg_ratios.iloc[1]['Days_Sales_Outstanding']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 2].set_title('Days Sales Outstanding')
-    axes[1, 2].set_ylabel('Days')
-    axes[1, 2].legend()
-    axes[1, 2].grid(True, alpha=0.3)
-
-    # Days Payables Outstanding - average days to pay suppliers
-    axes[2, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Days_Payables_Outstanding'], napesco_ratios.iloc[1]['Days_Payables_Outstanding']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[2, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Days_Payables_Outstanding'], ipg_ratios.iloc[1]['Days_Payables_Outstanding']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[2, 0].set_title('Days Payables Outstanding')
-    axes[2, 0].set_ylabel('Days')
-    axes[2, 0].legend()
-    axes[2, 0].grid(True, alpha=0.3)
-
-    # Working Capital Cycle (Cash Conversion Cycle) - measures working capital efficiency
-    napesco_ccc_2022 = napesco_ratios.iloc[0]['Days_Inventory_Outstanding'] + \
-        napesco_ratios.iloc[0]['Days_Sales_Outstanding'] - \
-        napesco_ratios.iloc[0]['Days_Payables_Outstanding']
-    napesco_ccc_2023 = napesco_ratios.iloc[1]['Days_Inventory_Outstanding'] + \
-        napesco_ratios.iloc[1]['Days_Sales_Outstanding'] - \
-        napesco_ratios.iloc[1]['Days_Payables_Outstanding']
-    ipg_ccc_2022 = ipg_ratios.iloc[0]['Days_Inventory_Outstanding'] + \
-        ipg_ratios.iloc[0]['Days_Sales_Outstanding'] - \
-        ipg_ratios.iloc[0]['Days_Payables_Outstanding']
-    ipg_ccc_2023 = ipg_ratios.iloc[1]['Days_Inventory_Outstanding'] + \
-        ipg_ratios.iloc[1]['Days_Sales_Outstanding'] - \
-        ipg_ratios.iloc[1]['Days_Payables_Outstanding']
-
-    axes[2, 1].bar(['2022', '2023'], [napesco_ccc_2022, napesco_ccc_2023],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[2, 1].bar(['2022', '2023'], [ipg_ccc_2022, ipg_ccc_2023],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[2, 1].set_title('Cash Conversion Cycle')
-    axes[2, 1].set_ylabel('Days')
-    axes[2, 1].legend()
-    axes[2, 1].grid(True, alpha=0.3)
-
-    # Efficiency Trends - shows how operational efficiency is changing
-    axes[2, 2].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Asset_Turnover'], napesco_ratios.iloc[1]['Asset_Turnover']],
-                    'o-', linewidth=3, markersize=8, label='NAPESCO Asset TO')
-    axes[2, 2].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Inventory_Turnover'], napesco_ratios.iloc[1]['Inventory_Turnover']],
-                    's-', linewidth=3, markersize=8, label='NAPESCO Inventory TO')
-    axes[2, 2].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Asset_Turnover'], ipg_ratios.iloc[1]['Asset_Turnover']],
-                    '^-', linewidth=3, markersize=8, label='IPG Asset TO')
-    # Scale down IPG inventory turnover for better visualization (it's much higher)
-    axes[2, 2].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Inventory_Turnover']/10, ipg_ratios.iloc[1]['Inventory_Turnover']/10],
-                    'd-', linewidth=3, markersize=8, label='IPG Inventory TO/10')
-    axes[2, 2].set_title('Efficiency Trends')
-    axes[2, 2].set_ylabel('Turnover Ratio')
-    axes[2, 2].legend()
-    axes[2, 2].grid(True, alpha=0.3)
-
-    plt.tight_layout()
+    render_dashboard(EFFICIENCY_LAYOUT, napesco_ratios, ipg_ratios,
+                     filename and f'dashboards/{filename}', dpi, profile=profile)
 
-    if filename:
-        plt.savefig(f'dashboards/{filename}', dpi=300, bbox_inches='tight')
-        print(f"Saved: dashboards/{filename}")
-
-    plt.close()
 
-
-def create_comprehensive_solvency_dashboard(napesco_ratios, ipg_ratios, filename=None):
+@traced('chart')
+@cached_chart(directory='dashboards', extra=SOLVENCY_LAYOUT)
+def create_comprehensive_solvency_dashboard(napesco_ratios, ipg_ratios, filename=None, dpi=300,
+                                            profile=PUBLICATION):
     """
     Create comprehensive dashboard for all solvency ratios
     Solvency ratios measure a company's ability to meet long-term obligations
     """
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
-    fig.suptitle('Comprehensive Solvency Analysis',
-                 fontsize=16, fontweight='bold')
-
-    # Debt Ratio - measures proportion of assets financed by debt
-    axes[0, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Debt_Ratio'], napesco_ratios.iloc[1]['Debt_Ratio']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Debt_Ratio'], ipg_ratios.iloc[1]['Debt_Ratio']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 0].set_title('Debt Ratio')
-    axes[0, 0].set_ylabel('Ratio')
-    axes[0, 0].legend()
-    axes[0, 0].grid(True, alpha=0.3)
-
-    # Debt to Equity - measures financial leverage
-    axes[0, 1].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Debt_to_Equity'], napesco_ratios.iloc[1]['Debt_to_Equity']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[0, 1].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Debt_to_Equity'], ipg_ratios.iloc[1]['Debt_to_Equity']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[0, 1].set_title('Debt-to-Equity Ratio')
-    axes[0, 1].set_ylabel('Ratio')
-    axes[0, 1].legend()
-    axes[0, 1].grid(True, alpha=0.3)
-
-    # Equity Multiplier - measures financial leverage from assets perspective
-    axes[1, 0].bar(['2022', '2023'], [napesco_ratios.iloc[0]['Equity_Multiplier'], napesco_ratios.iloc[1]['Equity_Multiplier']],
-                   width=0.4, label='NAPESCO', alpha=0.8)
-    axes[1, 0].bar(['2022', '2023'], [ipg_ratios.iloc[0]['Equity_Multiplier'], ipg_ratios.iloc[1]['Equity_Multiplier']],
-                   width=0.4, label='IPG', alpha=0.8)
-    axes[1, 0].set_title('Equity Multiplier')
-    axes[1, 0].set_ylabel('Times')
-    axes[1, 0].legend()
-    axes[1, 0].grid(True, alpha=0.3)
-
-    # Solvency Trends - shows how leverage and solvency are changing over time
-    axes[1, 1].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Debt_Ratio'], napesco_ratios.iloc[1]['Debt_Ratio']],
-                    'o-', linewidth=3, markersize=8, label='NAPESCO Debt Ratio')
-    axes[1, 1].plot(['2022', '2023'], [napesco_ratios.iloc[0]['Debt_to_Equity'], napesco_ratios.iloc[1]['Debt_to_Equity']],
-                    's-', linewidth=3, markersize=8, label='NAPESCO D/E')
-    axes[1, 1].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Debt_Ratio'], ipg_ratios.iloc[1]['Debt_Ratio']],
-                    '^-', linewidth=3, markersize=8, label='IPG Debt Ratio')
-    axes[1, 1].plot(['2022', '2023'], [ipg_ratios.iloc[0]['Debt_to_Equity'], ipg_ratios.iloc[1]['Debt_to_Equity']],
-                    'd-', linewidth=3, markersize=8, label='IPG D/E')
-    axes[1, 1].set_title('Solvency Trends')
-    axes[1, 1].set_ylabel('Ratio')
-    axes[1, 1].legend()
-    axes[1, 1].grid(True, alpha=0.3)
-
-    plt.tight_layout()
+    render_dashboard(SOLVENCY_LAYOUT, napesco_ratios, ipg_ratios,
+                     filename and f'dashboards/{filename}', dpi, profile=profile)
 
-    if filename:
-        plt.savefig(f'dashboards/{filename}', dpi=300, bbox_inches='tight')
-        print(f"Saved: dashboards/{filename}")
 
-    plt.close()
-
-
-def generate_financial_summary_report(napesco_ratios, ipg_ratios):
+def dashboard_render_jobs(napesco_ratios, ipg_ratios, combined_ratios, prefix='napesco_ipg',
+                          profile=PUBLICATION):
     """
-    Generate a comprehensive text summary of the financial analysis
-    This provides key insights and interpretations of the ratio analysis
+    Describe every dashboard and comparison chart of the analysis as render jobs
+    The same job list drives both the sequential and the parallel render modes
     """
-    print("="*60)
-    print("COMPREHENSIVE FINANCIAL ANALYSIS REPORT")
-    print("NAPESCO vs IPG - 2022 to 2023 Comparison")
-    print("="*60)
-
-    print("\n1. LIQUIDITY ANALYSIS:")
-    print("-" * 25)
-    print(
-        f"NAPESCO Current Ratio: {napesco_ratios.iloc[0]['Current_Ratio']:.2f} (2022) → {napesco_ratios.iloc[1]['Current_Ratio']:.2f} (2023)")
-    print(
-        f"IPG Current Ratio: {ipg_ratios.iloc[0]['Current_Ratio']:.2f} (2022) → {ipg_ratios.iloc[1]['Current_Ratio']:.2f} (2023)")
-    print(f"Interpretation: Both companies show strong liquidity positions above 1.0, with NAPESCO showing superior liquidity ratios.")
-
-    print("\n2. PROFITABILITY ANALYSIS:")
-    print("-" * 27)
-    print(
-        f"NAPESCO Net Profit Margin: {napesco_ratios.iloc[0]['Net_Profit_Margin']:.2%} (2022) → {napesco_ratios.iloc[1]['Net_Profit_Margin']:.2%} (2023)")
-    print(
-        f"IPG Net Profit Margin: {ipg_ratios.iloc[0]['Net_Profit_Margin']:.2%} (2022) → {ipg_ratios.iloc[1]['Net_Profit_Margin']:.2%} (2023)")
-    print(
-        f"NAPESCO ROE: {napesco_ratios.iloc[0]['ROE']:.2%} (2022) → {napesco_ratios.iloc[1]['ROE']:.2%} (2023)")
-    print(
-        f"IPG ROE: {ipg_ratios.iloc[0]['ROE']:.2%} (2022) → {ipg_ratios.iloc[1]['ROE']:.2%} (2023)")
-    print(f"Interpretation: NAPESCO demonstrates significantly higher profitability margins and better return on equity.")
-
-    print("\n3. EFFICIENCY ANALYSIS:")
-    print("-" * 23)
-    print(
-        f"NAPESCO Asset Turnover: {napesco_ratios.iloc[0]['Asset_Turnover']:.2f} (2022) → {napesco_ratios.iloc[1]['Asset_Turnover']:.2f} (2023)")
-    print(
-        f"IPG Asset Turnover: {ipg_ratios.iloc[0]['Asset_Turnover']:.2f} (2022) → {ipg_ratios.iloc[1]['Asset_Turnover']:.2f} (2023)")
-    print(f"Interpretation: IPG shows higher asset turnover, indicating more efficient asset utilization for revenue generation.")
-
-    print("\n4. SOLVENCY ANALYSIS:")
-    print("-" * 22)
-    print(
-        f"NAPESCO Debt-to-Equity: {napesco_ratios.iloc[0]['Debt_to_Equity']:.2f} (2022) → {napesco_ratios.iloc[1]['Debt_to_Equity']:.2f} (2023)")
-    print(
-        f"IPG Debt-to-Equity: {ipg_ratios.iloc[0]['Debt_to_Equity']:.2f} (2022) → {ipg_ratios.iloc[1]['Debt_to_Equity']:.2f} (2023)")
-    print(f"Interpretation: Both companies maintain conservative debt levels, with IPG showing higher leverage.")
-
-    print("\n" + "="*60)
-
-
-def main():
+    return [
+        # Comprehensive dashboards with descriptive names
+        RenderJob('liquidity_dashboard', create_comprehensive_liquidity_dashboard,
+                  (napesco_ratios, ipg_ratios, f'{prefix}_liquidity_analysis.png'),
+                  {'profile': profile}),
+        RenderJob('profitability_dashboard', create_comprehensive_profitability_dashboard,
+                  (napesco_ratios, ipg_ratios, f'{prefix}_profitability_analysis.png'),
+                  {'profile': profile}),
+        RenderJob('efficiency_dashboard', create_comprehensive_efficiency_dashboard,
+                  (napesco_ratios, ipg_ratios, f'{prefix}_efficiency_analysis.png'),
+                  {'profile': profile}),
+        RenderJob('solvency_dashboard', create_comprehensive_solvency_dashboard,
+                  (napesco_ratios, ipg_ratios, f'{prefix}_solvency_analysis.png'),
+                  {'profile': profile}),
+
+        # Individual ratio comparisons for key metrics
+        RenderJob('current_ratio_comparison', create_ratio_comparison_chart,
+                  (combined_ratios, 'Current_Ratio', 'Current Ratio Comparison'),
+                  {'filename': f'{prefix}_current_ratio_comparison.png', 'profile': profile}),
+        RenderJob('net_profit_margin_comparison', create_ratio_comparison_chart,
+                  (combined_ratios, 'Net_Profit_Margin', 'Net Profit Margin Comparison'),
+                  {'formatted_as_percentage': True,
+                   'filename': f'{prefix}_net_profit_margin_comparison.png',
+                   'profile': profile}),
+        RenderJob('roe_comparison', create_ratio_comparison_chart,
+                  (combined_ratios, 'ROE', 'Return on Equity Comparison'),
+                  {'formatted_as_percentage': True, 'filename': f'{prefix}_roe_comparison.png',
+                   'profile': profile}),
+        RenderJob('asset_turnover_comparison', create_ratio_comparison_chart,
+                  (combined_ratios, 'Asset_Turnover', 'Asset Turnover Comparison'),
+                  {'filename': f'{prefix}_asset_turnover_comparison.png', 'profile': profile}),
+    ]
+
+
+def main(processes=None, use_cache=True, profile=PUBLICATION, bundle=None, page_format='png'):
     """
     Main execution function to run the complete financial analysis
     This orchestrates all the analysis functions and generates comprehensive output
+    Pass processes to render the charts across a pool of worker processes, and
+    profile='draft' for quick low-resolution previews. With bundle (a .pdf or .zip path)
+    every chart becomes a page of that one file instead of a separate image
     """
+    # Set FIN_TRACE=trace.json to record per-stage timings for this run
+    trace_from_environment()
+
     print("Starting Comprehensive Financial Analysis...")
     print("Generating ratio calculations and visualizations...\n")
 
-    # Generate all comprehensive dashboards with descriptive names
-    create_comprehensive_liquidity_dashboard(
-        napesco_ratios, ipg_ratios, 'napesco_ipg_liquidity_analysis.png')
-    create_comprehensive_profitability_dashboard(
-        napesco_ratios, ipg_ratios, 'napesco_ipg_profitability_analysis.png')
-    create_comprehensive_efficiency_dashboard(
-        napesco_ratios, ipg_ratios, 'napesco_ipg_efficiency_analysis.png')
-    create_comprehensive_solvency_dashboard(
-        napesco_ratios, ipg_ratios, 'napesco_ipg_solvency_analysis.png')
-
-    # Generate individual ratio comparisons for key metrics
-    create_ratio_comparison_chart(combined_ratios, 'Current_Ratio',
-                                  'Current Ratio Comparison', filename='napesco_ipg_current_ratio_comparison.png')
-    create_ratio_comparison_chart(combined_ratios, 'Net_Profit_Margin', 'Net Profit Margin Comparison',
-                                  formatted_as_percentage=True, filename='napesco_ipg_net_profit_margin_comparison.png')
-    create_ratio_comparison_chart(combined_ratios, 'ROE', 'Return on Equity Comparison',
-                                  formatted_as_percentage=True, filename='napesco_ipg_roe_comparison.png')
-    create_ratio_comparison_chart(combined_ratios, 'Asset_Turnover',
-                                  'Asset Turnover Comparison', filename='napesco_ipg_asset_turnover_comparison.png')
+    if not bundle and not os.path.exists('dashboards'):
+        os.makedirs('dashboards')
+        print("Created 'dashboards' directory")
+
+    # Calculate ratios for both companies
+    napesco_ratios, ipg_ratios, combined_ratios = load_company_ratios()
+
+    # Charts whose ratios and parameters are unchanged are copied from the render cache
+    if use_cache and not bundle:
+        render_cache = enable_render_cache()
+
+    jobs = dashboard_render_jobs(napesco_ratios, ipg_ratios, combined_ratios, profile=profile)
+    if bundle:
+        # Pages are collected in this process, so bundled runs render serially
+        with chart_bundle(bundle, page_format):
+            render_results = render_serial(jobs)
+        print(f"Bundled {len(render_results)} charts into {bundle}")
+    elif processes:
+        render_results = render_parallel(jobs, processes=processes)
+    else:
+        render_results = render_serial(jobs)
+    print_render_timings(render_results)
+    if use_cache and not processes and not bundle:
+        cache_stats = render_cache.stats()
+        print(f"Render cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
 
     # Display comprehensive summary report
     generate_financial_summary_report(napesco_ratios, ipg_ratios)
@@ -574,4 +306,17 @@ def main():
 
 # Execute the main analysis
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='NAPESCO vs IPG financial ratio dashboards')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='render charts in parallel across this many worker processes')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='re-render every chart instead of reusing cached renders')
+    parser.add_argument('--profile', choices=sorted(RENDER_PROFILES), default='publication',
+                        help='draft renders fast low-resolution previews')
+    parser.add_argument('--bundle', default=None,
+                        help='write every chart as a page of one .pdf or .zip file')
+    parser.add_argument('--page-format', choices=PAGE_FORMATS, default='png',
+                        help='page format inside a .zip bundle')
+    args = parser.parse_args()
+    main(args.processes, use_cache=not args.no_cache, profile=args.profile,
+         bundle=args.bundle, page_format=args.page_format)
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, evaluate_ratios
+from finRolling import period_keys
+
+# ROE = Net Profit Margin x Asset Turnover x Equity Multiplier
+DUPONT_FACTORS = ['Net_Profit_Margin', 'Asset_Turnover', 'Equity_Multiplier']
+
+# Column holding each factor's share of the ROE change from the previous period
+EFFECT_COLUMNS = [f'{factor}_Effect' for factor in DUPONT_FACTORS]
+
+
+def shapley_effects(before, after):
+    """
+    Exact Shapley attribution of the change in a product of three factors
+    before and after are (rows, 3) arrays; the effects of each row sum to the change
+    """
+    a0, b0, c0 = before.T
+    a1, b1, c1 = after.T
+    delta = after - before
+    return np.column_stack([
+        delta[:, 0] * ((b0 * c0 + b1 * c1) / 3 + (b0 * c1 + b1 * c0) / 6),
+        delta[:, 1] * ((a0 * c0 + a1 * c1) / 3 + (a0 * c1 + a1 * c0) / 6),
+        delta[:, 2] * ((a0 * b0 + a1 * b1) / 3 + (a0 * b1 + a1 * b0) / 6),
+    ])
+
+
+def lmdi_effects(before, after):
+    """
+    Log-mean Divisia attribution: each factor gets L(ROE1, ROE0) * ln(factor1 / factor0)
+    Only defined where no factor changes sign or is zero; those rows come back as NaN
+    """
+    roe_before = before.prod(axis=1)
+    roe_after = after.prod(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(after / before)
+        log_change = np.log(roe_after / roe_before)
+        weight = np.where(roe_after == roe_before, roe_before,
+                          (roe_after - roe_before) / log_change)
+        effects = weight[:, None] * logs
+    return np.where(np.isfinite(effects).all(axis=1)[:, None], effects, np.nan)
+
+
+def dupont_table(ratios, method='lmdi'):
+    """
+    DuPont decomposition of ROE for every company and period in one pass
+    ratios is a ratio or statement frame with Company/Year columns or a (Company, Year)
+    index, or a quarterly one with a Quarter column or level as well. Each row carries the
+    three factors, their product, the previous period's ROE and the attribution of the
+    change to each factor. method is 'lmdi' (log-mean Divisia, using Shapley where a factor
+    changes sign) or 'shapley'; both sum exactly to the change
+    """
+    if method not in ('lmdi', 'shapley'):
+        raise ValueError(f"Unknown DuPont attribution method: {method}")
+    if not all(name in ratios.columns for name in PANEL_INDEX):
+        ratios = ratios.reset_index()
+
+    # Companies keep their order of first appearance, periods are sorted within each
+    codes, companies = pd.factorize(ratios['Company'], sort=False)
+    years = ratios['Year'].to_numpy()
+    keys = period_keys(ratios)
+    same = codes[1:] == codes[:-1]
+    if np.all((codes[1:] > codes[:-1]) | (same & (keys[1:] > keys[:-1]))):
+        order = np.arange(len(codes))
+    else:
+        order = np.lexsort((keys, codes))
+
+    values = evaluate_ratios(ratios, DUPONT_FACTORS)
+    factors = np.column_stack([np.asarray(values[name], dtype=np.float64)[order]
+                               for name in DUPONT_FACTORS])
+    codes = codes[order]
+
+    table = pd.DataFrame({'Company': pd.Categorical.from_codes(codes, companies),
+                          'Year': years[order]})
+    quarterly = 'Quarter' in ratios.columns
+    if quarterly:
+        quarters = ratios['Quarter'].to_numpy()[order]
+        table['Quarter'] = quarters
+    for position, name in enumerate(DUPONT_FACTORS):
+        table[name] = factors[:, position]
+    table['ROE'] = factors.prod(axis=1)
+
+    # Each row is compared with the previous row of the same company
+    has_previous = np.r_[False, codes[1:] == codes[:-1]]
+    previous = np.flatnonzero(has_previous) - 1
+    current = np.flatnonzero(has_previous)
+
+    def carried(column):
+        shifted = np.full(len(table), np.nan)
+        shifted[current] = column[previous]
+        return shifted
+
+    table['Previous_Year'] = carried(years[order])
+    if quarterly:
+        table['Previous_Quarter'] = carried(quarters)
+    table['Previous_ROE'] = carried(table['ROE'].to_numpy())
+    table['ROE_Change'] = table['ROE'] - table['Previous_ROE']
+
+    before = factors[previous]
+    after = factors[current]
+    effects = shapley_effects(before, after)
+    if method == 'lmdi':
+        log_effects = lmdi_effects(before, after)
+        usable = np.isfinite(log_effects).all(axis=1)
+        effects[usable] = log_effects[usable]
+
+    for position, name in enumerate(EFFECT_COLUMNS):
+        column = np.full(len(table), np.nan)
+        column[current] = effects[:, position]
+        table[name] = column
+    return table
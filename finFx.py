@@ -0,0 +1,217 @@
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, STATEMENT_COLUMNS
+from finRolling import FLOW_COLUMNS, period_keys, period_labels
+
+# Columns tag_statements adds: ISO currency code and the unit amounts are reported in,
+# e.g. 1000 for statements in thousands
+TAG_COLUMNS = ['Currency', 'Unit_Scale']
+
+# Minor units per major unit, for per-share figures such as EPS_Fils that are quoted in
+# fils or cents of the reporting currency; other currencies are taken to have 100
+MINOR_UNITS = {'KWD': 1000, 'BHD': 1000, 'OMR': 1000, 'JOD': 1000, 'IQD': 1000,
+               'LYD': 1000, 'TND': 1000, 'JPY': 1}
+DEFAULT_MINOR_UNITS = 100
+
+# Per-share figures are converted between minor units but not scaled by Unit_Scale
+PER_SHARE_COLUMNS = ['EPS_Fils']
+
+# Income and cash flow items are translated at the period's average rate, balance sheet
+# items at its closing rate
+AVERAGE_RATE_COLUMNS = [name for name in FLOW_COLUMNS if name not in PER_SHARE_COLUMNS]
+CLOSING_RATE_COLUMNS = [name for name in STATEMENT_COLUMNS
+                        if name not in FLOW_COLUMNS and name not in PER_SHARE_COLUMNS]
+
+# Period keys are below this, so (currency, period) packs into one int64 lookup key
+_PERIOD_SPAN = 1 << 32
+
+
+def _per_company(statements, values, name):
+    """
+    Row codes into a list of distinct values, from a scalar or a company -> value mapping
+    """
+    if not isinstance(values, dict):
+        return np.zeros(len(statements), dtype=np.intp), [values]
+    rows, companies = pd.factorize(statements['Company'])
+    missing = sorted({str(company) for company in companies if company not in values})
+    if missing:
+        raise ValueError(f"No {name} given for companies: {', '.join(missing)}")
+    codes, distinct = pd.factorize(pd.Series([values[company] for company in companies],
+                                             dtype=object))
+    return codes[rows], list(distinct)
+
+
+def _repeated(value, length):
+    """
+    Categorical holding one value on every row, without building the values row by row
+    """
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), [value])
+
+
+def tag_statements(statements, currency, unit_scale=1):
+    """
+    Copy of a statement panel with the Currency and Unit_Scale of every row
+    currency and unit_scale are a single value or a mapping of company to value, e.g.
+    tag_statements(statements, {'NAPESCO': 'KWD', 'IPG': 'KWD'}, {'NAPESCO': 1, 'IPG': 1000})
+    """
+    if not all(name in statements.columns for name in PANEL_INDEX):
+        statements = statements.reset_index()
+    codes, currencies = _per_company(statements, currency, 'currency')
+    scale_codes, scales = _per_company(statements, unit_scale, 'unit scale')
+    scales = np.asarray(scales, dtype=np.float64)
+    if np.any(scales <= 0):
+        raise ValueError("Unit scales must be positive")
+
+    tagged = statements.copy()
+    tagged['Currency'] = pd.Categorical.from_codes(codes, [str(code) for code in currencies])
+    tagged['Unit_Scale'] = scales[scale_codes]
+    return tagged
+
+
+class FxRates:
+    """
+    Period-indexed exchange rates against one base currency
+    rates has Currency, Year (and optionally Quarter) and Closing columns, plus Average for
+    the period's average rate (Closing is used where it is missing). A rate is the value of
+    one unit of Currency in the base currency, which itself is always 1. Annual statements
+    matched against quarterly rates use the fourth quarter's closing rate and the mean of
+    the year's four average rates
+    """
+
+    def __init__(self, rates, base='USD'):
+        missing = [name for name in ('Currency', 'Year', 'Closing') if name not in rates]
+        if missing:
+            raise ValueError(f"FX rates are missing columns: {', '.join(missing)}")
+        self.base = base
+        self.quarterly = 'Quarter' in rates
+
+        rates = rates.copy()
+        if 'Average' not in rates:
+            rates['Average'] = rates['Closing']
+        rates['Average'] = rates['Average'].fillna(rates['Closing'])
+        if not (np.all(rates['Closing'] > 0) and np.all(rates['Average'] > 0)):
+            raise ValueError("FX rates must be positive")
+
+        currencies, self.currencies = pd.factorize(rates['Currency'].astype(str), sort=True)
+        self._codes = {currency: code for code, currency in enumerate(self.currencies)}
+        keys = currencies.astype(np.int64) * _PERIOD_SPAN + period_keys(rates)
+        if len(np.unique(keys)) != len(keys):
+            raise ValueError("FX rates have more than one row for a currency and period")
+        order = np.argsort(keys)
+        self._keys = keys[order]
+        self._closing = rates['Closing'].to_numpy(dtype=np.float64)[order]
+        self._average = rates['Average'].to_numpy(dtype=np.float64)[order]
+
+        # Full years of quarterly rates, for annual statements
+        if self.quarterly:
+            years = self._keys // 4
+            starts = np.flatnonzero(np.r_[True, years[1:] != years[:-1]])
+            counts = np.diff(np.r_[starts, len(years)])
+            ends = starts + counts - 1
+            full = (counts == 4) & (self._keys[ends] % 4 == 3)
+            self._annual_keys = self._keys[ends[full]]
+            self._annual_closing = self._closing[ends[full]]
+            self._annual_average = np.add.reduceat(self._average, starts)[full] / 4
+
+    def lookup(self, currencies, frame):
+        """
+        Closing and average rate arrays for each row's currency and period
+        currencies holds each row's currency code and frame its Year (and Quarter)
+        """
+        # Only the distinct currencies are looked at one by one
+        rows, distinct = pd.factorize(currencies)
+        distinct = [str(currency) for currency in distinct]
+        unknown = sorted(set(distinct) - set(self._codes) - {self.base})
+        if unknown:
+            raise ValueError(f"No FX rates for currencies: {', '.join(unknown)}")
+        quoted = np.array([currency != self.base for currency in distinct], dtype=bool)[rows]
+        codes = np.array([self._codes.get(currency, 0) for currency in distinct],
+                         dtype=np.int64)[rows]
+        closing = np.ones(len(rows))
+        average = np.ones(len(rows))
+
+        keys, closing_table, average_table = self._keys, self._closing, self._average
+        periods = period_keys(frame)
+        if self.quarterly and 'Quarter' not in frame:
+            keys, closing_table, average_table = (self._annual_keys, self._annual_closing,
+                                                  self._annual_average)
+        elif not self.quarterly:
+            periods = periods // 4 * 4 + 3
+        wanted = codes * _PERIOD_SPAN + periods
+
+        positions = np.minimum(np.searchsorted(keys, wanted), max(len(keys) - 1, 0))
+        found = (keys[positions] == wanted) if len(keys) else np.zeros(len(wanted), bool)
+        absent = quoted & ~found
+        if absent.any():
+            missing = np.flatnonzero(absent)[:5]
+            labels = period_labels(frame.iloc[missing])
+            pairs = ', '.join(f"{distinct[rows[row]]} {label}"
+                              for row, label in zip(missing, labels))
+            raise ValueError(f"Missing FX rates for {absent.sum()} rows, e.g. {pairs}")
+
+        closing[quoted] = closing_table[positions[quoted]]
+        average[quoted] = average_table[positions[quoted]]
+        return closing, average
+
+    def cross(self, currencies, target, frame):
+        """
+        Closing and average rates converting each row's currency into target
+        """
+        closing, average = self.lookup(currencies, frame)
+        target_closing, target_average = self.lookup(_repeated(target, len(frame)), frame)
+        return closing / target_closing, average / target_average
+
+
+def convert_statements(statements, fx, target, unit_scale=1):
+    """
+    A tagged statement panel translated into one currency and reporting unit
+    Every row's rates come from one vectorized lookup of (currency, period) in the FX
+    table, then each group of columns is scaled as a whole: balance sheet items by the
+    closing rate, income and cash flow items by the average rate, both adjusted for the
+    unit scale, and per-share items between minor units at the average rate
+    """
+    missing = [name for name in TAG_COLUMNS if name not in statements.columns]
+    if missing:
+        raise ValueError(f"Statements are not tagged; missing columns: {', '.join(missing)} "
+                         f"(see tag_statements)")
+    currencies = statements['Currency']
+    closing, average = fx.cross(currencies, target, statements)
+    scale = statements['Unit_Scale'].to_numpy(dtype=np.float64) / unit_scale
+
+    rows, distinct = pd.factorize(currencies)
+    minor = np.array([MINOR_UNITS.get(str(currency), DEFAULT_MINOR_UNITS)
+                      for currency in distinct], dtype=np.float64)[rows]
+    per_share = average * MINOR_UNITS.get(target, DEFAULT_MINOR_UNITS) / minor
+
+    converted = statements.copy()
+    for columns, factor in [(CLOSING_RATE_COLUMNS, closing * scale),
+                            (AVERAGE_RATE_COLUMNS, average * scale),
+                            (PER_SHARE_COLUMNS, per_share)]:
+        converted[columns] = statements[columns].to_numpy(dtype=np.float64) * factor[:, None]
+    converted['Currency'] = _repeated(target, len(statements))
+    converted['Unit_Scale'] = float(unit_scale)
+    return converted
+
+
+class CurrencyPanel:
+    """
+    A tagged statement panel and its FX rates, with each converted panel kept once made
+    convert(target, unit_scale) translates the whole panel the first time it is asked for
+    and returns the same frame afterwards. The panel and rates are treated as read-only
+    """
+
+    def __init__(self, statements, fx):
+        self.statements = statements
+        self.fx = fx
+        self._converted = {}
+
+    def convert(self, target, unit_scale=1):
+        key = (target, float(unit_scale))
+        if key not in self._converted:
+            self._converted[key] = convert_statements(self.statements, self.fx, target,
+                                                      unit_scale)
+        return self._converted[key]
+
+    def clear(self):
+        self._converted.clear()
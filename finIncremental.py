@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, RATIO_COLUMNS, calculate_panel_ratios
+
+RATIO_FILE = 'ratios.f8'
+KEY_FILE = 'keys.csv'
+META_FILE = 'meta.json'
+
+
+def _keyed(statements):
+    """
+    Statement panel with its key columns as columns rather than index levels
+    """
+    if all(name in statements.columns for name in PANEL_INDEX):
+        return statements
+    return statements.reset_index()
+
+
+class RatioTable:
+    """
+    Persisted (Company, Year) ratio table that is patched in place as statements arrive
+    Ratios live in a flat float64 file with one fixed-width row per key, and an
+    append-only key log maps each (Company, Year) to its row number. A quarterly table
+    is keyed by (Company, Year, Quarter) instead; which one is fixed when it is created
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE)) as meta_file:
+            meta = json.load(meta_file)
+        if meta['columns'] != RATIO_COLUMNS:
+            raise ValueError(f"Ratio table at {directory} was written with different ratio columns")
+        self.index = meta.get('index', PANEL_INDEX)
+
+        self._rows = {}
+        with open(os.path.join(directory, KEY_FILE), newline='') as key_file:
+            for company, *period in csv.reader(key_file):
+                self._rows[(company, *map(int, period))] = len(self._rows)
+
+        # Drop ratio rows written by an update that never got to record its keys
+        row_bytes = len(RATIO_COLUMNS) * 8
+        ratio_path = os.path.join(directory, RATIO_FILE)
+        if os.path.getsize(ratio_path) > len(self._rows) * row_bytes:
+            os.truncate(ratio_path, len(self._rows) * row_bytes)
+
+    @classmethod
+    def create(cls, directory, statements=None, quarterly=None):
+        """
+        Create an empty ratio table on disk, optionally seeded from a statement panel
+        The table is quarterly when quarterly is set or, by default, when the seed
+        statements have a Quarter column
+        """
+        if quarterly is None:
+            quarterly = statements is not None and 'Quarter' in _keyed(statements).columns
+        index = PANEL_INDEX + (['Quarter'] if quarterly else [])
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, META_FILE), 'w') as meta_file:
+            json.dump({'columns': RATIO_COLUMNS, 'dtype': 'float64', 'index': index},
+                      meta_file)
+        open(os.path.join(directory, KEY_FILE), 'w').close()
+        open(os.path.join(directory, RATIO_FILE), 'wb').close()
+
+        table = cls(directory)
+        if statements is not None:
+            table.update(statements)
+        return table
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def update(self, statements):
+        """
+        Recompute ratios for appended or restated statement rows and patch them into the table
+        Only the given (Company, Year) rows are computed and written; returns (restated, appended)
+        Quarterly statements only go into a quarterly table and annual ones into an annual table
+        """
+        statements = _keyed(statements)
+        if ('Quarter' in statements.columns) != ('Quarter' in self.index):
+            raise ValueError(f"Ratio table at {self.directory} is keyed by "
+                             f"{', '.join(self.index)}; statements must have the same periods")
+        ratios = calculate_panel_ratios(statements)
+        keys = list(zip(statements['Company'].astype(str),
+                        *(statements[name].astype(int) for name in self.index[1:])))
+        values = ratios.to_numpy(dtype=np.float64)
+
+        # A batch may repeat a key; the last filing for it wins
+        latest = {}
+        for position, key in enumerate(keys):
+            latest[key] = position
+
+        restated = [(self._rows[key], position) for key, position in latest.items()
+                    if key in self._rows]
+        appended = [(key, position) for key, position in latest.items()
+                    if key not in self._rows]
+
+        ratio_path = os.path.join(self.directory, RATIO_FILE)
+        if restated:
+            rows, positions = (np.array(column) for column in zip(*restated))
+            stored = np.memmap(ratio_path, dtype=np.float64, mode='r+',
+                               shape=(len(self._rows), len(RATIO_COLUMNS)))
+            stored[rows] = values[positions]
+            stored.flush()
+            del stored
+
+        if appended:
+            positions = [position for _, position in appended]
+            with open(ratio_path, 'ab') as ratio_file:
+                ratio_file.write(np.ascontiguousarray(values[positions]).tobytes())
+            # Keys are recorded last so an interrupted append is simply ignored on reopen
+            with open(os.path.join(self.directory, KEY_FILE), 'a', newline='') as key_file:
+                csv.writer(key_file).writerows(key for key, _ in appended)
+            for key, _ in appended:
+                self._rows[key] = len(self._rows)
+
+        return len(restated), len(appended)
+
+    def get(self, company, year, quarter=None):
+        """
+        Read a single ratio row as a Series without loading the rest of the table
+        """
+        key = (company, year) if quarter is None else (company, year, quarter)
+        position = self._rows[key]
+        stored = np.memmap(os.path.join(self.directory, RATIO_FILE), dtype=np.float64,
+                           mode='r', shape=(len(self._rows), len(RATIO_COLUMNS)))
+        row = np.array(stored[position])
+        return pd.Series(row, index=RATIO_COLUMNS, name=key)
+
+    def to_frame(self):
+        """
+        Load the whole table as a ratio frame indexed by the table's key columns
+        """
+        values = np.fromfile(os.path.join(self.directory, RATIO_FILE), dtype=np.float64)
+        index = pd.MultiIndex.from_tuples(list(self._rows), names=self.index)
+        return pd.DataFrame(values.reshape(len(self._rows), len(RATIO_COLUMNS)),
+                            index=index, columns=RATIO_COLUMNS)
@@ -0,0 +1,189 @@
+import numbers
+from collections import namedtuple
+
+import numpy as np
+
+from finRatios import RATIO_COLUMNS, RATIO_REGISTRY, panel_index, ratio_plan
+from finTrace import traced
+
+# A ratio as the kernel evaluates it: (numerator - minus) / denominator, where numerator
+# is a statement column or a constant, minus an optional statement column and
+# denominator a statement column or a ratio computed earlier in the same pass
+KernelRatio = namedtuple('KernelRatio', ['name', 'numerator', 'minus', 'denominator'])
+
+KERNEL_RATIOS = {ratio.name: ratio for ratio in [
+    KernelRatio('Current_Ratio', 'Current_Assets', None, 'Current_Liabilities'),
+    KernelRatio('Quick_Ratio', 'Current_Assets', 'Inventory', 'Current_Liabilities'),
+    KernelRatio('Cash_Ratio', 'Cash_Equivalents', None, 'Current_Liabilities'),
+    KernelRatio('Gross_Profit_Margin', 'Gross_Profit', None, 'Revenue'),
+    KernelRatio('Operating_Profit_Margin', 'Operating_Income', None, 'Revenue'),
+    KernelRatio('Net_Profit_Margin', 'Net_Income', None, 'Revenue'),
+    KernelRatio('ROA', 'Net_Income', None, 'Total_Assets'),
+    KernelRatio('ROE', 'Net_Income', None, 'Shareholders_Equity'),
+    KernelRatio('Asset_Turnover', 'Revenue', None, 'Total_Assets'),
+    KernelRatio('Inventory_Turnover', 'Cost_of_Sales', None, 'Inventory'),
+    KernelRatio('Days_Inventory_Outstanding', 365, None, 'Inventory_Turnover'),
+    KernelRatio('Receivables_Turnover', 'Revenue', None, 'Accounts_Receivable'),
+    KernelRatio('Days_Sales_Outstanding', 365, None, 'Receivables_Turnover'),
+    KernelRatio('Payables_Turnover', 'Cost_of_Sales', None, 'Accounts_Payable'),
+    KernelRatio('Days_Payables_Outstanding', 365, None, 'Payables_Turnover'),
+    KernelRatio('Debt_Ratio', 'Total_Liabilities', None, 'Total_Assets'),
+    KernelRatio('Debt_to_Equity', 'Total_Liabilities', None, 'Shareholders_Equity'),
+    KernelRatio('Equity_Multiplier', 'Total_Assets', None, 'Shareholders_Equity'),
+]}
+
+# What happens to a ratio whose denominator is unusable:
+#   ieee  plain float division, exactly as calculate_panel_ratios (inf/NaN, signs kept)
+#   nan   the ratio is NaN when its denominator is zero, negative or not finite
+#   clip  the IEEE ratio clamped to +/-limit, so negative and infinite denominators keep
+#         their real value; a zero denominator gives +/-limit by the sign of the numerator
+#         (0 for a zero numerator), NaN stays NaN, and ratios built on a clipped ratio
+#         use the clipped value
+#   flag  IEEE values, plus a Denominator_Flags bitmask per row with bit i set when the
+#         i-th requested ratio had a zero, negative or non-finite denominator
+DENOMINATOR_POLICIES = ('ieee', 'nan', 'clip', 'flag')
+
+# Magnitude the clip policy gives ratios with an unusable denominator
+CLIP_LIMIT = 1e6
+
+FLAGS_COLUMN = 'Denominator_Flags'
+
+
+def kernel_plan(names):
+    """
+    Ratios to compute, dependencies first, and the statement columns they read
+    Raises ValueError for ratios the kernel has no expression for, or whose registry
+    definition no longer reads the inputs the kernel expression assumes
+    """
+    order, reads = ratio_plan(names)
+    unsupported = [name for name in order if name not in KERNEL_RATIOS]
+    if unsupported:
+        raise ValueError(f"No fused kernel for ratios: {', '.join(unsupported)}; "
+                         f"use calculate_panel_ratios")
+    for name in order:
+        ratio = KERNEL_RATIOS[name]
+        inputs = {ratio.numerator, ratio.minus, ratio.denominator} - {None}
+        inputs = {value for value in inputs if not isinstance(value, numbers.Number)}
+        if inputs != set(RATIO_REGISTRY[name].inputs):
+            raise ValueError(f"Ratio {name} was redefined in the registry; "
+                             f"the fused kernel cannot compute it")
+    return order, reads
+
+
+def _numerator_at(ratio, columns, rows):
+    if isinstance(ratio.numerator, numbers.Number):
+        return np.full(len(rows), float(ratio.numerator))
+    values = columns[ratio.numerator][rows]
+    if ratio.minus is not None:
+        values = values - columns[ratio.minus][rows]
+    return values
+
+
+def _fused_block(columns, names, policy, limit):
+    """
+    (ratios, rows) block with the requested ratios in its first rows and the ratios they
+    depend on after them, and the flags array under the flag policy
+    """
+    if policy not in DENOMINATOR_POLICIES:
+        raise ValueError(f"Unknown denominator policy: {policy!r}; "
+                         f"expected one of {', '.join(DENOMINATOR_POLICIES)}")
+    if policy == 'flag' and len(names) > 64:
+        raise ValueError("The flag policy supports at most 64 ratios per call")
+    order, _ = kernel_plan(names)
+    length = len(next(iter(columns.values()))) if columns else 0
+
+    block = np.empty((len(order), length))
+    out = dict(zip(names + [name for name in order if name not in names], block))
+    flags = None
+    if policy != 'ieee':
+        usable = np.empty(length, dtype=bool)
+    if policy in ('nan', 'flag'):
+        finite = np.empty(length, dtype=bool)
+    if policy == 'flag':
+        flags = np.zeros(length, dtype=np.uint64)
+        bits = {name: np.uint64(1) << np.uint64(bit) for bit, name in enumerate(names)}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name in order:
+            ratio = KERNEL_RATIOS[name]
+            target = out[name]
+            denominator = out.get(ratio.denominator)
+            if denominator is None:
+                denominator = columns[ratio.denominator]
+            numerator = ratio.numerator
+            if not isinstance(numerator, numbers.Number):
+                numerator = columns[numerator]
+            if ratio.minus is not None:
+                numerator = np.subtract(numerator, columns[ratio.minus], out=target)
+            np.divide(numerator, denominator, out=target)
+            if policy == 'ieee':
+                continue
+            if policy == 'clip':
+                np.clip(target, -limit, limit, out=target)
+                rows = np.flatnonzero(np.equal(denominator, 0, out=usable))
+                if len(rows):
+                    target[rows] = np.sign(_numerator_at(ratio, columns, rows)) * limit
+                continue
+
+            np.greater(denominator, 0, out=usable)
+            np.isfinite(denominator, out=finite)
+            np.logical_and(usable, finite, out=usable)
+            if usable.all():
+                continue
+            if policy == 'nan':
+                np.copyto(target, np.nan, where=~usable)
+            elif name in bits:
+                flags[~usable] |= bits[name]
+    return block, flags
+
+
+def fused_ratios(columns, names=None, policy='ieee', limit=CLIP_LIMIT):
+    """
+    Every requested ratio in one pass, written straight into one preallocated block
+    columns maps statement column names to equal-length float64 arrays. Each ratio is one
+    or two ufunc calls with out= set to its row of the block, so no intermediate arrays
+    are allocated; days ratios divide 365 by the turnover already in the block. Two
+    reusable boolean buffers carry the denominator checks the policy needs. Returns a
+    dict of ratio arrays (views into the block), plus FLAGS_COLUMN under the flag policy
+    """
+    names = list(RATIO_COLUMNS if names is None else names)
+    block, flags = _fused_block(columns, names, policy, limit)
+    ratios = dict(zip(names, block))
+    if flags is not None:
+        ratios[FLAGS_COLUMN] = flags
+    return ratios
+
+
+def flagged_ratios(flags, names=None):
+    """
+    Names of the ratios whose bits are set in one Denominator_Flags value
+    """
+    names = list(RATIO_COLUMNS if names is None else names)
+    return [name for bit, name in enumerate(names) if int(flags) >> bit & 1]
+
+
+@traced('ratios')
+def fused_panel_ratios(statements, names=None, policy='ieee', limit=CLIP_LIMIT):
+    """
+    calculate_panel_ratios through the fused kernel, with a denominator policy
+    Accepts the same inputs and returns the same frame (or dict, for a dict of arrays);
+    under the ieee policy the values are identical. The flag policy adds a
+    Denominator_Flags column
+    """
+    names = list(RATIO_COLUMNS if names is None else names)
+    _, reads = kernel_plan(names)
+    columns = {name: np.ascontiguousarray(statements[name], dtype=np.float64)
+               for name in reads}
+    if isinstance(statements, dict):
+        return fused_ratios(columns, names, policy, limit)
+
+    import pandas as pd
+
+    # Wrap the block's requested rows as the frame's data rather than consolidating
+    # them column by column, under the same index calculate_panel_ratios builds
+    block, flags = _fused_block(columns, names, policy, limit)
+    ratios = pd.DataFrame(block[:len(names)].T, index=panel_index(statements),
+                          columns=names, copy=False)
+    if flags is not None:
+        ratios[FLAGS_COLUMN] = flags
+    return ratios
@@ -0,0 +1,175 @@
+import os
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from finRatios import PANEL_INDEX, STATEMENT_COLUMNS, calculate_ratios
+from finTrace import traced
+
+# NAPESCO and IPG statements shipped with the analysis scripts
+DEFAULT_STATEMENTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       'statements.csv')
+
+# Optional key column of quarterly statement files, and its dtype when present
+QUARTER_COLUMN = 'Quarter'
+QUARTER_DTYPE = 'int8'
+
+# Default number of statement rows held in memory per chunk while reading
+DEFAULT_CHUNKSIZE = 100_000
+
+CSV_EXTENSIONS = ('.csv', '.csv.gz', '.csv.bz2', '.csv.zip', '.txt')
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+ARROW_EXTENSIONS = ('.feather', '.arrow', '.ipc')
+
+
+def statement_dtypes(money_dtype='float64'):
+    """
+    Compact dtype for every column of the statement schema
+    Company is categorical, Year fits int16 and EPS in fils only needs float32
+    """
+    dtypes = {'Company': 'category', 'Year': 'int16'}
+    for name in STATEMENT_COLUMNS:
+        dtypes[name] = money_dtype
+    dtypes['EPS_Fils'] = 'float32'
+    return dtypes
+
+
+def _source_columns(columns):
+    """
+    Map each schema column to the column name used in the source file
+    """
+    renames = dict(columns or {})
+    source = {schema: schema for schema in PANEL_INDEX + [QUARTER_COLUMN] + STATEMENT_COLUMNS}
+    for source_name, schema_name in renames.items():
+        source[schema_name] = source_name
+    return source
+
+
+def _normalize_chunk(frame, source, company, dtypes):
+    """
+    Rename a raw chunk onto the statement schema and cast it to compact dtypes
+    A Quarter column is kept when the source has one
+    """
+    frame = frame.rename(columns={v: k for k, v in source.items() if v != k})
+    if company is not None:
+        frame['Company'] = company
+
+    missing = [name for name in PANEL_INDEX + STATEMENT_COLUMNS
+               if name not in frame.columns]
+    if missing:
+        raise ValueError(f"Statement file is missing columns: {', '.join(missing)}")
+
+    index = PANEL_INDEX + ([QUARTER_COLUMN] if QUARTER_COLUMN in frame.columns else [])
+    frame = frame[index + STATEMENT_COLUMNS]
+    return frame.astype({name: dtypes[name] for name in frame.columns}, copy=False)
+
+
+def _read_csv_chunks(path, wanted, dtypes, chunksize):
+    source_dtypes = {name: dtype for name, dtype in dtypes.items() if name in wanted}
+    reader = pd.read_csv(path, usecols=lambda name: name in wanted,
+                         dtype=source_dtypes, chunksize=chunksize)
+    with reader:
+        yield from reader
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError as exc:
+        raise ImportError(
+            "pyarrow is required to read Parquet and Arrow/Feather statement files") from exc
+    return pyarrow
+
+
+def _read_parquet_chunks(path, wanted, chunksize):
+    _require_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    available = [name for name in parquet_file.schema_arrow.names if name in wanted]
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=available):
+        yield batch.to_pandas()
+
+
+def _read_arrow_chunks(path, wanted, chunksize):
+    pa = _require_pyarrow()
+    import pyarrow.ipc
+
+    # Memory-map the file so batches are paged in lazily instead of read up front
+    with pa.memory_map(path, 'r') as source:
+        try:
+            reader = pa.ipc.open_file(source)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        except pa.ArrowInvalid:
+            source.seek(0)
+            batches = pa.ipc.open_stream(source)
+
+        for batch in batches:
+            available = [name for name in batch.schema.names if name in wanted]
+            batch = batch.select(available)
+            # Slicing a record batch is zero-copy, so large batches stay bounded
+            for offset in range(0, batch.num_rows, chunksize):
+                yield batch.slice(offset, chunksize).to_pandas()
+
+
+def iter_statements(path, columns=None, company=None, chunksize=DEFAULT_CHUNKSIZE,
+                    money_dtype='float64'):
+    """
+    Stream a CSV, Parquet or Arrow/Feather statement dump in bounded-size chunks
+    Only the schema columns are read; each chunk comes back renamed and compactly typed
+    """
+    source = _source_columns(columns)
+    wanted = set(source.values())
+    dtypes = dict(statement_dtypes(money_dtype), **{QUARTER_COLUMN: QUARTER_DTYPE})
+    lowered = os.fspath(path).lower()
+
+    if lowered.endswith(CSV_EXTENSIONS):
+        source_dtypes = {source[name]: dtype for name, dtype in dtypes.items()}
+        chunks = _read_csv_chunks(path, wanted, source_dtypes, chunksize)
+    elif lowered.endswith(PARQUET_EXTENSIONS):
+        chunks = _read_parquet_chunks(path, wanted, chunksize)
+    elif lowered.endswith(ARROW_EXTENSIONS):
+        chunks = _read_arrow_chunks(path, wanted, chunksize)
+    else:
+        raise ValueError(f"Unsupported statement file format: {path}")
+
+    for chunk in chunks:
+        yield _normalize_chunk(chunk, source, company, dtypes)
+
+
+@traced('load')
+def load_statements(path, columns=None, company=None, chunksize=DEFAULT_CHUNKSIZE,
+                    money_dtype='float64'):
+    """
+    Load a statement dump into one frame with the schema calculate_ratios expects
+    columns maps source column names onto schema names, company fills a missing Company column
+    """
+    chunks = list(iter_statements(path, columns, company, chunksize, money_dtype))
+    if not chunks:
+        return _normalize_chunk(pd.DataFrame(columns=PANEL_INDEX + STATEMENT_COLUMNS),
+                                _source_columns(None), company,
+                                statement_dtypes(money_dtype))
+
+    # Chunks carry their own categories; union them so Company stays categorical
+    companies = union_categoricals([chunk['Company'] for chunk in chunks])
+    statements = pd.concat([chunk.drop(columns='Company') for chunk in chunks],
+                           ignore_index=True)
+    statements.insert(0, 'Company', companies)
+    return statements
+
+
+@traced('load')
+def load_company_ratios(path=DEFAULT_STATEMENTS_PATH):
+    """
+    Load the NAPESCO and IPG statements and calculate the ratio frames the charts compare
+    Returns napesco_ratios, ipg_ratios and their concatenation combined_ratios
+    """
+    statements = load_statements(path)
+
+    napesco_df = statements[statements['Company'] == 'NAPESCO'].reset_index(drop=True)
+    ipg_df = statements[statements['Company'] == 'IPG'].reset_index(drop=True)
+
+    napesco_ratios = calculate_ratios(napesco_df, 'NAPESCO')
+    ipg_ratios = calculate_ratios(ipg_df, 'IPG')
+    combined_ratios = pd.concat([napesco_ratios, ipg_ratios], axis=0)
+    return napesco_ratios, ipg_ratios, combined_ratios
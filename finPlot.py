@@ -0,0 +1,148 @@
+# matplotlib and seaborn take most of a cold start, so they are only imported the first
+# time a chart is actually drawn
+
+import contextlib
+import functools
+import inspect
+from collections import namedtuple
+
+_pyplot = None
+
+# Set while charts are being collected into a finBundle bundle instead of separate files
+_bundle = None
+
+
+def pyplot():
+    """
+    Import matplotlib.pyplot and apply the house style on first use
+    """
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        plt.style.use('ggplot')
+        sns.set_palette("Set2")
+        _pyplot = plt
+    return _pyplot
+
+
+def percent_formatter(xmax=1.0):
+    """
+    Axis formatter that shows ratio values as percentages
+    """
+    from matplotlib.ticker import PercentFormatter
+    return PercentFormatter(xmax)
+
+
+# How a chart is drawn and saved. Fields left at None, and True flags, keep each chart's
+# own setting, so the publication profile reproduces the charts exactly as they were
+# dpi overrides the save resolution, tight_layout and bbox_tight allow the layout pass and
+# the cropped bounding box, antialiased switches Agg antialiasing of lines, patches and
+# text, and png_compression is the zlib level for PNG output
+RenderProfile = namedtuple('RenderProfile', ['name', 'dpi', 'tight_layout', 'bbox_tight',
+                                             'antialiased', 'png_compression'])
+
+PUBLICATION = RenderProfile('publication', None, True, True, True, None)
+
+# Previews and CI pixel diffs: low dpi, the default subplot layout, no tight bounding box,
+# aliased drawing and the fastest zlib level. Measured with `python finBench.py profiles`
+# (synthetic two-company ratios, best of 3):
+#
+#   chart                                publication         draft
+#   comprehensive efficiency dashboard   2.80s  480KB    0.63s   55KB
+#   financial dashboard                  1.03s  240KB    0.62s   72KB
+#   correlation heatmap                  0.58s  105KB    0.42s   31KB
+#   radar chart                          0.22s  110KB    0.13s   37KB
+DRAFT = RenderProfile('draft', 72, False, False, False, 1)
+
+RENDER_PROFILES = {profile.name: profile for profile in (PUBLICATION, DRAFT)}
+
+
+def render_profile(profile):
+    """
+    Resolve a profile given by name ('draft', 'publication') or as a RenderProfile
+    """
+    if isinstance(profile, RenderProfile):
+        return profile
+    if profile not in RENDER_PROFILES:
+        raise ValueError(f"Unknown render profile: {profile!r}; "
+                         f"expected one of {', '.join(RENDER_PROFILES)}")
+    return RENDER_PROFILES[profile]
+
+
+def _profile_rc(profile):
+    if profile.antialiased:
+        return {}
+    return {'lines.antialiased': False, 'patch.antialiased': False,
+            'text.antialiased': False}
+
+
+def profiled(func):
+    """
+    Decorate a chart function taking a profile argument so its figures are built under
+    the profile's rcParams; the argument may be a profile name
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        profile = bound.arguments['profile'] = render_profile(bound.arguments['profile'])
+        rc = _profile_rc(profile)
+        if not rc:
+            return func(*bound.args, **bound.kwargs)
+
+        pyplot()
+        import matplotlib
+        with matplotlib.rc_context(rc):
+            return func(*bound.args, **bound.kwargs)
+
+    return wrapper
+
+
+def fit_layout(fig, profile):
+    """
+    Run tight_layout on a figure unless the profile keeps the default subplot layout
+    """
+    if render_profile(profile).tight_layout:
+        fig.tight_layout()
+
+
+def active_bundle():
+    return _bundle
+
+
+@contextlib.contextmanager
+def collecting_pages(bundle):
+    """
+    Send every figure saved through save_figure to bundle.add_figure instead of a file
+    """
+    global _bundle
+    previous = _bundle
+    _bundle = bundle
+    try:
+        yield bundle
+    finally:
+        _bundle = previous
+
+
+def save_figure(fig, filename, profile, dpi=None, bbox_inches=None):
+    """
+    Save a figure with the chart's own dpi and bounding box, as adjusted by the profile
+    While a bundle is collecting pages the figure becomes its next page, named by filename.
+    Returns where the figure went: filename, or the bundle and page it was added as
+    """
+    profile = render_profile(profile)
+    options = {}
+    if profile.dpi is not None or dpi is not None:
+        options['dpi'] = profile.dpi or dpi
+    if bbox_inches is not None and profile.bbox_tight:
+        options['bbox_inches'] = bbox_inches
+    if profile.png_compression is not None and str(filename).lower().endswith('.png'):
+        options['pil_kwargs'] = {'compress_level': profile.png_compression}
+    if _bundle is not None:
+        _bundle.add_figure(fig, filename, options)
+        return f"{_bundle.path} page {len(_bundle.pages)}"
+    fig.savefig(filename, **options)
+    return filename
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, RATIO_COLUMNS
+
+
+class _SortedGroups:
+    """
+    One ratio's finite values sorted by (group, value), with each group's slice offsets
+    """
+
+    def __init__(self, values, value_order, groups, n_groups):
+        # value_order sorts the finite values; a stable sort by the small group codes then
+        # keeps each group in value order and runs as a radix sort
+        order = value_order[groups[value_order] >= 0]
+        order = order[np.argsort(groups[order].astype(np.min_scalar_type(n_groups)),
+                                 kind='stable')]
+        self.rows = order
+        self.values = values[order]
+        self.groups = groups[order]
+        self.offsets = np.searchsorted(self.groups, np.arange(n_groups + 1))
+
+    def slice(self, group):
+        return self.offsets[group], self.offsets[group + 1]
+
+    def percentiles(self):
+        """
+        Share of the group at or below each value, for every indexed row in sorted order
+        Ties share the highest rank, i.e. DataFrame.rank(method='max', pct=True)
+        """
+        if not len(self.values):
+            return self.rows, np.empty(0)
+        change = ((self.groups[1:] != self.groups[:-1]) |
+                  (self.values[1:] != self.values[:-1]))
+        run_ends = np.append(np.flatnonzero(change), len(self.values) - 1)
+        run = np.concatenate([[0], np.cumsum(change)])
+        starts = self.offsets[self.groups]
+        sizes = self.offsets[self.groups + 1] - starts
+        return self.rows, (run_ends[run] + 1 - starts) / sizes
+
+
+class PercentileIndex:
+    """
+    Sorted per (ratio, year) and per (ratio, year, sector) index over a ratio universe
+    Percentile-rank and top-k queries are binary searches and slices into the presorted
+    values, and rank_all ranks every company on every ratio in one vectorized pass
+    Non-finite ratios (zero denominators) are left out of the peer groups. Peers are
+    grouped by year, so quarterly ratio panels are rejected
+    """
+
+    def __init__(self, ratios, columns=None, sectors=None):
+        if 'Quarter' in ratios.columns or 'Quarter' in ratios.index.names:
+            raise ValueError("PercentileIndex ranks annual (Company, Year) ratios; select "
+                             "one quarter and drop the Quarter key of a quarterly panel first")
+        if all(name in ratios.columns for name in PANEL_INDEX):
+            ratios = ratios.set_index(PANEL_INDEX)
+        self.columns = [name for name in (columns or RATIO_COLUMNS) if name in ratios.columns]
+        self.index = ratios.index
+        self.sectors = dict(sectors or {})
+
+        companies = self.index.get_level_values('Company').astype(str)
+        years = self.index.get_level_values('Year').to_numpy()
+        self.companies = np.asarray(companies, dtype=object)
+        self.years = years
+
+        year_codes, self.year_labels = pd.factorize(years, sort=True)
+        self._year_groups = {int(year): code for code, year in enumerate(self.year_labels)}
+
+        if self.sectors:
+            sector_codes, sector_labels = pd.factorize(pd.Series(companies).map(self.sectors))
+            known = sector_codes >= 0
+            combined = year_codes[known] * len(sector_labels) + sector_codes[known]
+            sector_codes = np.full(len(known), -1)
+            sector_codes[known], labels = pd.factorize(combined)
+            self._sector_groups = {
+                (int(self.year_labels[label // len(sector_labels)]),
+                 sector_labels[label % len(sector_labels)]): code
+                for code, label in enumerate(labels)}
+        else:
+            sector_codes = None
+            self._sector_groups = {}
+
+        self._values = {}
+        self._by_year = {}
+        self._by_sector = {}
+        for name in self.columns:
+            values = self._values[name] = ratios[name].to_numpy(dtype=np.float64)
+            finite = np.flatnonzero(np.isfinite(values))
+            value_order = finite[np.argsort(values[finite])]
+            self._by_year[name] = _SortedGroups(values, value_order, year_codes,
+                                                len(self.year_labels))
+            if sector_codes is not None:
+                self._by_sector[name] = _SortedGroups(values, value_order, sector_codes,
+                                                      len(self._sector_groups))
+
+    def _group(self, ratio, year, sector):
+        if sector is None:
+            return self._by_year[ratio], self._year_groups[year]
+        return self._by_sector[ratio], self._sector_groups[(year, sector)]
+
+    def peers(self, ratio, year, sector=None):
+        """
+        Number of companies with a finite value for the ratio in that year (and sector)
+        """
+        groups, group = self._group(ratio, year, sector)
+        start, end = groups.slice(group)
+        return end - start
+
+    def percentile(self, ratio, year, value, sector=None):
+        """
+        Share of peers at or below value, for a scalar or an array of values
+        """
+        groups, group = self._group(ratio, year, sector)
+        start, end = groups.slice(group)
+        if end == start:
+            return np.full(np.shape(value), np.nan)[()]
+        position = np.searchsorted(groups.values[start:end], value, side='right')
+        return position / (end - start)
+
+    def company_percentile(self, ratio, company, year, sector=False):
+        """
+        Percentile of one company against all peers that year, or within its own sector
+        NaN for a sector ranking of a company with no sector, as in rank_all
+        """
+        value = self._values[ratio][self.index.get_loc((company, year))]
+        if not np.isfinite(value) or (sector and company not in self.sectors):
+            return np.nan
+        return self.percentile(ratio, year, value, self.sectors[company] if sector else None)
+
+    def top_k(self, ratio, year, k=10, sector=None, largest=True):
+        """
+        The k highest (or lowest) companies on a ratio that year, best first
+        """
+        groups, group = self._group(ratio, year, sector)
+        start, end = groups.slice(group)
+        if largest:
+            rows = groups.rows[max(end - k, start):end][::-1]
+            values = groups.values[max(end - k, start):end][::-1]
+        else:
+            rows = groups.rows[start:min(start + k, end)]
+            values = groups.values[start:min(start + k, end)]
+        return pd.DataFrame({'Company': self.companies[rows], 'Year': self.years[rows],
+                             ratio: values})
+
+    def rank_all(self, sector=False):
+        """
+        Percentile of every company on every ratio within its year (or year and sector)
+        Returns a frame aligned with the indexed ratios; NaN where a ratio is not finite
+        """
+        levels = self._by_sector if sector else self._by_year
+        result = {}
+        for name in self.columns:
+            rows, percentiles = levels[name].percentiles()
+            column = np.full(len(self.index), np.nan)
+            column[rows] = percentiles
+            result[name] = column
+        return pd.DataFrame(result, index=self.index, columns=self.columns)
@@ -0,0 +1,236 @@
+# numpy and pandas are imported inside the functions that need them, so importing this
+# module stays cheap for workers that only compute ratios
+
+from collections import namedtuple
+
+from finTrace import traced
+
+# Statement line items the ratio calculations read, in the order of the source data
+STATEMENT_COLUMNS = ['Revenue', 'Cost_of_Sales', 'Gross_Profit', 'Operating_Income',
+                     'Net_Income', 'Current_Assets', 'Inventory', 'Accounts_Receivable',
+                     'Cash_Equivalents', 'Total_Assets', 'Current_Liabilities',
+                     'Total_Liabilities', 'Shareholders_Equity', 'Operating_Cash_Flow',
+                     'Depreciation', 'Accounts_Payable', 'EPS_Fils']
+
+# Ratio columns in the order calculate_ratios produces them
+RATIO_COLUMNS = ['Current_Ratio', 'Quick_Ratio', 'Cash_Ratio',
+                 'Gross_Profit_Margin', 'Operating_Profit_Margin', 'Net_Profit_Margin',
+                 'ROA', 'ROE',
+                 'Asset_Turnover', 'Inventory_Turnover', 'Days_Inventory_Outstanding',
+                 'Receivables_Turnover', 'Days_Sales_Outstanding',
+                 'Payables_Turnover', 'Days_Payables_Outstanding',
+                 'Debt_Ratio', 'Debt_to_Equity', 'Equity_Multiplier']
+
+PANEL_INDEX = ['Company', 'Year']
+
+# A ratio names the statement columns or other ratios it reads and how it combines them
+# The formula gets its inputs positionally and must work on scalars, arrays and Series
+RatioDefinition = namedtuple('RatioDefinition', ['name', 'inputs', 'formula'])
+
+RATIO_REGISTRY = {}
+
+
+def register_ratio(name, inputs, formula):
+    """
+    Add a ratio to the registry, replacing any earlier definition with the same name
+    """
+    RATIO_REGISTRY[name] = RatioDefinition(name, tuple(inputs), formula)
+
+
+# Liquidity Ratios - measure short-term debt paying ability
+register_ratio('Current_Ratio', ['Current_Assets', 'Current_Liabilities'],
+               lambda current_assets, current_liabilities: current_assets / current_liabilities)
+register_ratio('Quick_Ratio', ['Current_Assets', 'Inventory', 'Current_Liabilities'],
+               lambda current_assets, inventory, current_liabilities:
+               (current_assets - inventory) / current_liabilities)
+register_ratio('Cash_Ratio', ['Cash_Equivalents', 'Current_Liabilities'],
+               lambda cash, current_liabilities: cash / current_liabilities)
+
+# Profitability Ratios - measure company's ability to generate profits
+register_ratio('Gross_Profit_Margin', ['Gross_Profit', 'Revenue'],
+               lambda gross_profit, revenue: gross_profit / revenue)
+register_ratio('Operating_Profit_Margin', ['Operating_Income', 'Revenue'],
+               lambda operating_income, revenue: operating_income / revenue)
+register_ratio('Net_Profit_Margin', ['Net_Income', 'Revenue'],
+               lambda net_income, revenue: net_income / revenue)
+register_ratio('ROA', ['Net_Income', 'Total_Assets'],
+               lambda net_income, total_assets: net_income / total_assets)
+register_ratio('ROE', ['Net_Income', 'Shareholders_Equity'],
+               lambda net_income, equity: net_income / equity)
+
+# Efficiency Ratios - measure how well company uses its assets
+register_ratio('Asset_Turnover', ['Revenue', 'Total_Assets'],
+               lambda revenue, total_assets: revenue / total_assets)
+register_ratio('Inventory_Turnover', ['Cost_of_Sales', 'Inventory'],
+               lambda cost_of_sales, inventory: cost_of_sales / inventory)
+register_ratio('Days_Inventory_Outstanding', ['Inventory_Turnover'],
+               lambda inventory_turnover: 365 / inventory_turnover)
+register_ratio('Receivables_Turnover', ['Revenue', 'Accounts_Receivable'],
+               lambda revenue, receivables: revenue / receivables)
+register_ratio('Days_Sales_Outstanding', ['Receivables_Turnover'],
+               lambda receivables_turnover: 365 / receivables_turnover)
+register_ratio('Payables_Turnover', ['Cost_of_Sales', 'Accounts_Payable'],
+               lambda cost_of_sales, payables: cost_of_sales / payables)
+register_ratio('Days_Payables_Outstanding', ['Payables_Turnover'],
+               lambda payables_turnover: 365 / payables_turnover)
+register_ratio('Cash_Conversion_Cycle', ['Days_Inventory_Outstanding',
+                                         'Days_Sales_Outstanding',
+                                         'Days_Payables_Outstanding'],
+               lambda dio, dso, dpo: dio + dso - dpo)
+
+# Solvency Ratios - measure long-term debt paying ability
+register_ratio('Debt_Ratio', ['Total_Liabilities', 'Total_Assets'],
+               lambda total_liabilities, total_assets: total_liabilities / total_assets)
+register_ratio('Debt_to_Equity', ['Total_Liabilities', 'Shareholders_Equity'],
+               lambda total_liabilities, equity: total_liabilities / equity)
+register_ratio('Equity_Multiplier', ['Total_Assets', 'Shareholders_Equity'],
+               lambda total_assets, equity: total_assets / equity)
+
+
+def ratio_plan(names, available=()):
+    """
+    Order the requested ratios and every ratio they depend on so inputs come first
+    Names in available (columns already present in the source) are read, not computed
+    Returns the ratios to compute in order and the source columns they read
+    """
+    available = set(available)
+    order = []
+    reads = []
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Ratio dependency cycle: {' -> '.join(path + [name])}")
+        if name in available or name not in RATIO_REGISTRY:
+            if name not in available and name not in STATEMENT_COLUMNS:
+                raise ValueError(f"Unknown ratio or statement column: {name}")
+            state[name] = 'done'
+            reads.append(name)
+            return
+        state[name] = 'visiting'
+        for dependency in RATIO_REGISTRY[name].inputs:
+            visit(dependency, path + [name])
+        state[name] = 'done'
+        order.append(name)
+
+    for name in names:
+        visit(name, [])
+    return order, reads
+
+
+def evaluate_ratios(source, names=None):
+    """
+    Evaluate the requested ratios (all of RATIO_COLUMNS by default) from a source of columns
+    source is anything indexable by column name: a DataFrame, a row Series or a dict of
+    arrays. Only the requested ratios and their dependencies are computed, each once, and
+    columns already in the source are reused. Returns a dict of the requested ratios
+    """
+    names = list(RATIO_COLUMNS if names is None else names)
+    order, reads = ratio_plan(names, [name for name in RATIO_REGISTRY if name in source])
+
+    values = {name: source[name] for name in reads}
+    for name in order:
+        definition = RATIO_REGISTRY[name]
+        values[name] = definition.formula(*(values[dependency]
+                                            for dependency in definition.inputs))
+    return {name: values[name] for name in names}
+
+
+@traced('ratios')
+def calculate_ratios(df, company_name, names=None):
+    """
+    Calculate comprehensive financial ratios for analysis
+    This function computes liquidity, profitability, efficiency, and solvency ratios
+    names limits the output to those ratios (all of RATIO_COLUMNS by default)
+    """
+    import pandas as pd
+
+    ratios = pd.DataFrame()
+    ratios['Year'] = df['Year']
+    ratios['Company'] = company_name
+
+    for name, values in evaluate_ratios(df, names).items():
+        ratios[name] = values
+
+    return ratios
+
+
+def _index_level(column):
+    """
+    Codes and level values of one index column, without hashing where avoidable
+    Categoricals reuse their codes, small integer ranges become offsets from the minimum
+    and sorted string columns, such as the Company keys of a sorted panel, number their
+    runs of equal values; anything else is factorized
+    """
+    import numpy as np
+    import pandas as pd
+
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.array.codes, column.cat.categories
+    if column.dtype.kind in 'iu' and len(column):
+        values = column.to_numpy()
+        low, high = int(values.min()), int(values.max())
+        if high - low < 2 ** 15:
+            level = pd.Index(np.arange(low, high + 1, dtype=values.dtype))
+            # Written straight into the code dtype MultiIndex keeps for a level this size
+            codes = np.empty(len(values), dtype=np.int8 if len(level) < 127 else np.int16)
+            np.subtract(values, low, out=codes, casting='unsafe')
+            return codes, level
+    if isinstance(column.dtype, pd.StringDtype) and len(column) > 1 and not column.hasnans:
+        values = column.array
+        if not np.asarray(values[1:] < values[:-1], dtype=bool).any():
+            starts = np.asarray(values[1:] > values[:-1], dtype=bool)
+            codes = np.zeros(len(values), dtype=np.int32)
+            np.cumsum(starts, out=codes[1:])
+            return codes, pd.Index(values.take(np.flatnonzero(np.r_[True, starts])))
+    codes, level = pd.factorize(column)
+    return codes, pd.Index(level)
+
+
+def panel_index(statements):
+    """
+    (Company, Year) index for a frame with those columns, or the frame's own index
+    A Quarter column makes it (Company, Year, Quarter). Built from the key columns alone;
+    set_index would copy every column of the frame
+    """
+    import pandas as pd
+
+    if not all(name in statements.columns for name in PANEL_INDEX):
+        return statements.index
+    names = PANEL_INDEX + (['Quarter'] if 'Quarter' in statements.columns else [])
+    codes, levels = zip(*(_index_level(statements[name]) for name in names))
+    return pd.MultiIndex(levels=levels, codes=codes, names=names, verify_integrity=False)
+
+
+@traced('ratios')
+def calculate_panel_ratios(statements, names=None):
+    """
+    Calculate financial ratios for a long (Company, Year) statement table in one pass
+    Accepts either Company/Year columns or a (Company, Year) index and returns a frame
+    indexed by (Company, Year) with the same ratio columns as calculate_ratios; quarterly
+    tables with a Quarter column are indexed by (Company, Year, Quarter)
+    A plain dict of column arrays is also accepted and gives a dict of ratio arrays back
+    without touching pandas. names selects a subset of ratios; only the statement
+    columns those ratios need are read
+    """
+    import numpy as np
+
+    names = list(RATIO_COLUMNS if names is None else names)
+
+    # Pull each line item the plan reads out once as a contiguous float array
+    _, reads = ratio_plan(names)
+    col = {name: np.asarray(statements[name], dtype=np.float64) for name in reads}
+
+    # Zero denominators give inf/NaN just like the pandas path, without warnings
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = evaluate_ratios(col, names)
+
+    if isinstance(statements, dict):
+        return ratios
+
+    import pandas as pd
+
+    # Keep the ratio arrays as they are instead of consolidating them into one block
+    return pd.DataFrame(ratios, index=panel_index(statements), columns=names, copy=False)
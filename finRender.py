@@ -0,0 +1,124 @@
+import os
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+# A chart to render: a picklable module-level function plus its arguments
+RenderJob = namedtuple('RenderJob', ['name', 'function', 'args', 'kwargs'])
+
+# Outcome of one job; error holds the formatted traceback when the job failed
+RenderResult = namedtuple('RenderResult', ['name', 'seconds', 'error'])
+
+
+class RenderError(RuntimeError):
+    """
+    Raised when one or more render jobs fail
+    Carries the failed results and every result collected before stopping
+    """
+
+    def __init__(self, failures, results):
+        self.failures = failures
+        self.results = results
+        names = ', '.join(result.name for result in failures)
+        super().__init__(f"{len(failures)} render job(s) failed: {names}\n\n"
+                         f"{failures[0].error}")
+
+
+def init_render_worker():
+    """
+    Configure matplotlib once per worker process before it takes any jobs
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+
+    from finPlot import pyplot
+    pyplot()
+
+    # Workers forked from a traced run would record stages nobody writes out
+    from finTrace import disable_tracing
+    disable_tracing()
+
+
+def run_render_job(job):
+    """
+    Run a single render job and time it, capturing any exception as a traceback
+    """
+    start = time.perf_counter()
+    try:
+        job.function(*job.args, **job.kwargs)
+    except Exception:
+        return RenderResult(job.name, time.perf_counter() - start, traceback.format_exc())
+    return RenderResult(job.name, time.perf_counter() - start, None)
+
+
+def _finish(results):
+    failures = [result for result in results if result.error]
+    if failures:
+        raise RenderError(failures, results)
+    return results
+
+
+def render_serial(jobs, fail_fast=False):
+    """
+    Render jobs one after another in this process, with the same reporting as the pool
+    """
+    results = []
+    for job in jobs:
+        result = run_render_job(job)
+        results.append(result)
+        if result.error and fail_fast:
+            break
+    return _finish(results)
+
+
+def render_parallel(jobs, processes=None, max_pending=None, fail_fast=False):
+    """
+    Render jobs across a pool of worker processes and return per-job timings
+    At most max_pending jobs are in flight so an entire universe can be streamed through
+    """
+    processes = processes or os.cpu_count() or 1
+    max_pending = max_pending or processes * 4
+    jobs = iter(jobs)
+    results = []
+    pending = {}
+
+    with ProcessPoolExecutor(max_workers=processes,
+                             initializer=init_render_worker) as pool:
+        while True:
+            # Keep the queue topped up without materializing every job at once
+            for job in jobs:
+                pending[pool.submit(run_render_job, job)] = job.name
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    results.append(future.result())
+                except Exception:
+                    # The job never ran: unpicklable arguments or a worker that died
+                    results.append(RenderResult(name, 0.0, traceback.format_exc()))
+
+            broken = any(isinstance(future.exception(), BrokenProcessPool)
+                         for future in done if not future.cancelled())
+            if broken or (fail_fast and any(result.error for result in results)):
+                for future in pending:
+                    future.cancel()
+                break
+
+    return _finish(results)
+
+
+def print_render_timings(results):
+    """
+    Print how long each render job took, slowest first
+    """
+    total = sum(result.seconds for result in results)
+    print(f"\nRender timings ({len(results)} jobs, {total:.2f}s of render time):")
+    for result in sorted(results, key=lambda result: result.seconds, reverse=True):
+        print(f"  {result.name:<45} {result.seconds:7.2f}s")
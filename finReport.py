@@ -0,0 +1,306 @@
+import json
+import math
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from finDupont import DUPONT_FACTORS, dupont_table
+from finRatios import evaluate_ratios
+from finRolling import period_keys, period_labels
+from finTrace import traced
+
+
+@traced('report')
+def generate_financial_summary_report(napesco_ratios, ipg_ratios, peer_index=None):
+    """
+    Generate a comprehensive text summary of the financial analysis
+    This provides key insights and interpretations of the ratio analysis
+    With a finRank.PercentileIndex over a peer universe, a peer ranking section is added
+    The DuPont section attributes each company's ROE change to its three factors
+    """
+    # Each company's first and latest periods, annual or quarterly
+    (napesco_first, napesco_from), (napesco_last, napesco_to) = _period_endpoints(napesco_ratios)
+    (ipg_first, ipg_from), (ipg_last, ipg_to) = _period_endpoints(ipg_ratios)
+
+    print("="*60)
+    print("COMPREHENSIVE FINANCIAL ANALYSIS REPORT")
+    print(f"NAPESCO vs IPG - {napesco_from} to {napesco_to} Comparison")
+    print("="*60)
+
+    print("\n1. LIQUIDITY ANALYSIS:")
+    print("-" * 25)
+    print(
+        f"NAPESCO Current Ratio: {napesco_first['Current_Ratio']:.2f} ({napesco_from}) → {napesco_last['Current_Ratio']:.2f} ({napesco_to})")
+    print(
+        f"IPG Current Ratio: {ipg_first['Current_Ratio']:.2f} ({ipg_from}) → {ipg_last['Current_Ratio']:.2f} ({ipg_to})")
+    print(f"Interpretation: Both companies show strong liquidity positions above 1.0, with NAPESCO showing superior liquidity ratios.")
+
+    print("\n2. PROFITABILITY ANALYSIS:")
+    print("-" * 27)
+    print(
+        f"NAPESCO Net Profit Margin: {napesco_first['Net_Profit_Margin']:.2%} ({napesco_from}) → {napesco_last['Net_Profit_Margin']:.2%} ({napesco_to})")
+    print(
+        f"IPG Net Profit Margin: {ipg_first['Net_Profit_Margin']:.2%} ({ipg_from}) → {ipg_last['Net_Profit_Margin']:.2%} ({ipg_to})")
+    print(
+        f"NAPESCO ROE: {napesco_first['ROE']:.2%} ({napesco_from}) → {napesco_last['ROE']:.2%} ({napesco_to})")
+    print(
+        f"IPG ROE: {ipg_first['ROE']:.2%} ({ipg_from}) → {ipg_last['ROE']:.2%} ({ipg_to})")
+    print(f"Interpretation: NAPESCO demonstrates significantly higher profitability margins and better return on equity.")
+
+    print("\n3. EFFICIENCY ANALYSIS:")
+    print("-" * 23)
+    print(
+        f"NAPESCO Asset Turnover: {napesco_first['Asset_Turnover']:.2f} ({napesco_from}) → {napesco_last['Asset_Turnover']:.2f} ({napesco_to})")
+    print(
+        f"IPG Asset Turnover: {ipg_first['Asset_Turnover']:.2f} ({ipg_from}) → {ipg_last['Asset_Turnover']:.2f} ({ipg_to})")
+    print(f"Interpretation: IPG shows higher asset turnover, indicating more efficient asset utilization for revenue generation.")
+
+    print("\n4. SOLVENCY ANALYSIS:")
+    print("-" * 22)
+    print(
+        f"NAPESCO Debt-to-Equity: {napesco_first['Debt_to_Equity']:.2f} ({napesco_from}) → {napesco_last['Debt_to_Equity']:.2f} ({napesco_to})")
+    print(
+        f"IPG Debt-to-Equity: {ipg_first['Debt_to_Equity']:.2f} ({ipg_from}) → {ipg_last['Debt_to_Equity']:.2f} ({ipg_to})")
+    print(f"Interpretation: Both companies maintain conservative debt levels, with IPG showing higher leverage.")
+
+    print("\n5. ROE ATTRIBUTION (DUPONT):")
+    print("-" * 29)
+    print_dupont_attribution(dupont_table(pd.concat([napesco_ratios, ipg_ratios])))
+
+    if peer_index is not None:
+        print("\n6. PEER PERCENTILES:")
+        print("-" * 21)
+        print_peer_percentiles(peer_index, ['NAPESCO', 'IPG'],
+                               int(napesco_last['Year']))
+
+    print("\n" + "="*60)
+
+
+def _period_endpoints(ratios):
+    """
+    The earliest and latest rows of a ratio frame, each with its period label
+    """
+    keys = period_keys(ratios)
+    rows = ratios.iloc[[keys.argmin(), keys.argmax()]]
+    return list(zip((row for _, row in rows.iterrows()), period_labels(rows)))
+
+
+# Ratios shown in the peer ranking section of the report
+PEER_RATIOS = ['Current_Ratio', 'Net_Profit_Margin', 'ROE', 'Asset_Turnover', 'Debt_to_Equity']
+
+
+def print_peer_percentiles(peer_index, companies, year, ratios=PEER_RATIOS):
+    """
+    Print where each company sits among its peers on each ratio in the given year
+    """
+    print(f"{'Ratio':<20}" + "".join(f"{company:>12}" for company in companies) +
+          f"{'Peers':>8}")
+    for ratio in ratios:
+        cells = []
+        for company in companies:
+            percentile = peer_index.company_percentile(ratio, company, year)
+            cells.append(f"{percentile:>12.0%}")
+        print(f"{ratio:<20}" + "".join(cells) + f"{peer_index.peers(ratio, year):>8}")
+
+
+def print_dupont_attribution(dupont):
+    """
+    Print how much of each company's ROE change every DuPont factor accounts for
+    dupont is a finDupont.dupont_table; periods without a previous period are skipped
+    """
+    quarterly = 'Quarter' in dupont
+    width = 15 if quarterly else 11
+    print(f"{'Company':<10}{'Period':>{width}}{'ROE Change':>12}" +
+          "".join(f"{factor.replace('_', ' '):>19}" for factor in DUPONT_FACTORS))
+    for row in dupont.dropna(subset=['ROE_Change']).itertuples(index=False):
+        effects = [getattr(row, f'{factor}_Effect') for factor in DUPONT_FACTORS]
+        if quarterly:
+            period = (f"{int(row.Previous_Year)}Q{int(row.Previous_Quarter)}-"
+                      f"{int(row.Year)}Q{int(row.Quarter)}")
+        else:
+            period = f"{int(row.Previous_Year)}-{int(row.Year)}"
+        print(f"{row.Company:<10}{period:>{width}}{row.ROE_Change:>12.2%}" +
+              "".join(f"{effect:>19.2%}" for effect in effects))
+
+
+# A report section: the ratios it shows and how its latest value of rule_ratio reads
+# Latest values below thresholds[0] get readings[0], and so on up to readings[-1] at
+# or above thresholds[-1]; readings has one more entry than thresholds
+ReportSection = namedtuple('ReportSection', ['title', 'ratios', 'rule_ratio', 'thresholds',
+                                             'readings'])
+
+REPORT_SECTIONS = [
+    ReportSection('Liquidity', ['Current_Ratio', 'Quick_Ratio'], 'Current_Ratio', [1.0, 2.0],
+                  ['Weak liquidity: current liabilities exceed current assets',
+                   'Adequate liquidity: current assets cover current liabilities',
+                   'Strong liquidity: current assets cover current liabilities twice over']),
+    ReportSection('Profitability', ['Net_Profit_Margin', 'ROE'], 'Net_Profit_Margin',
+                  [0.0, 0.05, 0.15],
+                  ['Loss-making: expenses exceed revenue',
+                   'Thin margins: under 5% of revenue reaches net income',
+                   'Moderate margins: 5-15% of revenue reaches net income',
+                   'High margins: over 15% of revenue reaches net income']),
+    ReportSection('Efficiency', ['Asset_Turnover'], 'Asset_Turnover', [0.5, 1.5],
+                  ['Low asset utilization: under 0.5 of revenue per unit of assets',
+                   'Moderate asset utilization',
+                   'High asset utilization: over 1.5 of revenue per unit of assets']),
+    ReportSection('Solvency', ['Debt_to_Equity'], 'Debt_to_Equity', [1.0, 2.0],
+                  ['Conservative leverage: debt below equity',
+                   'Moderate leverage: debt up to twice equity',
+                   'High leverage: debt over twice equity']),
+]
+
+# Shown in place of a reading when the rule ratio has a zero denominator
+NOT_MEANINGFUL = 'Not meaningful: zero denominator'
+
+# Ratios shown as percentages; the others as plain numbers
+PERCENT_RATIOS = {'Gross_Profit_Margin', 'Operating_Profit_Margin', 'Net_Profit_Margin',
+                  'ROA', 'ROE', 'Debt_Ratio'}
+
+REPORT_FORMATS = ('text', 'markdown', 'json')
+
+# Reports formatted and handed to the writer per write call
+REPORT_BATCH = 2_000
+
+
+def report_fields(ratios, sections=REPORT_SECTIONS):
+    """
+    Everything the company reports need, for all companies of a ratio panel at once
+    ratios has Company/Year (and optionally Quarter) columns or index, annual or quarterly.
+    One row per company: its first and latest period labels, each section ratio at both
+    ends as <ratio>_From / <ratio>_To, and per section the index of its reading in
+    <title>_Reading (-1 when the rule ratio is not finite). Missing ratio columns are
+    derived from the ones present
+    """
+    if 'Company' not in ratios.columns or 'Year' not in ratios.columns:
+        ratios = ratios.reset_index()
+    names = list(dict.fromkeys(name for section in sections for name in section.ratios))
+    names += [section.rule_ratio for section in sections if section.rule_ratio not in names]
+
+    # First and latest row of each company from one sort by company and period
+    codes, companies = pd.factorize(ratios['Company'], sort=False)
+    order = np.lexsort((period_keys(ratios), codes))
+    starts = np.flatnonzero(np.r_[True, codes[order][1:] != codes[order][:-1]])
+    first = order[starts]
+    last = order[np.r_[starts[1:], len(order)] - 1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = evaluate_ratios(ratios, names)
+
+    fields = {'Company': np.asarray(companies, dtype=object)[codes[first]],
+              'From': period_labels(ratios.iloc[first]),
+              'To': period_labels(ratios.iloc[last])}
+    for name in names:
+        column = np.asarray(values[name], dtype=np.float64)
+        fields[f'{name}_From'] = column[first]
+        fields[f'{name}_To'] = column[last]
+    for section in sections:
+        latest = fields[f'{section.rule_ratio}_To']
+        reading = np.searchsorted(np.asarray(section.thresholds, dtype=np.float64), latest,
+                                  side='right')
+        fields[f'{section.title}_Reading'] = np.where(np.isfinite(latest), reading, -1)
+    return pd.DataFrame(fields)
+
+
+def _format_value(name, value):
+    if not math.isfinite(value):
+        return 'n/a'
+    return f"{value:.2%}" if name in PERCENT_RATIOS else f"{value:.2f}"
+
+
+def _trend(start, end):
+    if not (math.isfinite(start) and math.isfinite(end)):
+        return 'n/a'
+    if start == end:
+        return 'unchanged'
+    return 'up' if end > start else 'down'
+
+
+def _reading(section, index):
+    return NOT_MEANINGFUL if index < 0 else section.readings[index]
+
+
+def _text_report(company, start, end, values, readings, sections):
+    lines = [f"{company} ({start} → {end})"]
+    for section, ratios, reading in zip(sections, values, readings):
+        lines.append(f"  {section.title}:")
+        for name, first, latest in ratios:
+            lines.append(f"    {name.replace('_', ' ')}: {_format_value(name, first)} → "
+                         f"{_format_value(name, latest)} ({_trend(first, latest)})")
+        lines.append(f"    Interpretation: {_reading(section, reading)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _markdown_report(company, start, end, values, readings, sections):
+    lines = [f"## {company}", "", f"| Ratio | {start} | {end} | Trend |",
+             "|---|---:|---:|---|"]
+    for ratios in values:
+        for name, first, latest in ratios:
+            lines.append(f"| {name.replace('_', ' ')} | {_format_value(name, first)} | "
+                         f"{_format_value(name, latest)} | {_trend(first, latest)} |")
+    lines.append("")
+    for section, reading in zip(sections, readings):
+        lines.append(f"- **{section.title}:** {_reading(section, reading)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _json_value(value):
+    return value if math.isfinite(value) else None
+
+
+def _json_report(company, start, end, values, readings, sections):
+    report = {'company': company, 'from': start, 'to': end, 'sections': {
+        section.title.lower(): {
+            'ratios': {name: {'from': _json_value(first), 'to': _json_value(latest),
+                              'trend': _trend(first, latest)}
+                       for name, first, latest in ratios},
+            'interpretation': _reading(section, reading)}
+        for section, ratios, reading in zip(sections, values, readings)}}
+    return json.dumps(report, ensure_ascii=False) + "\n"
+
+
+_FORMATTERS = {'text': _text_report, 'markdown': _markdown_report, 'json': _json_report}
+
+
+def iter_reports(fields, fmt='text', sections=REPORT_SECTIONS):
+    """
+    Formatted report per company row of a report_fields frame, in row order
+    JSON reports are one object per line, so a stream of them is valid JSON Lines
+    """
+    if fmt not in _FORMATTERS:
+        raise ValueError(f"Unsupported report format: {fmt}; "
+                         f"expected one of {', '.join(REPORT_FORMATS)}")
+    formatter = _FORMATTERS[fmt]
+
+    # Plain Python columns, so formatting does not go through pandas per company
+    columns = {name: fields[name].tolist() for name in fields.columns}
+    for row in range(len(fields)):
+        values = [[(name, columns[f'{name}_From'][row], columns[f'{name}_To'][row])
+                   for name in section.ratios] for section in sections]
+        readings = [columns[f'{section.title}_Reading'][row] for section in sections]
+        yield formatter(columns['Company'][row], columns['From'][row], columns['To'][row],
+                        values, readings, sections)
+
+
+def write_reports(ratios, writer, fmt='text', sections=REPORT_SECTIONS, batch=REPORT_BATCH):
+    """
+    Stream a report per company of a ratio panel to a text writer and return the count
+    ratios is a panel frame or an iterable of them, e.g. one per chunk of a large universe;
+    each frame must hold every period of its companies. Fields are computed per frame in
+    one vectorized pass and reports are written batch at a time, so memory stays bounded
+    by the largest frame whatever the number of companies. Pass a buffered writer such as
+    open(path, 'w', buffering=1 << 20) or sys.stdout
+    """
+    if fmt not in _FORMATTERS:
+        raise ValueError(f"Unsupported report format: {fmt}; "
+                         f"expected one of {', '.join(REPORT_FORMATS)}")
+    frames = [ratios] if isinstance(ratios, pd.DataFrame) else ratios
+    written = 0
+    for frame in frames:
+        fields = report_fields(frame, sections)
+        for start in range(0, len(fields), batch):
+            chunk = fields.iloc[start:start + batch]
+            writer.write("".join(iter_reports(chunk, fmt, sections)))
+            written += len(chunk)
+    return written
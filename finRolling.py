@@ -0,0 +1,255 @@
+import numpy as np
+import pandas as pd
+
+from finRatios import STATEMENT_COLUMNS, calculate_panel_ratios
+
+# Income and cash flow items cover a period and are summed over the window; EPS too
+FLOW_COLUMNS = ['Revenue', 'Cost_of_Sales', 'Gross_Profit', 'Operating_Income',
+                'Net_Income', 'Operating_Cash_Flow', 'Depreciation', 'EPS_Fils']
+
+# Balance sheet items are point-in-time and are averaged over the window
+STOCK_COLUMNS = [name for name in STATEMENT_COLUMNS if name not in FLOW_COLUMNS]
+
+QUARTERLY_INDEX = ['Company', 'Year', 'Quarter']
+
+# Quarters in a trailing-twelve-month window
+TTM_WINDOW = 4
+
+# Float sums of integer amounts stay exact below this, so running sums do not drift
+EXACT_SUM_LIMIT = 2.0 ** 53
+
+
+def period_keys(frame):
+    """
+    Sortable integer per row: Year * 4 + Quarter - 1, with annual rows at their fourth quarter
+    """
+    years = np.asarray(frame['Year'], dtype=np.int64)
+    if 'Quarter' not in frame:
+        return years * 4 + 3
+    return years * 4 + np.asarray(frame['Quarter'], dtype=np.int64) - 1
+
+
+def period_labels(frame):
+    """
+    Display label per row: '2023' for annual rows, '2023Q4' for quarterly ones
+    """
+    if 'Quarter' not in frame:
+        return [str(year) for year in frame['Year']]
+    return [f"{year}Q{quarter}" for year, quarter in zip(frame['Year'], frame['Quarter'])]
+
+
+def period_axis(frame):
+    """
+    Numeric x position per row: the year for annual rows, year + (quarter - 1) / 4 otherwise
+    """
+    if 'Quarter' not in frame:
+        return frame['Year']
+    return np.asarray(frame['Year'], dtype=np.float64) + (np.asarray(frame['Quarter']) - 1) / 4
+
+
+def latest_rows(frame):
+    """
+    Boolean mask of the rows at the latest period every company in the frame has reached
+    """
+    keys = period_keys(frame)
+    if not len(keys):
+        return np.zeros(0, dtype=bool)
+    codes, companies = pd.factorize(np.asarray(frame['Company']))
+    reached = np.full(len(companies), keys.min())
+    np.maximum.at(reached, codes, keys)
+    return keys == reached.min()
+
+
+def latest_label(frame):
+    """
+    Display label of the frame's latest period
+    """
+    return period_labels(frame[latest_rows(frame)].iloc[:1])[0]
+
+
+def _sorted_panel(statements):
+    """
+    Company codes, names, period keys and (rows, columns) values of a quarterly panel,
+    sorted by company and period; a repeated (Company, Year, Quarter) keeps its last filing
+    """
+    if not all(name in statements.columns for name in QUARTERLY_INDEX):
+        statements = statements.reset_index()
+    missing = [name for name in QUARTERLY_INDEX if name not in statements.columns]
+    if missing:
+        raise ValueError(f"Quarterly statements are missing columns: {', '.join(missing)}")
+
+    codes, companies = pd.factorize(statements['Company'], sort=False)
+    keys = period_keys(statements)
+    order = np.lexsort((np.arange(len(keys)), keys, codes))
+    codes, keys = codes[order], keys[order]
+    last = np.r_[(codes[1:] != codes[:-1]) | (keys[1:] != keys[:-1]), True]
+    order, codes, keys = order[last], codes[last], keys[last]
+
+    values = np.column_stack([np.asarray(statements[name], dtype=np.float64)[order]
+                              for name in STATEMENT_COLUMNS])
+    return codes, np.asarray(companies, dtype=object), keys, values
+
+
+def _window_sums(values, window):
+    """
+    Sum of each row and the window - 1 rows before it, from one running sum per column
+    Columns whose absolute total could lose integer precision are summed slice by slice
+    """
+    running = np.zeros((len(values) + 1, values.shape[1]))
+    np.cumsum(values, axis=0, out=running[1:])
+    sums = running[window:] - running[:-window]
+
+    inexact = np.flatnonzero(np.abs(values).sum(axis=0) >= EXACT_SUM_LIMIT)
+    if inexact.size:
+        sums[:, inexact] = sum(values[offset:len(values) - window + 1 + offset, inexact]
+                               for offset in range(window))
+    return sums
+
+
+def _ttm_frame(companies, codes, keys, sums, window):
+    """
+    (Company, Year, Quarter) statement frame from windowed sums, averaging the stock items
+    """
+    frame = pd.DataFrame(sums, columns=STATEMENT_COLUMNS)
+    stocks = [STATEMENT_COLUMNS.index(name) for name in STOCK_COLUMNS]
+    frame.iloc[:, stocks] = sums[:, stocks] / window
+    index = pd.MultiIndex.from_arrays(
+        [pd.Categorical.from_codes(codes, companies.astype(str)), keys // 4, keys % 4 + 1],
+        names=QUARTERLY_INDEX)
+    return frame.set_index(index)
+
+
+def ttm_statements(statements, window=TTM_WINDOW):
+    """
+    Trailing statements for every company and quarter of a quarterly panel in one pass
+    statements has Company/Year/Quarter columns or index. Flow items are summed and stock
+    items averaged over the last window quarters, from running sums along the sorted panel.
+    Only quarters with window consecutive quarters of history are returned
+    """
+    if window < 1:
+        raise ValueError(f"Rolling window must be at least one quarter, got {window}")
+    codes, companies, keys, values = _sorted_panel(statements)
+    if len(keys) < window:
+        return _ttm_frame(companies, codes[:0], keys[:0], values[:0], window)
+
+    sums = _window_sums(values, window)
+    ends = np.arange(window - 1, len(keys))
+    starts = ends - window + 1
+    complete = (codes[starts] == codes[ends]) & (keys[ends] - keys[starts] == window - 1)
+    ends = ends[complete]
+    return _ttm_frame(companies, codes[ends], keys[ends], sums[complete], window)
+
+
+def ttm_ratios(statements, names=None, window=TTM_WINDOW):
+    """
+    Trailing-twelve-month ratios for a quarterly panel, indexed by (Company, Year, Quarter)
+    """
+    return calculate_panel_ratios(ttm_statements(statements, window), names)
+
+
+class RollingStatements:
+    """
+    Trailing statements kept up to date one quarter at a time
+    Each company holds a ring buffer of its last window quarters and their running sums,
+    so a new quarter costs the same however much history the company has: its value is
+    added and the quarter leaving the window subtracted. A batch may hold new quarters for
+    many companies and is applied to all of them at once. Refiling the latest quarter
+    replaces it; a skipped quarter restarts the company's window
+    """
+
+    def __init__(self, window=TTM_WINDOW):
+        if window < 1:
+            raise ValueError(f"Rolling window must be at least one quarter, got {window}")
+        self.window = window
+        self._slots = {}
+        self._buffer = np.zeros((0, window, len(STATEMENT_COLUMNS)))
+        self._sums = np.zeros((0, len(STATEMENT_COLUMNS)))
+        self._last = np.zeros(0, dtype=np.int64)
+        self._filled = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, company):
+        return company in self._slots
+
+    def _slot_indices(self, companies):
+        new = [company for company in dict.fromkeys(companies) if company not in self._slots]
+        if new:
+            for company in new:
+                self._slots[company] = len(self._slots)
+            self._buffer = np.concatenate(
+                [self._buffer, np.zeros((len(new),) + self._buffer.shape[1:])])
+            self._sums = np.concatenate([self._sums, np.zeros((len(new), self._sums.shape[1]))])
+            self._last = np.concatenate([self._last, np.full(len(new), -1, dtype=np.int64)])
+            self._filled = np.concatenate([self._filled, np.zeros(len(new), dtype=np.int64)])
+        return np.array([self._slots[company] for company in companies], dtype=np.intp)
+
+    def _push(self, slots, keys, values):
+        """
+        Apply one quarter to each of the given (distinct) companies
+        """
+        last = self._last[slots]
+        if np.any(keys < last):
+            raise ValueError("Quarters older than a company's latest quarter cannot be "
+                             "applied incrementally; rebuild with ttm_statements")
+
+        positions = keys % self.window
+        outgoing = self._buffer[slots, positions]
+        restated = keys == last
+        following = keys == last + 1
+        restart = ~(restated | following)
+
+        # Restart a company's window after a gap (or on its first quarter)
+        if restart.any():
+            self._buffer[slots[restart]] = 0.0
+            self._sums[slots[restart]] = 0.0
+            self._filled[slots[restart]] = 0
+            outgoing[restart] = 0.0
+
+        self._buffer[slots, positions] = values
+        self._sums[slots] += values - outgoing
+        self._filled[slots] = np.minimum(self._filled[slots] + ~restated, self.window)
+        self._last[slots] = keys
+
+        # Once per lap of the ring the sums are recomputed, so any rounding in fractional
+        # columns such as EPS cannot build up over a long history
+        lap = positions == self.window - 1
+        if lap.any():
+            self._sums[slots[lap]] = self._buffer[slots[lap]].sum(axis=1)
+
+        complete = self._filled[slots] == self.window
+        return complete, self._sums[slots]
+
+    def update(self, statements):
+        """
+        Apply a batch of quarterly filings and return the trailing statements they produce
+        statements has Company/Year/Quarter columns or index; companies without window
+        consecutive quarters yet are left out of the result
+        """
+        codes, companies, keys, values = _sorted_panel(statements)
+        slots = self._slot_indices(list(companies[codes]))
+
+        # The n-th quarter of every company in the batch is applied in round n, so each
+        # round touches every company at most once
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        rounds = np.arange(len(codes)) - np.repeat(starts, np.diff(np.r_[starts, len(codes)]))
+
+        done = []
+        for step in range(int(rounds.max()) + 1 if len(rounds) else 0):
+            rows = np.flatnonzero(rounds == step)
+            complete, sums = self._push(slots[rows], keys[rows], values[rows])
+            done.append((rows[complete], sums[complete]))
+
+        rows = np.concatenate([rows for rows, _ in done]) if done else np.zeros(0, np.intp)
+        sums = (np.concatenate([sums for _, sums in done]) if done
+                else np.zeros((0, len(STATEMENT_COLUMNS))))
+        order = np.argsort(rows, kind='stable')
+        rows, sums = rows[order], sums[order]
+        return _ttm_frame(companies, codes[rows], keys[rows], sums, self.window)
+
+    def update_ratios(self, statements, names=None):
+        """
+        Apply a batch of quarterly filings and return the trailing ratios they produce
+        """
+        return calculate_panel_ratios(self.update(statements), names)
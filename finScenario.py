@@ -0,0 +1,152 @@
+import zlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, RATIO_COLUMNS, STATEMENT_COLUMNS, evaluate_ratios
+
+# A relative shock to one statement line: each draw multiplies the line by
+# 1 + mean + std * z, z standard normal. Revenue ±10% is Shock('Revenue', 0.0, 0.1) and
+# an expected 20% inventory write-down, give or take 5%, is Shock('Inventory', -0.2, 0.05)
+Shock = namedtuple('Shock', ['column', 'mean', 'std'])
+
+# Lines that absorb a change in a shocked line, with the sign of the change they take,
+# so subtotals stay consistent with their parts. Profit lines move before tax and the
+# balance sheet keeps balancing through equity; there are no second-round effects
+PROPAGATION = {
+    'Revenue': [('Gross_Profit', 1), ('Operating_Income', 1), ('Net_Income', 1)],
+    'Cost_of_Sales': [('Gross_Profit', -1), ('Operating_Income', -1), ('Net_Income', -1)],
+    'Inventory': [('Current_Assets', 1), ('Total_Assets', 1), ('Shareholders_Equity', 1)],
+    'Accounts_Receivable': [('Current_Assets', 1), ('Total_Assets', 1),
+                            ('Shareholders_Equity', 1)],
+    'Cash_Equivalents': [('Current_Assets', 1), ('Total_Assets', 1),
+                         ('Shareholders_Equity', 1)],
+    'Current_Liabilities': [('Total_Liabilities', 1), ('Shareholders_Equity', -1)],
+}
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Draws generated and evaluated together; working memory is about
+# DRAW_CHUNK * 8 bytes per shocked line and per ratio computed
+DRAW_CHUNK = 250_000
+
+
+def _shock_factors(shocks, correlation):
+    """
+    Shock means and stds as arrays, and the lower Cholesky factor of their correlation
+    """
+    columns = [shock.column for shock in shocks]
+    unknown = [column for column in columns if column not in STATEMENT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Shocks on unknown statement columns: {', '.join(unknown)}")
+    if len(set(columns)) != len(columns):
+        raise ValueError("Each statement column can only be shocked once")
+
+    means = np.array([shock.mean for shock in shocks], dtype=np.float64)
+    stds = np.array([shock.std for shock in shocks], dtype=np.float64)
+    if np.any(stds < 0):
+        raise ValueError("Shock standard deviations cannot be negative")
+
+    if correlation is None:
+        return means, stds, np.eye(len(shocks))
+    correlation = np.asarray(correlation, dtype=np.float64)
+    if correlation.shape != (len(shocks), len(shocks)):
+        raise ValueError(f"Correlation matrix must be {len(shocks)}x{len(shocks)}, "
+                         f"got {'x'.join(map(str, correlation.shape))}")
+    if not np.allclose(correlation, correlation.T) or not np.allclose(np.diag(correlation), 1):
+        raise ValueError("Correlation matrix must be symmetric with a unit diagonal")
+    try:
+        return means, stds, np.linalg.cholesky(correlation)
+    except np.linalg.LinAlgError:
+        raise ValueError("Correlation matrix is not positive definite") from None
+
+
+def simulate_ratios(statement, shocks, correlation=None, draws=100_000, names=None,
+                    seed=0, chunk=DRAW_CHUNK, propagate=True):
+    """
+    Ratios of one company period under draws correlated perturbations of its statement
+    statement is a row of calculate_ratios inputs (Series or dict of scalars), shocks a
+    list of Shock and correlation an optional matrix between them, in the same order.
+    Draws are generated and evaluated chunk rows at a time as whole arrays, and with
+    propagate the change in a shocked line flows into its subtotals (see PROPAGATION).
+    Returns a dict of float32 arrays of length draws; a seed gives the same draws
+    whatever the chunk size
+    """
+    names = list(RATIO_COLUMNS if names is None else names)
+    if draws < 1 or chunk < 1:
+        raise ValueError(f"Draws and chunk size must be positive, got {draws} and {chunk}")
+    means, stds, lower = _shock_factors(shocks, correlation)
+    base = {name: float(statement[name]) for name in STATEMENT_COLUMNS}
+    targets = {shock.column: PROPAGATION.get(shock.column, []) if propagate else []
+               for shock in shocks}
+
+    rng = np.random.default_rng(seed)
+    results = {name: np.empty(draws, dtype=np.float32) for name in names}
+    for start in range(0, draws, chunk):
+        size = min(chunk, draws - start)
+        factors = 1.0 + means + stds * (rng.standard_normal((size, len(shocks))) @ lower.T)
+
+        # Lines nobody shocks stay scalars and broadcast through the formulas
+        columns = dict(base)
+        for position, shock in enumerate(shocks):
+            change = base[shock.column] * (factors[:, position] - 1.0)
+            columns[shock.column] = columns[shock.column] + change
+            for target, sign in targets[shock.column]:
+                columns[target] = columns[target] + sign * change
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = evaluate_ratios(columns, names)
+        for name in names:
+            results[name][start:start + size] = values[name]
+    return results
+
+
+def percentile_bands(samples, percentiles=DEFAULT_PERCENTILES):
+    """
+    Percentiles, mean and non-finite share of each ratio's draws, one row per ratio
+    Percentiles and mean are taken over the finite draws; Non_Finite is the share of
+    draws where the ratio hit a zero denominator
+    """
+    rows = {}
+    for name, values in samples.items():
+        finite = values[np.isfinite(values)]
+        row = dict.fromkeys((f'P{p:g}' for p in percentiles), np.nan)
+        if finite.size:
+            row.update(zip(row, np.percentile(finite, percentiles)))
+        row['Mean'] = finite.mean(dtype=np.float64) if finite.size else np.nan
+        row['Non_Finite'] = 1.0 - finite.size / values.size
+        rows[name] = row
+    return pd.DataFrame.from_dict(rows, orient='index').rename_axis('Ratio')
+
+
+def ratio_bands(statement, shocks, correlation=None, draws=100_000, names=None, seed=0,
+                percentiles=DEFAULT_PERCENTILES, chunk=DRAW_CHUNK, propagate=True):
+    """
+    Percentile bands of every ratio of one company period under the shocks
+    """
+    samples = simulate_ratios(statement, shocks, correlation, draws, names, seed, chunk,
+                              propagate)
+    return percentile_bands(samples, percentiles)
+
+
+def scenario_bands(statements, shocks, correlation=None, draws=100_000, names=None, seed=0,
+                   percentiles=DEFAULT_PERCENTILES, chunk=DRAW_CHUNK, propagate=True):
+    """
+    Percentile bands for every row of a statement panel, indexed by (Company, Year, Ratio)
+    statements has Company/Year columns or index, plus Quarter for quarterly panels, which
+    then appears in the index too. Each row draws from its own stream derived from seed
+    and its period, so its bands do not depend on the other rows in the panel
+    """
+    if not all(name in statements.columns for name in PANEL_INDEX):
+        statements = statements.reset_index()
+    index = PANEL_INDEX + (['Quarter'] if 'Quarter' in statements.columns else [])
+    bands = {}
+    for row in statements.to_dict('records'):
+        key = tuple(row[name] for name in index)
+        row_seed = np.random.SeedSequence(
+            [seed, zlib.crc32(str(row['Company']).encode())] +
+            [int(value) for value in key[1:]])
+        bands[key] = ratio_bands(row, shocks, correlation, draws, names, row_seed,
+                                 percentiles, chunk, propagate)
+    return pd.concat(bands, names=index)
@@ -0,0 +1,68 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, evaluate_ratios
+
+# score = ratio / benchmark, optionally capped at 1 and then inverted (1 - score) for
+# ratios where lower is better
+ScoreDimension = namedtuple('ScoreDimension',
+                            ['name', 'label', 'ratio', 'benchmark', 'cap', 'invert'])
+
+# Industry benchmarks behind the radar chart
+RADAR_DIMENSIONS = [
+    ScoreDimension('Profitability', 'Profitability\n(Net Profit Margin)',
+                   'Net_Profit_Margin', 1.0, False, False),
+    ScoreDimension('Liquidity', 'Liquidity\n(Current Ratio)',
+                   'Current_Ratio', 5.0, True, False),
+    ScoreDimension('Efficiency', 'Efficiency\n(Asset Turnover)',
+                   'Asset_Turnover', 4.0, False, False),
+    ScoreDimension('Solvency', 'Solvency\n(Equity Multiplier)',
+                   'Equity_Multiplier', 5.0, False, True),
+    ScoreDimension('Working_Capital', 'Working Capital\nManagement\n(Cash Conversion Cycle)',
+                   'Cash_Conversion_Cycle', 200.0, True, True),
+]
+
+
+def score_matrix(ratios, dimensions=RADAR_DIMENSIONS):
+    """
+    Score every row of a ratio source on every dimension at once
+    ratios is anything evaluate_ratios accepts; ratios a dimension needs but the source
+    lacks, such as the cash conversion cycle, are derived. Returns a (rows, dimensions) array
+    """
+    needed = list(dict.fromkeys(dimension.ratio for dimension in dimensions))
+    values = evaluate_ratios(ratios, needed)
+
+    columns = []
+    for dimension in dimensions:
+        score = np.asarray(values[dimension.ratio], dtype=np.float64) / dimension.benchmark
+        if dimension.cap:
+            score = np.minimum(score, 1.0)
+        if dimension.invert:
+            score = 1.0 - score
+        columns.append(score)
+    return np.column_stack(columns) if columns else np.empty((len(ratios), 0))
+
+
+def composite_scores(matrix, weights=None):
+    """
+    Weighted mean of the dimension scores of each row; equal weights by default
+    """
+    weights = np.ones(matrix.shape[1]) if weights is None else np.asarray(weights, np.float64)
+    return matrix @ (weights / weights.sum())
+
+
+def score_ratios(ratios, dimensions=RADAR_DIMENSIONS, weights=None):
+    """
+    Dimension scores plus a Composite column for every company-year in a ratio frame
+    The frame's index and any Company/Year columns are carried over so rows stay labelled
+    """
+    matrix = score_matrix(ratios, dimensions)
+    scores = pd.DataFrame(matrix, index=ratios.index,
+                          columns=[dimension.name for dimension in dimensions])
+    scores['Composite'] = composite_scores(matrix, weights)
+    for name in reversed(PANEL_INDEX):
+        if name in ratios.columns:
+            scores.insert(0, name, ratios[name].to_numpy())
+    return scores
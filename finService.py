@@ -0,0 +1,448 @@
+import argparse
+import ast
+import asyncio
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qsl, urlsplit
+
+import numpy as np
+
+from finLoader import DEFAULT_STATEMENTS_PATH, load_statements
+from finRatios import PANEL_INDEX, RATIO_COLUMNS, calculate_panel_ratios
+from finRender import init_render_worker
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8050
+
+# Rendered charts and serialized ratio tables kept in memory, least recently used out first
+DEFAULT_CACHE_ENTRIES = 256
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+# Modules whose create_* functions are served; finDashboards charts live under dashboards/
+CHART_MODULES = {'': 'fin', 'dashboards/': 'finDashboards'}
+
+CHART_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+RATIO_FORMATS = {'json': 'application/json', 'arrow': 'application/vnd.apache.arrow.stream'}
+
+# Chart arguments filled from the loaded panel rather than from the query string
+COMPANY_ARGUMENTS = {'napesco_ratios': 'first', 'ipg_ratios': 'second'}
+PANEL_ARGUMENTS = ('combined_df', 'combined_ratios', 'ratios_df')
+
+MAX_REQUEST_LINE = 8192
+
+# Render workers start from a clean server process instead of a fork of this one, so they
+# never inherit the listening socket or an open client connection
+WORKER_START_METHOD = ('forkserver' if 'forkserver' in multiprocessing.get_all_start_methods()
+                       else 'spawn')
+
+
+class ServiceError(Exception):
+    """
+    A request the service cannot answer, with the HTTP status to report
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def discover_charts(modules=CHART_MODULES):
+    """
+    Map chart names (create_radar_chart -> radar_chart) to (module name, function name)
+    Only functions that save one chart under a filename argument are served
+    """
+    charts = {}
+    for prefix, module_name in modules.items():
+        module = importlib.import_module(module_name)
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if (name.startswith('create_') and function.__module__ == module_name and
+                    'filename' in inspect.signature(function).parameters):
+                charts[prefix + name[len('create_'):]] = (module_name, name)
+    return charts
+
+
+def render_chart(module_name, function_name, kwargs, extension):
+    """
+    Render one chart in a worker process and return the file contents
+    The chart is drawn into a scratch directory, since some charts write under dashboards/,
+    and its "Saved:" message is discarded rather than printed by every worker
+    """
+    function = getattr(importlib.import_module(module_name), function_name)
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch, \
+            contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(scratch)
+        try:
+            os.makedirs('dashboards')
+            filename = f'chart.{extension}'
+            function(filename=filename, **kwargs)
+            for path in (filename, os.path.join('dashboards', filename)):
+                if os.path.exists(path):
+                    with open(path, 'rb') as chart_file:
+                        return chart_file.read()
+        finally:
+            os.chdir(previous)
+    raise RuntimeError(f"{function_name} did not write a chart file")
+
+
+class BoundedCache:
+    """
+    In-memory LRU cache of response bodies capped by entry count and total bytes
+    """
+
+    def __init__(self, max_entries=DEFAULT_CACHE_ENTRIES, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, content_type, body):
+        if key in self._entries:
+            self._bytes -= len(self._entries.pop(key)[1])
+        self._entries[key] = (content_type, body)
+        self._bytes += len(body)
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or
+                                          self._bytes > self.max_bytes):
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self._bytes = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(self._entries), 'bytes': self._bytes}
+
+
+def _query_value(text):
+    """
+    Query string values are Python literals where they parse (True, 2023, 0.5), else strings
+    """
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def _split(value):
+    return [item for item in value.split(',') if item] if value else None
+
+
+class RatioService:
+    """
+    Statement panel and its ratios held in memory, served as JSON/Arrow tables and charts
+    Charts render in a pool of worker processes so the event loop never waits on matplotlib.
+    Identical requests in flight at the same time share one computation, and finished
+    responses are kept in a bounded LRU cache until the panel is reloaded
+    """
+
+    def __init__(self, path=DEFAULT_STATEMENTS_PATH, processes=None,
+                 cache_entries=DEFAULT_CACHE_ENTRIES, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.path = path
+        self.processes = processes or os.cpu_count() or 1
+        self.cache = BoundedCache(cache_entries, cache_bytes)
+        self.charts = discover_charts()
+        self.coalesced = 0
+        self._inflight = {}
+        self._pool = None
+        self.reload()
+
+    def reload(self):
+        """
+        Reload the statement panel and recompute its ratios; cached responses are dropped
+        """
+        self.statements = load_statements(self.path)
+        ratios = calculate_panel_ratios(self.statements).reset_index()
+        # Same column layout as calculate_ratios, so the chart functions accept it as is;
+        # quarterly panels keep their Quarter key after Company
+        ratios['Company'] = ratios['Company'].astype(str)
+        self.keys = PANEL_INDEX + (['Quarter'] if 'Quarter' in ratios.columns else [])
+        self.ratios = ratios[['Year', 'Company'] + self.keys[2:] + RATIO_COLUMNS]
+        self.cache.clear()
+
+    def start(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes, initializer=init_render_worker,
+                mp_context=multiprocessing.get_context(WORKER_START_METHOD))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def select_ratios(self, companies=None, years=None, names=None):
+        """
+        Ratio rows for the given companies and years, limited to the given ratio columns
+        """
+        names = list(RATIO_COLUMNS if names is None else names)
+        unknown = [name for name in names if name not in RATIO_COLUMNS]
+        if unknown:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               f"Unknown ratio columns: {', '.join(unknown)}")
+        rows = np.ones(len(self.ratios), dtype=bool)
+        if companies is not None:
+            rows &= self.ratios['Company'].isin(companies).to_numpy()
+        if years is not None:
+            rows &= self.ratios['Year'].isin(years).to_numpy()
+        return self.ratios.loc[rows, self.keys + names].reset_index(drop=True)
+
+    def company_ratios(self, company):
+        frame = self.ratios[self.ratios['Company'] == company].reset_index(drop=True)
+        if frame.empty:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"No statements for company: {company}")
+        return frame
+
+    def serialize_ratios(self, query):
+        """
+        Body and content type of a /ratios response
+        """
+        fmt = query.get('format', 'json')
+        if fmt not in RATIO_FORMATS:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Unsupported ratio format: {fmt}")
+        years = _split(query.get('year'))
+        try:
+            years = [int(year) for year in years] if years else None
+        except ValueError as exc:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               f"Years must be integers: {query['year']}") from exc
+        frame = self.select_ratios(_split(query.get('company')), years,
+                                   _split(query.get('names')))
+
+        if fmt == 'arrow':
+            try:
+                import pyarrow as pa
+            except ImportError as exc:
+                raise ServiceError(HTTPStatus.NOT_IMPLEMENTED,
+                                   "pyarrow is required for Arrow responses") from exc
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            sink = io.BytesIO()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            return RATIO_FORMATS[fmt], sink.getvalue()
+
+        # JSON has no NaN or infinity; ratios with a zero denominator come back as null
+        values = frame[frame.columns[len(self.keys):]].to_numpy(dtype=np.float64)
+        keys = zip(frame['Company'], *(frame[name].astype(int) for name in self.keys[1:]))
+        records = [dict(zip(frame.columns,
+                            [company, *map(int, period)] +
+                            [float(value) if np.isfinite(value) else None for value in row]))
+                   for (company, *period), row in zip(keys, values)]
+        return RATIO_FORMATS[fmt], json.dumps(records).encode()
+
+    def chart_arguments(self, function, query):
+        """
+        Keyword arguments for a chart: ratio frames from the panel, everything else from
+        the query string. first and second pick the two companies compared
+        """
+        parameters = inspect.signature(function).parameters
+        options = {name: _query_value(value) for name, value in query.items()
+                   if name not in ('first', 'second')}
+        if 'filename' in options:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               "Charts are returned in the response; filename cannot be set")
+        kwargs = {}
+        for name in parameters:
+            if name in COMPANY_ARGUMENTS:
+                default = 'NAPESCO' if COMPANY_ARGUMENTS[name] == 'first' else 'IPG'
+                kwargs[name] = self.company_ratios(query.get(COMPANY_ARGUMENTS[name], default))
+            elif name in PANEL_ARGUMENTS:
+                kwargs[name] = self.ratios
+            elif name in options:
+                kwargs[name] = options.pop(name)
+        if options:
+            raise ServiceError(HTTPStatus.BAD_REQUEST,
+                               f"Unknown chart parameters: {', '.join(sorted(options))}")
+        try:
+            inspect.signature(function).bind(filename=None, **kwargs)
+        except TypeError as exc:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, str(exc)) from exc
+        return kwargs
+
+    async def render(self, chart, extension, query):
+        """
+        Body and content type of a chart response, rendered in the worker pool
+        """
+        if chart not in self.charts:
+            raise ServiceError(HTTPStatus.NOT_FOUND, f"Unknown chart: {chart}")
+        if extension not in CHART_FORMATS:
+            raise ServiceError(HTTPStatus.BAD_REQUEST, f"Unsupported chart format: {extension}")
+        module_name, function_name = self.charts[chart]
+        function = getattr(importlib.import_module(module_name), function_name)
+        kwargs = self.chart_arguments(function, query)
+
+        self.start()
+        body = await asyncio.get_running_loop().run_in_executor(
+            self._pool, render_chart, module_name, function_name, kwargs, extension)
+        return CHART_FORMATS[extension], body
+
+    async def respond(self, key, produce):
+        """
+        Answer from the cache, join an identical request already in flight, or produce
+        the response once and share it with everyone waiting on it
+        """
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if key in self._inflight:
+            self.coalesced += 1
+            return await asyncio.shield(self._inflight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            content_type, body = await produce()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters see the exception; retrieve it here so an unshared one is not logged
+            future.exception()
+            raise
+        else:
+            self.cache.put(key, content_type, body)
+            future.set_result((content_type, body))
+            return content_type, body
+        finally:
+            del self._inflight[key]
+
+    async def handle(self, method, target):
+        """
+        Route one request; returns (status, content type, body)
+        """
+        if method != 'GET':
+            raise ServiceError(HTTPStatus.METHOD_NOT_ALLOWED, f"Unsupported method: {method}")
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+        key = (url.path, tuple(sorted(query.items())))
+        path = url.path.strip('/')
+
+        if path == 'health':
+            body = json.dumps({'rows': len(self.ratios), 'cache': self.cache.stats(),
+                               'coalesced': self.coalesced})
+            return HTTPStatus.OK, 'application/json', body.encode()
+        if path == 'charts':
+            return HTTPStatus.OK, 'application/json', json.dumps(sorted(self.charts)).encode()
+        if path == 'ratios':
+            content_type, body = await self.respond(
+                key, lambda: asyncio.to_thread(self.serialize_ratios, query))
+            return HTTPStatus.OK, content_type, body
+        if path.startswith('charts/'):
+            chart, _, extension = path[len('charts/'):].rpartition('.')
+            content_type, body = await self.respond(
+                key, lambda: self.render(chart, extension, query))
+            return HTTPStatus.OK, content_type, body
+        raise ServiceError(HTTPStatus.NOT_FOUND, f"Not found: {url.path}")
+
+    async def serve_connection(self, reader, writer):
+        """
+        Answer HTTP/1.1 requests on one connection until the client closes it
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                if len(request_line) > MAX_REQUEST_LINE:
+                    await self._write(writer, HTTPStatus.REQUEST_URI_TOO_LONG, 'text/plain',
+                                      b'Request line too long', keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._write(writer, HTTPStatus.BAD_REQUEST, 'text/plain',
+                                      b'Malformed request line', keep_alive=False)
+                    break
+                keep_alive = (headers.get('connection', '').lower() != 'close' and
+                              version == 'HTTP/1.1')
+
+                try:
+                    status, content_type, body = await self.handle(method, target)
+                # Bad requests are reported as ServiceError; anything else is a server fault
+                except ServiceError as exc:
+                    status, content_type, body = exc.status, 'text/plain', str(exc).encode()
+                except Exception as exc:
+                    status, content_type, body = (HTTPStatus.INTERNAL_SERVER_ERROR,
+                                                  'text/plain', repr(exc).encode())
+                await self._write(writer, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _write(writer, status, content_type, body, keep_alive):
+        head = (f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Start the worker pool and listen until cancelled
+        """
+        self.start()
+        server = await asyncio.start_server(self.serve_connection, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve financial ratios and charts over HTTP')
+    parser.add_argument('--statements', default=DEFAULT_STATEMENTS_PATH)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='chart render worker processes (default: one per CPU)')
+    parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES)
+    parser.add_argument('--cache-mb', type=int, default=DEFAULT_CACHE_BYTES // 2**20)
+    args = parser.parse_args()
+
+    service = RatioService(args.statements, args.processes, args.cache_entries,
+                           args.cache_mb * 2**20)
+    print(f"Serving {len(service.ratios)} ratio rows on http://{args.host}:{args.port}")
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
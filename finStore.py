@@ -0,0 +1,272 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from finLoader import DEFAULT_CHUNKSIZE, iter_statements
+from finRatios import (PANEL_INDEX, RATIO_COLUMNS, STATEMENT_COLUMNS, evaluate_ratios,
+                       ratio_plan)
+
+# Every line item except EPS is an amount of money; EPS is quoted per share in fils
+MONEY_COLUMNS = [name for name in STATEMENT_COLUMNS if name != 'EPS_Fils']
+
+DEFAULT_MONEY_UNIT = 'JOD'
+DEFAULT_MONEY_SCALE = 1.0
+DEFAULT_EPS_SCALE = 0.01
+
+# Stored money stays below this so the sum or difference of two columns fits int32 too
+INT32_LIMIT = 2 ** 30
+
+# How a stored column maps to real values: value = stored * scale, expressed in unit
+# Money columns are further multiplied by their company's power-of-ten scale
+StoreColumn = namedtuple('StoreColumn', ['unit', 'scale', 'dtype'])
+
+
+def choose_scale(values, finest=-4, coarsest=0):
+    """
+    Coarsest power of ten, between 10**coarsest and 10**finest, that represents every
+    value as an integer multiple; values that need finer precision round at 10**finest
+    The tolerance lets float32 columns such as the loader's EPS_Fils still match
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    for exponent in range(coarsest, finest, -1):
+        scaled = values / 10.0 ** exponent
+        if np.allclose(scaled, np.round(scaled), rtol=1e-6, atol=1e-6):
+            return 10.0 ** exponent
+    return 10.0 ** finest
+
+
+def _compact_integers(values):
+    """
+    Integer column as int32 when every value fits, otherwise kept as int64
+    """
+    if values.size and np.abs(values).max() >= INT32_LIMIT:
+        return np.ascontiguousarray(values, dtype=np.int64)
+    return np.ascontiguousarray(values, dtype=np.int32)
+
+
+def _scaled_integers(values, scale):
+    values = np.asarray(values, dtype=np.float64)
+    if not np.isfinite(values).all():
+        raise ValueError("Scaled-integer columns cannot hold NaN or infinite values")
+    return np.round(values / scale).astype(np.int64)
+
+
+def company_exponents(codes, n_companies, columns, exact=True):
+    """
+    Power-of-ten exponent per company for its money columns
+    A company reporting in thousands gets 3, which loses nothing. Without exact, a company
+    too large for int32 in its own unit is also coarsened just enough to fit, which rounds
+    its values by up to about 5e-9 of its largest line item
+    """
+    exponents = np.zeros(n_companies, dtype=np.int64)
+    divisible = np.ones(n_companies, dtype=bool)
+    for exponent in range(1, 10):
+        power = 10 ** exponent
+        rows = np.ones(len(codes), dtype=bool)
+        for values in columns:
+            rows &= values % power == 0
+        divisible &= np.bincount(codes, weights=~rows, minlength=n_companies) == 0
+        if not divisible.any():
+            break
+        exponents[divisible] = exponent
+
+    if not exact:
+        rows = np.zeros(len(codes), dtype=np.int64)
+        for values in columns:
+            np.maximum(rows, np.abs(values), out=rows)
+        largest = np.zeros(n_companies, dtype=np.int64)
+        np.maximum.at(largest, codes, rows)
+        needed = np.ceil(np.log10(np.maximum(largest, 1) / INT32_LIMIT))
+        exponents = np.maximum(exponents, needed.astype(np.int64))
+    return exponents
+
+
+class StatementStore:
+    """
+    Columnar (Company, Year) statement panel held as one contiguous NumPy array per field
+    Money is stored as exact integers in a per-company power of ten of a per-column unit and
+    scale: int32, or int64 for a column that int32 cannot hold without rounding. Companies
+    are integer codes into a name table and years are int16
+    """
+
+    def __init__(self, companies, company_codes, company_scales, years, columns, units):
+        self.companies = np.asarray(companies, dtype=object)
+        self.company_codes = np.ascontiguousarray(company_codes, dtype=np.int32)
+        self.company_scales = np.asarray(company_scales, dtype=np.float64)
+        self.years = np.ascontiguousarray(years, dtype=np.int16)
+        self.columns = columns
+        self.units = units
+
+    @classmethod
+    def from_arrays(cls, companies, company_codes, years, money, eps,
+                    money_scale=DEFAULT_MONEY_SCALE, money_unit=DEFAULT_MONEY_UNIT,
+                    eps_scale=DEFAULT_EPS_SCALE, exact=True):
+        """
+        Compact int64 money columns (in money_scale units) and EPS (in eps_scale fils)
+        Pass exact=False to round companies too large for int32 so every column fits it
+        """
+        exponents = company_exponents(company_codes, len(companies),
+                                      [money[name] for name in MONEY_COLUMNS], exact)
+        divisors = (10 ** exponents)[company_codes]
+
+        columns = {}
+        units = {}
+        for name in MONEY_COLUMNS:
+            values = money[name]
+            if exponents.any():
+                values = np.round(values / divisors).astype(np.int64)
+            columns[name] = _compact_integers(values)
+            units[name] = StoreColumn(money_unit, money_scale, columns[name].dtype.name)
+        columns['EPS_Fils'] = _compact_integers(np.asarray(eps, dtype=np.int64))
+        units['EPS_Fils'] = StoreColumn('fils', eps_scale, columns['EPS_Fils'].dtype.name)
+
+        return cls(companies, company_codes, 10.0 ** exponents, years, columns, units)
+
+    @classmethod
+    def from_frame(cls, statements, money_scale=None, money_unit=DEFAULT_MONEY_UNIT,
+                   eps_scale=None, exact=True):
+        """
+        Build a store from a statement frame with Company/Year columns or index
+        Scales default to the coarsest power of ten (at most one unit) that keeps the
+        values exact; all money columns share money_scale so ratios can be computed on
+        the stored integers directly
+        """
+        if not all(name in statements.columns for name in PANEL_INDEX):
+            statements = statements.reset_index()
+
+        codes, companies = pd.factorize(statements['Company'], sort=False)
+        if money_scale is None:
+            money_scale = min(choose_scale(statements[name]) for name in MONEY_COLUMNS)
+        if eps_scale is None:
+            eps_scale = choose_scale(statements['EPS_Fils'])
+
+        money = {name: _scaled_integers(statements[name], money_scale)
+                 for name in MONEY_COLUMNS}
+        return cls.from_arrays(np.asarray(companies, dtype=object), codes,
+                               statements['Year'].to_numpy(), money,
+                               _scaled_integers(statements['EPS_Fils'], eps_scale),
+                               money_scale, money_unit, eps_scale, exact)
+
+    @classmethod
+    def from_file(cls, path, columns=None, company=None, chunksize=DEFAULT_CHUNKSIZE,
+                  money_scale=DEFAULT_MONEY_SCALE, money_unit=DEFAULT_MONEY_UNIT,
+                  eps_scale=DEFAULT_EPS_SCALE, exact=True):
+        """
+        Stream a statement file into a store one chunk at a time
+        Column scales must be given up front here since later chunks are not seen in advance
+        """
+        names = {}
+        parts = {name: [] for name in ['Company', 'Year'] + STATEMENT_COLUMNS}
+        for chunk in iter_statements(path, columns, company, chunksize):
+            labels, codes = np.unique(chunk['Company'].astype(str).to_numpy(),
+                                      return_inverse=True)
+            mapping = np.array([names.setdefault(label, len(names)) for label in labels],
+                               dtype=np.int32)
+            parts['Company'].append(mapping[codes])
+            parts['Year'].append(chunk['Year'].to_numpy(dtype=np.int16))
+            for name in MONEY_COLUMNS:
+                parts[name].append(_scaled_integers(chunk[name], money_scale))
+            parts['EPS_Fils'].append(_scaled_integers(chunk['EPS_Fils'], eps_scale))
+
+        def join(name, dtype):
+            return np.concatenate(parts[name]) if parts[name] else np.empty(0, dtype)
+
+        return cls.from_arrays(np.array(list(names), dtype=object),
+                               join('Company', np.int32), join('Year', np.int16),
+                               {name: join(name, np.int64) for name in MONEY_COLUMNS},
+                               join('EPS_Fils', np.int64),
+                               money_scale, money_unit, eps_scale, exact)
+
+    def __len__(self):
+        return len(self.years)
+
+    @property
+    def nbytes(self):
+        return (self.company_codes.nbytes + self.company_scales.nbytes + self.years.nbytes +
+                sum(column.nbytes for column in self.columns.values()))
+
+    def raw(self, name):
+        """
+        The stored integer array for a column, without copying
+        """
+        return self.columns[name]
+
+    def values(self, name, dtype=np.float64):
+        """
+        A column converted back to real values in its unit
+        """
+        values = self.columns[name].astype(dtype) * dtype(self.units[name].scale)
+        if name in MONEY_COLUMNS:
+            values *= self.company_scales.astype(dtype)[self.company_codes]
+        return values
+
+    def company_names(self):
+        return self.companies[self.company_codes]
+
+    def ratio_source(self):
+        """
+        Zero-copy mapping of statement columns for evaluate_ratios / calculate_panel_ratios
+        Every registered ratio is a quotient of money amounts from the same row, which share
+        one column scale and one company scale, so the stored integers can be used as they are
+        """
+        return dict(self.columns)
+
+    def ratios(self, names=None, dtype=np.float64):
+        """
+        Calculate ratios for every row straight from the stored arrays
+        Pass dtype=np.float32 to halve the memory of the result
+        """
+        names = list(RATIO_COLUMNS if names is None else names)
+        source = self.ratio_source()
+        _, reads = ratio_plan(names)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = evaluate_ratios({name: source[name] for name in reads}, names)
+        return RatioStore(self.companies, self.company_codes, self.years,
+                          {name: np.ascontiguousarray(values[name], dtype=dtype)
+                           for name in names})
+
+    def to_frame(self):
+        """
+        Statement frame with a categorical Company column and real-valued columns
+        EPS comes back as float32, as load_statements reads it
+        """
+        frame = pd.DataFrame({name: self.values(name, np.float32 if name == 'EPS_Fils'
+                                                else np.float64)
+                              for name in STATEMENT_COLUMNS})
+        frame.insert(0, 'Year', self.years)
+        frame.insert(0, 'Company', pd.Categorical.from_codes(self.company_codes,
+                                                             self.companies.astype(str)))
+        return frame
+
+
+class RatioStore:
+    """
+    Ratios for a statement store, sharing its company codes and years
+    """
+
+    def __init__(self, companies, company_codes, years, columns):
+        self.companies = companies
+        self.company_codes = company_codes
+        self.years = years
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.years)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def to_frame(self):
+        """
+        (Company, Year) indexed ratio frame, matching calculate_panel_ratios
+        """
+        index = pd.MultiIndex.from_arrays(
+            [pd.Categorical.from_codes(self.company_codes, self.companies.astype(str)),
+             self.years], names=PANEL_INDEX)
+        return pd.DataFrame(self.columns, index=index)
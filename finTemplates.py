@@ -0,0 +1,163 @@
+from collections import namedtuple
+
+import numpy as np
+
+from finPlot import (PUBLICATION, fit_layout, percent_formatter, profiled, pyplot,
+                    render_profile, save_figure)
+from finRatios import evaluate_ratios
+from finRolling import period_labels
+from finTrace import stage
+
+# A dashboard is a grid of panels drawn for two companies side by side
+DashboardLayout = namedtuple('DashboardLayout', ['title', 'shape', 'figsize', 'panels'])
+
+# Bars of one ratio per period for both companies
+BarPanel = namedtuple('BarPanel', ['column', 'title', 'ylabel', 'percent'])
+
+# Lines following a few ratios over the periods; labels use {0}/{1} for the company names
+TrendPanel = namedtuple('TrendPanel', ['title', 'ylabel', 'percent', 'lines'])
+TrendLine = namedtuple('TrendLine', ['company', 'column', 'style', 'label', 'divisor'])
+TrendLine.__new__.__defaults__ = (1,)
+
+
+def panel_values(ratios, column):
+    """
+    Values of a ratio column per period; registry ratios missing from the frame are derived
+    """
+    if column not in ratios:
+        return np.asarray(evaluate_ratios(ratios, [column])[column])
+    return ratios[column].to_numpy()
+
+
+class DashboardTemplate:
+    """
+    A dashboard figure built once and refilled for each company pair before saving
+    Only bar heights, line data, legend labels and axis limits change between renders
+    """
+
+    def __init__(self, layout, first_ratios, second_ratios, labels=('NAPESCO', 'IPG'),
+                 profile=PUBLICATION):
+        plt = pyplot()
+        self.layout = layout
+        self.profile = render_profile(profile)
+        self.periods = period_labels(first_ratios)
+        self.labels = tuple(labels)
+
+        self.fig, axes = plt.subplots(*layout.shape, figsize=layout.figsize)
+        self.fig.suptitle(layout.title, fontsize=16, fontweight='bold')
+        self.axes = list(np.ravel(axes))
+        self.artists = []
+        frames = (first_ratios, second_ratios)
+
+        for ax, panel in zip(self.axes, layout.panels):
+            if isinstance(panel, BarPanel):
+                artists = [ax.bar(self.periods, panel_values(frame, panel.column),
+                                  width=0.4, label=label, alpha=0.8)
+                           for frame, label in zip(frames, self.labels)]
+            else:
+                artists = [ax.plot(self.periods,
+                                   panel_values(frames[line.company], line.column) / line.divisor,
+                                   line.style, linewidth=3, markersize=8,
+                                   label=line.label.format(*self.labels))[0]
+                           for line in panel.lines]
+            self.artists.append(artists)
+
+            ax.set_title(panel.title)
+            ax.set_ylabel(panel.ylabel)
+            if panel.percent:
+                ax.yaxis.set_major_formatter(percent_formatter())
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+
+        with stage('tight_layout'):
+            fit_layout(self.fig, self.profile)
+
+    def matches(self, first_ratios):
+        """
+        Whether new ratios fit this figure; a different set of periods needs a fresh build
+        """
+        return period_labels(first_ratios) == self.periods
+
+    def update(self, first_ratios, second_ratios, labels=None):
+        """
+        Refill every panel with another company pair's ratios
+        """
+        if not self.matches(first_ratios) or not self.matches(second_ratios):
+            raise ValueError("Ratios cover different periods than this dashboard template")
+        frames = (first_ratios, second_ratios)
+        relabel = labels is not None and tuple(labels) != self.labels
+        if relabel:
+            self.labels = tuple(labels)
+
+        for ax, panel, artists in zip(self.axes, self.layout.panels, self.artists):
+            if isinstance(panel, BarPanel):
+                for container, frame in zip(artists, frames):
+                    for bar, height in zip(container.patches,
+                                           panel_values(frame, panel.column)):
+                        bar.set_height(height)
+                if relabel:
+                    for container, label in zip(artists, self.labels):
+                        container.set_label(label)
+            else:
+                for line_artist, line in zip(artists, panel.lines):
+                    line_artist.set_ydata(
+                        panel_values(frames[line.company], line.column) / line.divisor)
+                    if relabel:
+                        line_artist.set_label(line.label.format(*self.labels))
+
+            if relabel:
+                ax.legend()
+            ax.relim()
+            ax.autoscale_view()
+
+    def save(self, filename, dpi=300, relayout=False):
+        """
+        Save the current contents; the layout from the first build is reused unless relayout
+        Returns where the figure went, as save_figure does
+        """
+        if relayout:
+            with stage('tight_layout'):
+                fit_layout(self.fig, self.profile)
+        with stage('savefig'):
+            return save_figure(self.fig, filename, self.profile, dpi, bbox_inches='tight')
+
+    def close(self):
+        pyplot().close(self.fig)
+
+
+@profiled
+def render_dashboard(layout, first_ratios, second_ratios, filename=None, dpi=300,
+                     labels=('NAPESCO', 'IPG'), profile=PUBLICATION):
+    """
+    Build, save and discard one dashboard figure (the rebuild-per-call path)
+    """
+    template = DashboardTemplate(layout, first_ratios, second_ratios, labels, profile)
+    if filename:
+        saved = template.save(filename, dpi)
+        print(f"Saved: {saved}")
+    template.close()
+
+
+@profiled
+def render_dashboards(layout, pairs, dpi=300, relayout=False, profile=PUBLICATION):
+    """
+    Render one layout for many company pairs, reusing a single figure across them
+    pairs yields (first_ratios, second_ratios, labels, filename); returns the render count
+    """
+    template = None
+    count = 0
+    try:
+        for first_ratios, second_ratios, labels, filename in pairs:
+            if template is not None and template.matches(first_ratios):
+                template.update(first_ratios, second_ratios, labels)
+            else:
+                if template is not None:
+                    template.close()
+                template = DashboardTemplate(layout, first_ratios, second_ratios, labels,
+                                             profile)
+            template.save(filename, dpi, relayout)
+            count += 1
+    finally:
+        if template is not None:
+            template.close()
+    return count
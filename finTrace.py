@@ -0,0 +1,215 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Set to a file path to trace a run of fin.py or finDashboards.py
+TRACE_ENV_VAR = 'FIN_TRACE'
+TRACE_FORMAT_ENV_VAR = 'FIN_TRACE_FORMAT'
+TRACE_MEMORY_ENV_VAR = 'FIN_TRACE_MEMORY'
+
+_enabled = False
+_memory = False
+_events = []
+_open_stages = threading.local()
+_origin = 0.0
+
+
+class _NullStage:
+    # Shared no-op stage handed out while tracing is off
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """
+    One timed stage: wall time, CPU time and peak traced memory while it was open
+    """
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        stack = _stack()
+        current, peak = tracemalloc.get_traced_memory() if _memory else (0, 0)
+        # Fold the peak so far into the enclosing stages before resetting it for this one
+        for parent in stack:
+            parent.peak = max(parent.peak, peak)
+        if _memory:
+            tracemalloc.reset_peak()
+
+        self.start_memory = current
+        self.peak = current
+        self.child_wall = 0.0
+        stack.append(self)
+        self.start_cpu = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        wall = time.perf_counter() - self.start
+        cpu = time.process_time() - self.start_cpu
+
+        stack = _stack()
+        stack.pop()
+        if _memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        for parent in stack:
+            parent.peak = max(parent.peak, self.peak)
+        if stack:
+            stack[-1].child_wall += wall
+
+        _events.append({
+            'name': self.name,
+            'category': self.category,
+            'start': self.start - _origin,
+            'wall_seconds': wall,
+            'self_seconds': wall - self.child_wall,
+            'cpu_seconds': cpu,
+            'peak_memory_bytes': self.peak - self.start_memory,
+            'depth': len(stack),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'failed': exc_type is not None,
+            'args': self.args,
+        })
+        return False
+
+
+def _stack():
+    if not hasattr(_open_stages, 'stack'):
+        _open_stages.stack = []
+    return _open_stages.stack
+
+
+def stage(name, category='stage', **args):
+    """
+    Context manager timing one pipeline stage; a shared no-op when tracing is disabled
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _Stage(name, category, args)
+
+
+def traced(category='function'):
+    """
+    Decorate a function so each call is recorded as a stage named after the function
+    """
+    def decorate(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Stage(name, category, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def is_tracing():
+    return _enabled
+
+
+def enable_tracing(path=None, format='chrome', memory=True):
+    """
+    Start recording stages; with a path the trace is written there when the process exits
+    Peak memory comes from tracemalloc, which slows allocation-heavy code such as savefig
+    several-fold; pass memory=False for timings only
+    """
+    global _enabled, _memory, _origin
+    _memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _events.clear()
+    _origin = time.perf_counter()
+    _enabled = True
+    if path:
+        atexit.register(write_trace, path, format)
+
+
+def disable_tracing():
+    global _enabled, _memory
+    _enabled = False
+    _memory = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def trace_from_environment():
+    """
+    Enable tracing when FIN_TRACE names an output file
+    FIN_TRACE_FORMAT picks chrome or json and FIN_TRACE_MEMORY=0 skips memory tracking
+    """
+    path = os.environ.get(TRACE_ENV_VAR)
+    if path:
+        enable_tracing(path, os.environ.get(TRACE_FORMAT_ENV_VAR, 'chrome'),
+                       os.environ.get(TRACE_MEMORY_ENV_VAR, '1') != '0')
+
+
+def trace_events():
+    return list(_events)
+
+
+def stage_summary():
+    """
+    Aggregate recorded stages by name; self time excludes nested stages
+    """
+    summary = {}
+    for event in _events:
+        entry = summary.setdefault(event['name'], {
+            'category': event['category'], 'calls': 0, 'wall_seconds': 0.0,
+            'self_seconds': 0.0, 'cpu_seconds': 0.0, 'peak_memory_bytes': 0})
+        entry['calls'] += 1
+        entry['wall_seconds'] += event['wall_seconds']
+        entry['self_seconds'] += event['self_seconds']
+        entry['cpu_seconds'] += event['cpu_seconds']
+        entry['peak_memory_bytes'] = max(entry['peak_memory_bytes'],
+                                         event['peak_memory_bytes'])
+    return summary
+
+
+def write_trace(path, format='chrome'):
+    """
+    Write recorded stages as a Chrome trace-event file or as plain JSON with a summary
+    Chrome traces open in chrome://tracing or Perfetto
+    """
+    if format == 'chrome':
+        document = {'traceEvents': [{
+            'name': event['name'],
+            'cat': event['category'],
+            'ph': 'X',
+            'ts': event['start'] * 1e6,
+            'dur': event['wall_seconds'] * 1e6,
+            'pid': event['pid'],
+            'tid': event['tid'],
+            'args': dict(event['args'],
+                         cpu_ms=event['cpu_seconds'] * 1e3,
+                         peak_memory_kb=event['peak_memory_bytes'] / 1024,
+                         failed=event['failed']),
+        } for event in _events], 'displayTimeUnit': 'ms'}
+    elif format == 'json':
+        document = {'events': _events, 'summary': stage_summary()}
+    else:
+        raise ValueError(f"Unknown trace format: {format}")
+
+    with open(path, 'w') as trace_file:
+        json.dump(document, trace_file, indent=1, default=str)
+    return path
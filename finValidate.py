@@ -0,0 +1,155 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from finRatios import PANEL_INDEX, STATEMENT_COLUMNS
+
+# Reported statements are rounded line by line, so identities hold to within a unit
+# or so plus a small relative error
+IDENTITY_RTOL = 1e-6
+IDENTITY_ATOL = 1.0
+
+# A rule names the statement columns it reads and a check that gets them positionally
+# as arrays and returns True for every row that passes. Rows with a missing input are
+# not checked by the rule; they are reported once under MISSING_RULE instead
+ValidationRule = namedtuple('ValidationRule', ['name', 'inputs', 'check', 'message'])
+
+VALIDATION_RULES = {}
+
+MISSING_RULE = 'missing_values'
+
+# Per-row result of validate_statements: a violation table with one row per failed rule
+# (Row is the row's position in the input) and a boolean mask of the rows that passed
+StatementValidation = namedtuple('StatementValidation', ['violations', 'valid'])
+
+
+def register_rule(name, inputs, check, message):
+    """
+    Add a validation rule, replacing any earlier rule with the same name
+    """
+    unknown = [column for column in inputs if column not in STATEMENT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Rule {name} reads unknown statement columns: {', '.join(unknown)}")
+    VALIDATION_RULES[name] = ValidationRule(name, tuple(inputs), check, message)
+
+
+def matches(left, right):
+    """
+    True where two amounts agree to within the identity tolerance
+    """
+    return np.abs(left - right) <= IDENTITY_ATOL + IDENTITY_RTOL * np.abs(right)
+
+
+def within(part, whole):
+    """
+    True where part does not exceed whole beyond the identity tolerance
+    """
+    return part <= whole + IDENTITY_ATOL + IDENTITY_RTOL * np.abs(whole)
+
+
+# Accounting identities
+register_rule('gross_profit', ['Gross_Profit', 'Revenue', 'Cost_of_Sales'],
+              lambda gross_profit, revenue, cost: matches(gross_profit, revenue - cost),
+              "Gross_Profit != Revenue - Cost_of_Sales")
+register_rule('balance_sheet', ['Total_Assets', 'Total_Liabilities', 'Shareholders_Equity'],
+              lambda assets, liabilities, equity: matches(assets, liabilities + equity),
+              "Total_Assets != Total_Liabilities + Shareholders_Equity")
+
+# Components cannot exceed the totals they are part of
+for _part, _whole in [('Inventory', 'Current_Assets'),
+                      ('Accounts_Receivable', 'Current_Assets'),
+                      ('Cash_Equivalents', 'Current_Assets'),
+                      ('Current_Assets', 'Total_Assets'),
+                      ('Current_Liabilities', 'Total_Liabilities'),
+                      ('Accounts_Payable', 'Current_Liabilities')]:
+    register_rule(f'{_part.lower()}_within_{_whole.lower()}', [_part, _whole], within,
+                  f"{_part} exceeds {_whole}")
+
+# Balances and costs are never negative; profits and cash flows may be
+for _column in ['Revenue', 'Cost_of_Sales', 'Current_Assets', 'Inventory',
+                'Accounts_Receivable', 'Cash_Equivalents', 'Total_Assets',
+                'Current_Liabilities', 'Total_Liabilities', 'Depreciation',
+                'Accounts_Payable']:
+    register_rule(f'{_column.lower()}_non_negative', [_column],
+                  lambda values: values >= 0, f"{_column} is negative")
+
+# Ratio denominators that would turn whole groups of ratios into inf/NaN
+for _column in ['Revenue', 'Total_Assets', 'Current_Liabilities', 'Shareholders_Equity']:
+    register_rule(f'{_column.lower()}_non_zero', [_column],
+                  lambda values: values != 0, f"{_column} is zero")
+
+del _part, _whole, _column
+
+
+def validate_statements(statements, rules=None):
+    """
+    Check every identity, bound and sign rule across a whole statement panel at once
+    statements has Company/Year (and optionally Quarter) columns or index; rules is a list
+    of rule names, all of VALIDATION_RULES by default. Each statement column a rule reads
+    is pulled out once as a float array and each rule runs as a single column-wise
+    expression. Returns a StatementValidation whose valid mask lines up with the input
+    rows, so failing rows can be set aside before calculating ratios
+    """
+    names = list(VALIDATION_RULES if rules is None else rules)
+    unknown = [name for name in names if name not in VALIDATION_RULES]
+    if unknown:
+        raise ValueError(f"Unknown validation rules: {', '.join(unknown)}")
+    if not all(name in statements.columns for name in PANEL_INDEX):
+        statements = statements.reset_index()
+
+    reads = list(dict.fromkeys(column for name in names
+                               for column in VALIDATION_RULES[name].inputs))
+    missing = [column for column in reads if column not in statements.columns]
+    if missing:
+        raise ValueError(f"Statements are missing columns: {', '.join(missing)}")
+    col = {column: np.asarray(statements[column], dtype=np.float64) for column in reads}
+    finite = {column: np.isfinite(values) for column, values in col.items()}
+
+    failed_rows = []
+    failed_rules = []
+    incomplete = np.zeros(len(statements), dtype=bool)
+    for code, name in enumerate(names, start=1):
+        rule = VALIDATION_RULES[name]
+        checked = np.logical_and.reduce([finite[column] for column in rule.inputs])
+        incomplete |= ~checked
+        with np.errstate(invalid='ignore'):
+            ok = rule.check(*(col[column] for column in rule.inputs))
+        rows = np.flatnonzero(checked & ~ok)
+        failed_rows.append(rows)
+        failed_rules.append(np.full(len(rows), code, dtype=np.int32))
+
+    failed_rows.insert(0, np.flatnonzero(incomplete))
+    failed_rules.insert(0, np.zeros(len(failed_rows[0]), dtype=np.int32))
+    rows = np.concatenate(failed_rows)
+    codes = np.concatenate(failed_rules)
+    order = np.lexsort((codes, rows))
+    rows, codes = rows[order], codes[order]
+
+    index = PANEL_INDEX + (['Quarter'] if 'Quarter' in statements.columns else [])
+    violations = pd.DataFrame({'Row': rows})
+    for column in index:
+        violations[column] = statements[column].to_numpy()[rows]
+    violations['Rule'] = pd.Categorical.from_codes(codes, [MISSING_RULE] + names)
+
+    valid = np.ones(len(statements), dtype=bool)
+    valid[rows] = False
+    return StatementValidation(violations, valid)
+
+
+def violation_messages(violations):
+    """
+    Human-readable message for each row of a violation table
+    """
+    messages = {name: rule.message for name, rule in VALIDATION_RULES.items()}
+    messages[MISSING_RULE] = "Statement has missing or non-finite values"
+    return violations['Rule'].map(messages).astype(object)
+
+
+def quarantine_statements(statements, rules=None):
+    """
+    Split a statement panel into the rows that pass validation and the rows that do not
+    Returns clean, quarantined and the violation table explaining the quarantined rows
+    """
+    violations, valid = validate_statements(statements, rules)
+    return statements[valid], statements[~valid], violations
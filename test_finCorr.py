@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import finCorr
+from finBench import make_synthetic_statements
+from finCorr import (CORRELATION_COLUMNS, CorrelationAccumulator, RatioCorrelations,
+                     correlations_from_file)
+from finRatios import calculate_panel_ratios
+
+COLUMNS = ['a', 'b', 'c']
+
+
+def random_rows(n_rows=600, seed=0, offset=0.0):
+    rng = np.random.default_rng(seed)
+    base = rng.standard_normal((n_rows, 1))
+    values = np.hstack([base + rng.standard_normal((n_rows, 1)) * scale
+                        for scale in (0.2, 1.0, 3.0)]) + offset
+    # Missing and infinite values are dropped pairwise, as DataFrame.corr does
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[rng.random(values.shape) < 0.02] = np.inf
+    keys = rng.choice(np.array(['x', 'y', 'z'], dtype=object), n_rows)
+    return values, keys
+
+
+def expected_corr(values, keys, key):
+    frame = pd.DataFrame(values[keys == key], columns=COLUMNS)
+    return frame.replace([np.inf, -np.inf], np.nan).corr()
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    # Several blocks per batch, so groups straddle block boundaries
+    monkeypatch.setattr(finCorr, 'BLOCK_ROWS', 64)
+
+
+def test_batches_match_pairwise_complete_corr():
+    values, keys = random_rows()
+    accumulator = CorrelationAccumulator(COLUMNS)
+    for start in range(0, len(values), 150):
+        accumulator.update(values[start:start + 150], keys[start:start + 150])
+
+    assert sorted(accumulator.keys()) == ['x', 'y', 'z']
+    for key in 'xyz':
+        pd.testing.assert_frame_equal(accumulator.matrix(key), expected_corr(values, keys, key),
+                                      rtol=1e-10, atol=1e-12)
+
+
+def test_merged_accumulators_match_one_pass():
+    values, keys = random_rows(seed=1)
+    whole = CorrelationAccumulator(COLUMNS).update(values, keys)
+    # The second worker never sees group z
+    first = CorrelationAccumulator(COLUMNS).update(values[:300], keys[:300])
+    second_rows = keys[300:] != 'z'
+    second = CorrelationAccumulator(COLUMNS).update(values[300:][second_rows],
+                                                    keys[300:][second_rows])
+    merged = CorrelationAccumulator(COLUMNS).merge(first).merge(second)
+
+    expected_keys = np.r_[keys[:300], keys[300:][second_rows]]
+    expected_values = np.vstack([values[:300], values[300:][second_rows]])
+    for key in 'xyz':
+        pd.testing.assert_frame_equal(merged.matrix(key),
+                                      expected_corr(expected_values, expected_keys, key),
+                                      rtol=1e-10, atol=1e-12)
+    assert merged.count('x') == whole.count('x')
+
+
+def test_large_offsets_stay_accurate():
+    values, keys = random_rows(seed=2, offset=1e9)
+    accumulator = CorrelationAccumulator(COLUMNS)
+    for start in range(0, len(values), 100):
+        accumulator.update(values[start:start + 100], keys[start:start + 100])
+    pd.testing.assert_frame_equal(accumulator.matrix('x'), expected_corr(values, keys, 'x'),
+                                  rtol=1e-6, atol=1e-6)
+
+
+def test_degenerate_groups_give_nan():
+    accumulator = CorrelationAccumulator(COLUMNS)
+    accumulator.update([[1.0, 2.0, 3.0]], ['single'])
+    accumulator.update([[1.0, 1.0, 2.0], [1.0, 2.0, 3.0], [1.0, 4.0, 4.0]], ['flat'] * 3)
+    assert accumulator.matrix('single').isna().all().all()
+    flat = accumulator.matrix('flat')
+    assert flat['a'].isna().all()
+    assert flat.loc['b', 'c'] == pytest.approx(pd.Series([2.0, 3.0, 4.0]).corr(
+        pd.Series([1.0, 2.0, 4.0])))
+
+
+def test_merge_rejects_other_columns():
+    with pytest.raises(ValueError):
+        CorrelationAccumulator(COLUMNS).merge(CorrelationAccumulator(['a', 'b']))
+
+
+def test_file_correlations_match_full_panel(tmp_path):
+    statements = make_synthetic_statements(40, 6)
+    path = tmp_path / 'statements.csv'
+    statements.to_csv(path, index=False)
+    companies = statements['Company'].unique()
+    sectors = {company: 'even' if position % 2 == 0 else 'odd'
+               for position, company in enumerate(companies[:-1])}
+
+    correlations = correlations_from_file(str(path), sectors, chunksize=37)
+
+    ratios = calculate_panel_ratios(statements, CORRELATION_COLUMNS)
+    ratios = ratios.replace([np.inf, -np.inf], np.nan)
+    company = ratios.index.get_level_values('Company')
+    pd.testing.assert_frame_equal(correlations.universe_matrix(), ratios.corr(),
+                                  rtol=1e-9, atol=1e-12)
+    pd.testing.assert_frame_equal(correlations.company(companies[0]),
+                                  ratios[company == companies[0]].corr(),
+                                  rtol=1e-9, atol=1e-12)
+    # The last company has no sector, so it only counts towards its own and the universe
+    odd = company.isin([name for name, sector in sectors.items() if sector == 'odd'])
+    pd.testing.assert_frame_equal(correlations.sector('odd'), ratios[odd].corr(),
+                                  rtol=1e-9, atol=1e-12)
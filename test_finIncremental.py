@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finBench import make_synthetic_statements
+from finIncremental import RATIO_FILE, RatioTable
+from finRatios import RATIO_COLUMNS, calculate_panel_ratios
+
+
+def expected_ratios(statements):
+    ratios = calculate_panel_ratios(statements)
+    ratios.index = pd.MultiIndex.from_tuples(
+        [(str(company), *map(int, period)) for company, *period in ratios.index],
+        names=ratios.index.names)
+    return ratios
+
+
+def test_restated_and_appended_rows_are_patched(tmp_path):
+    statements = make_synthetic_statements(20, 4)
+    table = RatioTable.create(tmp_path, statements)
+    assert len(table) == len(statements)
+
+    restated = statements.iloc[[3, 17]].copy()
+    restated['Net_Income'] *= 2
+    appended = make_synthetic_statements(2, 1, start_year=2030, seed=5)
+    assert table.update(pd.concat([restated, appended])) == (2, len(appended))
+
+    current = pd.concat([statements.drop(statements.index[[3, 17]]), restated, appended])
+    expected = expected_ratios(current).sort_index()
+    pd.testing.assert_frame_equal(RatioTable(tmp_path).to_frame().sort_index(), expected)
+
+    company, year = restated.iloc[0][['Company', 'Year']]
+    pd.testing.assert_series_equal(table.get(company, int(year)),
+                                   expected.loc[(company, int(year))], check_names=False)
+
+
+def test_last_filing_in_a_batch_wins(tmp_path):
+    statements = make_synthetic_statements(3, 2)
+    table = RatioTable.create(tmp_path)
+    later = statements.head(1).copy()
+    later['Revenue'] *= 3
+    assert table.update(pd.concat([statements, later])) == (0, len(statements))
+    row = table.get(later['Company'].iloc[0], int(later['Year'].iloc[0]))
+    np.testing.assert_allclose(row.to_numpy(), expected_ratios(later).iloc[0].to_numpy())
+
+
+def test_interrupted_append_is_dropped_on_reopen(tmp_path):
+    statements = make_synthetic_statements(5, 2)
+    RatioTable.create(tmp_path, statements)
+    # Ratio rows written without their keys, as if the process died mid-append
+    with open(tmp_path / RATIO_FILE, 'ab') as ratio_file:
+        ratio_file.write(np.ones((3, len(RATIO_COLUMNS))).tobytes())
+
+    table = RatioTable(tmp_path)
+    assert len(table) == len(statements)
+    assert os.path.getsize(tmp_path / RATIO_FILE) == len(statements) * len(RATIO_COLUMNS) * 8
+    assert table.update(make_synthetic_statements(1, 1, start_year=2040)) == (0, 1)
+    assert len(RatioTable(tmp_path).to_frame()) == len(statements) + 1
+
+
+def test_quarterly_tables_key_by_quarter(tmp_path):
+    statements = pd.concat([make_synthetic_statements(4, 2).assign(Quarter=quarter)
+                            for quarter in (1, 2, 3, 4)], ignore_index=True)
+    table = RatioTable.create(tmp_path, statements)
+    assert table.index == ['Company', 'Year', 'Quarter']
+    assert len(table) == len(statements)
+
+    reopened = RatioTable(tmp_path)
+    frame = reopened.to_frame()
+    assert frame.index.names == ['Company', 'Year', 'Quarter']
+    row = statements.iloc[5]
+    key = (row['Company'], int(row['Year']), int(row['Quarter']))
+    pd.testing.assert_series_equal(reopened.get(*key), frame.loc[key], check_names=False)
+
+    with pytest.raises(ValueError, match='same periods'):
+        reopened.update(make_synthetic_statements(1, 1))
+    with pytest.raises(ValueError, match='same periods'):
+        RatioTable.create(tmp_path / 'annual').update(statements)
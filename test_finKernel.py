@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finBench import make_synthetic_statements
+from finKernel import (FLAGS_COLUMN, KERNEL_RATIOS, flagged_ratios, fused_panel_ratios,
+                       fused_ratios)
+from finRatios import RATIO_REGISTRY, calculate_panel_ratios
+
+
+@pytest.fixture
+def statements():
+    statements = make_synthetic_statements(30, 4)
+    # Zero, negative and missing denominators in the rows the policies treat differently
+    statements.loc[0, 'Revenue'] = 0.0
+    statements.loc[1, 'Shareholders_Equity'] = -50.0
+    statements.loc[2, 'Inventory'] = np.nan
+    statements.loc[3, ['Current_Liabilities', 'Cash_Equivalents']] = 0.0
+    return statements
+
+
+def test_ieee_matches_panel_engine(statements):
+    fused = fused_panel_ratios(statements)
+    expected = calculate_panel_ratios(statements)
+    pd.testing.assert_frame_equal(fused, expected)
+
+    columns = {name: statements[name].to_numpy() for name in statements.columns[2:]}
+    arrays = fused_panel_ratios(columns, ['ROE', 'Days_Inventory_Outstanding'])
+    np.testing.assert_array_equal(arrays['ROE'], expected['ROE'].to_numpy())
+
+
+def test_nan_policy_blanks_unusable_denominators(statements):
+    ratios = fused_panel_ratios(statements, policy='nan')
+    expected = calculate_panel_ratios(statements)
+    assert ratios['Net_Profit_Margin'].isna().iloc[0]
+    assert ratios['ROE'].isna().iloc[1]
+    assert ratios['Inventory_Turnover'].isna().iloc[2]
+    assert ratios['Days_Inventory_Outstanding'].isna().iloc[2]
+    usable = statements['Revenue'].to_numpy() > 0
+    np.testing.assert_array_equal(ratios['Net_Profit_Margin'].to_numpy()[usable],
+                                  expected['Net_Profit_Margin'].to_numpy()[usable])
+
+
+def test_clip_policy_clamps_instead_of_overwriting():
+    columns = {'Net_Income': np.array([5.0, 0.0, -5.0, 5.0, np.nan, 3e7, 2.0]),
+               'Revenue': np.array([0.0, 0.0, 0.0, -2.0, 0.0, 1e-3, np.inf])}
+    ratios = fused_ratios(columns, ['Net_Profit_Margin'], policy='clip', limit=1e6)
+    np.testing.assert_array_equal(ratios['Net_Profit_Margin'],
+                                  [1e6, 0.0, -1e6, -2.5, np.nan, 1e6, 0.0])
+
+
+def test_clip_feeds_clipped_ratios_forward():
+    columns = {'Cost_of_Sales': np.array([10.0, 10.0]), 'Inventory': np.array([0.0, 5.0])}
+    ratios = fused_ratios(columns, ['Days_Inventory_Outstanding'], policy='clip', limit=1e6)
+    np.testing.assert_allclose(ratios['Days_Inventory_Outstanding'], [365 / 1e6, 365 / 2])
+
+
+def test_flag_policy_sets_one_bit_per_ratio(statements):
+    names = ['Net_Profit_Margin', 'ROE', 'Current_Ratio', 'Cash_Ratio']
+    ratios = fused_panel_ratios(statements, names, policy='flag')
+    expected = calculate_panel_ratios(statements, names)
+    pd.testing.assert_frame_equal(ratios[names], expected)
+
+    flags = ratios[FLAGS_COLUMN].to_numpy()
+    assert flagged_ratios(flags[0], names) == ['Net_Profit_Margin']
+    assert flagged_ratios(flags[1], names) == ['ROE']
+    assert flagged_ratios(flags[3], names) == ['Current_Ratio', 'Cash_Ratio']
+    assert not flags[4:].any()
+
+
+def test_quarterly_frames_keep_quarter(statements):
+    ratios = fused_panel_ratios(statements.assign(Quarter=2), ['ROA'])
+    assert ratios.index.names == ['Company', 'Year', 'Quarter']
+
+
+def test_rejects_unknown_policies_and_ratios(statements):
+    with pytest.raises(ValueError, match='policy'):
+        fused_panel_ratios(statements, policy='zero')
+    unsupported = [name for name in RATIO_REGISTRY if name not in KERNEL_RATIOS]
+    with pytest.raises(ValueError, match='No fused kernel'):
+        fused_panel_ratios(statements, unsupported[:1])
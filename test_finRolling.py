@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from finRatios import STATEMENT_COLUMNS
+from finRolling import (FLOW_COLUMNS, TTM_WINDOW, RollingStatements, period_keys,
+                        ttm_statements)
+
+
+def quarterly_panel(companies=('A', 'B', 'C'), years=range(2019, 2023), seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [dict(Company=company, Year=year, Quarter=quarter)
+            for company in companies for year in years for quarter in range(1, 5)]
+    panel = pd.DataFrame(rows)
+    for name in STATEMENT_COLUMNS:
+        panel[name] = rng.integers(1, 10_000, len(panel)).astype(np.float64)
+    return panel
+
+
+def naive_ttm(panel, window=TTM_WINDOW):
+    """
+    Trailing statements row by row: flows summed and stocks averaged over consecutive quarters
+    """
+    rows = {}
+    panel = panel.assign(Key=period_keys(panel)).drop_duplicates(
+        ['Company', 'Key'], keep='last').sort_values(['Company', 'Key'])
+    for company, group in panel.groupby('Company', sort=False):
+        keys = group['Key'].to_numpy()
+        for end in range(window - 1, len(group)):
+            if keys[end] - keys[end - window + 1] != window - 1:
+                continue
+            quarters = group.iloc[end - window + 1:end + 1]
+            row = {name: quarters[name].sum() if name in FLOW_COLUMNS
+                   else quarters[name].mean() for name in STATEMENT_COLUMNS}
+            rows[(company, keys[end] // 4, keys[end] % 4 + 1)] = row
+    frame = pd.DataFrame.from_dict(rows, orient='index')[STATEMENT_COLUMNS]
+    frame.index.names = ['Company', 'Year', 'Quarter']
+    return frame
+
+
+def assert_same_statements(actual, expected):
+    actual = actual.reset_index().astype({'Company': str, 'Year': int, 'Quarter': int})
+    expected = expected.reset_index()
+    assert list(actual[['Company', 'Year', 'Quarter']].itertuples(index=False)) == \
+        list(expected[['Company', 'Year', 'Quarter']].itertuples(index=False))
+    np.testing.assert_allclose(actual[STATEMENT_COLUMNS].to_numpy(),
+                               expected[STATEMENT_COLUMNS].to_numpy(), rtol=1e-12)
+
+
+def test_ttm_statements_match_row_by_row_windows():
+    panel = quarterly_panel()
+    # A gap for B and a refiled quarter for C, which keeps the later filing
+    panel = panel.drop(panel.index[(panel['Company'] == 'B') & (panel['Year'] == 2020) &
+                                   (panel['Quarter'] == 3)])
+    refiled = panel[(panel['Company'] == 'C') & (panel['Year'] == 2021)].head(1).copy()
+    refiled['Revenue'] += 500
+    panel = pd.concat([panel, refiled], ignore_index=True)
+
+    assert_same_statements(ttm_statements(panel), naive_ttm(panel))
+
+
+def test_rolling_updates_match_batch_ttm():
+    panel = quarterly_panel()
+    rolling = RollingStatements()
+    produced = [rolling.update(quarter)
+                for _, quarter in panel.groupby(['Year', 'Quarter'], sort=True)]
+    assert_same_statements(pd.concat(produced).sort_index(), naive_ttm(panel))
+
+
+def test_restating_latest_quarter_replaces_it():
+    panel = quarterly_panel(companies=('A',))
+    rolling = RollingStatements()
+    rolling.update(panel)
+
+    restated = panel.tail(1).copy()
+    restated[STATEMENT_COLUMNS] *= 3
+    result = rolling.update(restated)
+
+    expected = naive_ttm(pd.concat([panel.iloc[:-1], restated])).tail(1)
+    assert_same_statements(result, expected)
+
+
+def test_gap_restarts_window():
+    panel = quarterly_panel(companies=('A',), years=[2020, 2021])
+    rolling = RollingStatements()
+    rolling.update(panel[panel['Year'] == 2020])
+
+    # 2021Q1 is skipped, so the window restarts at 2021Q2 and fills again at 2022Q1
+    later = panel[(panel['Year'] == 2021) & (panel['Quarter'] > 1)]
+    assert rolling.update(later.iloc[:2]).empty
+    assert rolling.update(later.iloc[2:]).empty
+
+    following = quarterly_panel(companies=('A',), years=[2022]).head(1)
+    assert list(rolling.update(following).index) == [('A', 2022, 1)]
+
+
+def test_older_quarter_is_rejected():
+    panel = quarterly_panel(companies=('A',), years=[2020])
+    rolling = RollingStatements()
+    rolling.update(panel)
+    with pytest.raises(ValueError, match='older'):
+        rolling.update(panel.head(1))
@@ -0,0 +1,102 @@
+import asyncio
+import json
+
+import pandas as pd
+import pytest
+
+from finRatios import STATEMENT_COLUMNS
+from finService import RatioService
+
+# Long enough for a worker to start and render one chart, short enough to fail a hang
+RESPONSE_TIMEOUT = 60
+
+
+@pytest.fixture(scope='module')
+def service():
+    service = RatioService(processes=1)
+    yield service
+    service.close()
+
+
+def fetch(service, target, method='GET'):
+    """
+    Send one Connection: close request to a server in front of service and read to EOF
+    Returns the status code and body
+    """
+    async def exchange():
+        service.start()
+        server = await asyncio.start_server(service.serve_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\n"
+                         f"Connection: close\r\n\r\n".encode())
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), RESPONSE_TIMEOUT)
+            writer.close()
+        return response
+
+    head, _, body = asyncio.run(exchange()).partition(b'\r\n\r\n')
+    return int(head.split()[1]), body
+
+
+def test_chart_response_reaches_eof(service):
+    status, body = fetch(service, '/charts/radar_chart.png')
+    assert status == 200
+    assert body.startswith(b'\x89PNG')
+
+
+def test_ratios_response_reaches_eof(service):
+    status, body = fetch(service, '/ratios?company=NAPESCO')
+    assert status == 200
+    assert b'"Company": "NAPESCO"' in body
+
+
+@pytest.mark.parametrize('target, status', [
+    ('/ratios?year=last', 400),
+    ('/ratios?names=Not_A_Ratio', 400),
+    ('/ratios?format=xml', 400),
+    ('/charts/radar_chart.png?filename=x.png', 400),
+    ('/charts/radar_chart.png?colour=red', 400),
+    ('/charts/radar_chart.gif', 400),
+    ('/charts/no_such_chart.png', 404),
+    ('/charts/radar_chart.png?second=Nobody', 404),
+    ('/nowhere', 404),
+])
+def test_request_errors(service, target, status):
+    assert fetch(service, target)[0] == status
+
+
+def test_unsupported_method(service):
+    assert fetch(service, '/ratios', method='POST')[0] == 405
+
+
+def test_render_failure_is_a_server_error(service):
+    # A well-formed request whose chart raises KeyError while drawing
+    status, body = fetch(service, '/charts/ratio_comparison_chart.png?ratio_name=Nope'
+                                  '&title=Nope&formatted_as_percentage=False')
+    assert status == 500
+    assert b'KeyError' in body
+
+
+def test_repeated_requests_are_cached(service):
+    target = '/ratios?company=IPG&names=ROA'
+    before = service.cache.hits
+    first, second = fetch(service, target), fetch(service, target)
+    assert first == second
+    assert service.cache.hits == before + 1
+
+
+def test_quarterly_panel_keeps_quarter(tmp_path):
+    rows = [dict({name: 100.0 + quarter for name in STATEMENT_COLUMNS},
+                 Company=company, Year=2023, Quarter=quarter)
+            for company in ('NAPESCO', 'IPG') for quarter in (1, 2, 3, 4)]
+    path = tmp_path / 'quarterly.csv'
+    pd.DataFrame(rows).to_csv(path, index=False)
+
+    quarterly = RatioService(str(path), processes=1)
+    assert list(quarterly.ratios.columns[:3]) == ['Year', 'Company', 'Quarter']
+    _, body = quarterly.serialize_ratios({'company': 'IPG'})
+    records = json.loads(body)
+    assert [(record['Year'], record['Quarter']) for record in records] == \
+        [(2023, quarter) for quarter in (1, 2, 3, 4)]